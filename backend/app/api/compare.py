@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from app.store.models import Snapshot
+
+
+FEATURE_SECTIONS = ("timing", "repetition", "content", "interaction", "history")
+SCORE_FIELDS = ("automation_score", "coordination_score", "confidence")
+
+
+def flatten_features(features: dict) -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for section in FEATURE_SECTIONS:
+        for name, value in (features.get(section) or {}).items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            flat[f"{section}.{name}"] = float(value)
+    return flat
+
+
+def _delta(value: Optional[float], reference: Optional[float]) -> Optional[float]:
+    if value is None or reference is None:
+        return None
+    return value - reference
+
+
+def build_comparison(usernames: List[str], snapshots: Dict[str, Snapshot]) -> dict:
+    flat = {
+        username: flatten_features(snapshot.features.json if snapshot.features else {})
+        for username, snapshot in snapshots.items()
+    }
+    feature_names = sorted({name for values in flat.values() for name in values})
+
+    accounts = []
+    for username in usernames:
+        snapshot = snapshots.get(username)
+        scores = snapshot.scores if snapshot else None
+        accounts.append(
+            {
+                "username": username,
+                "snapshot_id": snapshot.id if snapshot else None,
+                "collected_at": snapshot.collected_at.isoformat() if snapshot and snapshot.collected_at else None,
+                "scores": [getattr(scores, field) if scores else None for field in SCORE_FIELDS],
+                "features": [flat.get(username, {}).get(name) for name in feature_names],
+            }
+        )
+
+    reference = accounts[0]
+    deltas = {
+        name: [_delta(account["features"][index], reference["features"][index]) for account in accounts]
+        for index, name in enumerate(feature_names)
+    }
+    score_deltas = {
+        field: [_delta(account["scores"][index], reference["scores"][index]) for account in accounts]
+        for index, field in enumerate(SCORE_FIELDS)
+    }
+    return {
+        "usernames": usernames,
+        "score_names": list(SCORE_FIELDS),
+        "feature_names": feature_names,
+        "accounts": accounts,
+        "feature_deltas": deltas,
+        "score_deltas": score_deltas,
+    }
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+from app.utils.redis_client import get_async_redis
+from app.workers.events import JOB_EVENTS_CHANNEL
+
+logger = logging.getLogger("api")
+
+
+WATCHER_QUEUE_SIZE = 16
+# Marker pushed to every watcher after the subscription was re-established; events may have been
+# missed, so watchers re-read the job state.
+RESYNC = {"resync": True}
+
+
+# One Redis subscription per API process, fanned out to per-watcher queues keyed by job id. A watcher
+# that falls behind loses its oldest queued events rather than blocking the fan-out.
+class JobEventHub:
+    def __init__(self) -> None:
+        self._watchers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._task: Optional[asyncio.Task] = None
+        self.ready = asyncio.Event()
+
+    def watch(self, job_id: str) -> asyncio.Queue:
+        self._ensure_started()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=WATCHER_QUEUE_SIZE)
+        self._watchers[job_id].add(queue)
+        return queue
+
+    def unwatch(self, job_id: str, queue: asyncio.Queue) -> None:
+        watchers = self._watchers.get(job_id)
+        if watchers is None:
+            return
+        watchers.discard(queue)
+        if not watchers:
+            del self._watchers[job_id]
+
+    @property
+    def watcher_count(self) -> int:
+        return sum(len(watchers) for watchers in self._watchers.values())
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _deliver(self, queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            pubsub = get_async_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(JOB_EVENTS_CHANNEL)
+                self.ready.set()
+                for watchers in list(self._watchers.values()):
+                    for queue in list(watchers):
+                        self._deliver(queue, RESYNC)
+                delay = 1.0
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        event = json.loads(message["data"])
+                    except (TypeError, ValueError):
+                        continue
+                    for queue in list(self._watchers.get(event.get("job_id"), ())):
+                        self._deliver(queue, event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.ready.clear()
+                logger.warning("job_events_disconnected error=%s retry_in=%.0fs", exc, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+_hub: Optional[JobEventHub] = None
+
+
+def get_job_event_hub() -> JobEventHub:
+    global _hub
+    if _hub is None:
+        _hub = JobEventHub()
+    return _hub
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+from fastapi import APIRouter, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+from app.config import settings
+from app.utils import metrics
+from app.utils.redis_client import get_redis
+from app.workers.queue import get_queue
+from app.workers.scheduler import INFLIGHT_KEY, LANES, pending_key
+
+router = APIRouter(tags=["metrics"])
+
+
+class QueueCollector:
+    # Queue depth is state, not an event: read it from Redis at scrape time.
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        redis = get_redis()
+        depth = GaugeMetricFamily("queue_depth", "Jobs per lane: held by the scheduler, queued in RQ, or running.", labels=("lane", "state"))
+        for lane in LANES:
+            queue = get_queue(lane)
+            depth.add_metric((lane, "pending"), redis.llen(pending_key(lane)))
+            depth.add_metric((lane, "queued"), queue.count)
+            depth.add_metric((lane, "started"), queue.started_job_registry.count)
+        yield depth
+        committed = GaugeMetricFamily("scheduler_committed_api_calls", "Reddit API calls reserved by admitted jobs.")
+        committed.add_metric((), sum(float(cost) for cost in redis.hvals(INFLIGHT_KEY)))
+        yield committed
+
+
+@router.get("/metrics")
+def prometheus_metrics() -> Response:
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    # This process's own buffer is flushed first so the scrape sees its latest requests.
+    metrics.flush()
+    registry = CollectorRegistry(auto_describe=False)
+    registry.register(metrics.RedisMetricsCollector())
+    registry.register(QueueCollector())
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,27 +1,72 @@
 from __future__ import annotations
 
+import asyncio
+import base64
 from datetime import datetime, timedelta
+import json
 import logging
-from typing import Optional
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
-from rq.job import Job
-from sqlalchemy import select
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from rq.job import Job, JobStatus
+from rq.serializers import resolve_serializer
+from rq.utils import as_text
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session, selectinload
 
-from app.api.schemas import AnalyzeRequest, AnalyzeResponse, HistoryItem, HistoryResponse, JobStatusResponse, ReportResponse
+from app.api.compare import build_comparison
+from app.api.job_events import RESYNC, get_job_event_hub
+from app.api.schemas import (
+    AnalyzeRequest,
+    AnalyzeResponse,
+    CompareRequest,
+    CompareResponse,
+    HistoryItem,
+    HistoryResponse,
+    JobStatusResponse,
+    ReportResponse,
+    TrendBaselineStat,
+    TrendPoint,
+    TrendResponse,
+    TrendShiftItem,
+)
 from app.collectors.reddit import parse_username
 from app.config import settings
+from app.scoring.trends import TREND_METRICS, Baseline, trend_values
+from app.store.async_db import get_async_session
 from app.store.db import get_session
-from app.store.models import Account, Platform, Score, Snapshot
-from app.utils.cache import RedisCache
-from app.utils.redis_client import get_redis
-from app.workers.jobs import analyze_reddit_user
-from app.workers.queue import get_queue
+from app.store.models import Account, FeatureSet, Platform, Score, Snapshot, TrendBaseline, TrendShift
+from app.utils.cache import (
+    REPORT_CACHE_PREFIX,
+    REPORT_CACHE_TTL_SECONDS,
+    AsyncRedisCache,
+    latest_report_key,
+    report_cache_key,
+)
+from app.utils.local_cache import get_local_cache
+from app.utils.redis_client import get_async_redis, get_redis
+from app.workers.events import TERMINAL_STATUSES, compare_url as _compare_url, result_url
+from app.workers.jobs import analyze_reddit_user, analyze_reddit_users
+from app.workers.scheduler import LANE_INTERACTIVE, LANE_REFRESH, estimate_api_calls, lane_stats, submit
+from app.workers.singleflight import enqueue_once
 
 
 router = APIRouter(prefix="/api", tags=["api"])
 logger = logging.getLogger("api")
 
+COMPARE_MIN_ACCOUNTS = 2
+COMPARE_MAX_ACCOUNTS = 10
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = 500
+TRENDS_DEFAULT_LIMIT = 20
+TRENDS_MAX_LIMIT = 200
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+# Job status reads (polls, SSE connects and resyncs) share the async Redis pool with the report
+# routes and the job event subscription; they may hold at most half of it at once.
+_job_state_reads = asyncio.Semaphore(max(1, settings.redis_max_connections // 2))
+
 
 def _get_latest_snapshot(account_id: int) -> Optional[Snapshot]:
     with get_session() as session:
@@ -53,10 +98,41 @@ def _build_report(snapshot: Snapshot) -> ReportResponse:
     )
 
 
+def _parse_compare_usernames(values: List[str]) -> List[str]:
+    try:
+        usernames = list(dict.fromkeys(parse_username(value.strip()) for value in values if value.strip()))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not COMPARE_MIN_ACCOUNTS <= len(usernames) <= COMPARE_MAX_ACCOUNTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Compare needs between {COMPARE_MIN_ACCOUNTS} and {COMPARE_MAX_ACCOUNTS} accounts",
+        )
+    return usernames
+
+
+def _latest_snapshots(session: Session, usernames: List[str]) -> Dict[str, Snapshot]:
+    latest = (
+        select(Snapshot.account_id, func.max(Snapshot.collected_at).label("collected_at"))
+        .join(Account, Snapshot.account_id == Account.id)
+        .where(Account.platform == Platform.reddit, Account.handle.in_(usernames))
+        .group_by(Snapshot.account_id)
+        .subquery()
+    )
+    rows = session.execute(
+        select(Account.handle, Snapshot)
+        .join(Snapshot, Snapshot.account_id == Account.id)
+        .join(latest, and_(latest.c.account_id == Snapshot.account_id, latest.c.collected_at == Snapshot.collected_at))
+        .options(selectinload(Snapshot.scores), selectinload(Snapshot.features))
+    ).all()
+    return {handle: snapshot for handle, snapshot in rows}
+
+
 @router.post("/analyze/reddit", response_model=AnalyzeResponse)
 def analyze_reddit(request: AnalyzeRequest):
     username = parse_username(request.username)
 
+    has_snapshot = False
     with get_session() as session:
         account = session.execute(
             select(Account).where(Account.platform == Platform.reddit, Account.handle == username)
@@ -70,20 +146,47 @@ def analyze_reddit(request: AnalyzeRequest):
                     .limit(1)
                 ).scalar_one_or_none()
             )
+            has_snapshot = snapshot is not None
             if snapshot and not request.force_refresh:
                 cutoff = datetime.utcnow() - timedelta(hours=settings.cache_hours)
                 if snapshot.collected_at and snapshot.collected_at > cutoff:
                     report_url = f"/api/report/reddit/{username}?snapshot=latest"
                     return AnalyzeResponse(job_id=f"cached:{snapshot.id}", status="cached", report_url=report_url)
 
-    queue = get_queue()
-    job = queue.enqueue(analyze_reddit_user, username)
-    logger.info("job_enqueue username=%s job_id=%s", username, job.id)
-    return AnalyzeResponse(job_id=job.id, status="queued")
+    lane = LANE_REFRESH if request.force_refresh else LANE_INTERACTIVE
+    incremental = False if request.force_refresh else None
+    cost = estimate_api_calls(incremental=has_snapshot and settings.reddit_incremental and incremental is None)
+    job_id, attached = enqueue_once(
+        username,
+        lambda job_id: submit(lane, analyze_reddit_user, username, cost=cost, job_id=job_id, incremental=incremental),
+    )
+    logger.info("job_enqueue username=%s job_id=%s lane=%s cost=%s attached=%s", username, job_id, lane, cost, attached)
+    return AnalyzeResponse(job_id=job_id, status="queued")
+
+
+def _job_result(job_id: str):
+    job = Job.fetch(job_id, connection=get_redis())
+    return job.return_value() if hasattr(job, "return_value") else job.result
+
+
+async def _job_state(job_id: str) -> Optional[JobStatusResponse]:
+    # Status and progress are two hash fields; polling them must not hold a threadpool slot.
+    async with _job_state_reads:
+        status, meta = await get_async_redis().hmget(Job.key_for(job_id), "status", "meta")
+    if not status:
+        return None
+    status = as_text(status)
+    meta = resolve_serializer().loads(meta) if meta else {}
+    progress = meta.get("progress") if isinstance(meta, dict) else None
+    url = None
+    if status == JobStatus.FINISHED:
+        # Results live in RQ's result stream; reading them needs RQ's sync API, once per job.
+        url = result_url(await run_in_threadpool(_job_result, job_id))
+    return JobStatusResponse(job_id=job_id, status=status, result_url=url, progress=progress)
 
 
 @router.get("/jobs/{job_id}", response_model=JobStatusResponse)
-def job_status(job_id: str):
+async def job_status(job_id: str):
     if job_id.startswith("cached:"):
         return JobStatusResponse(
             job_id=job_id,
@@ -91,84 +194,298 @@ def job_status(job_id: str):
             result_url=None,
         )
 
-    redis = get_redis()
-    try:
-        job = Job.fetch(job_id, connection=redis)
-    except Exception:
+    state = await _job_state(job_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Job not found")
+    logger.info("job_status job_id=%s status=%s progress=%s", job_id, state.status, state.progress)
+    return state
 
-    status = job.get_status()
-    progress = job.meta.get("progress") if isinstance(job.meta, dict) else None
-    logger.info("job_status job_id=%s status=%s progress=%s", job_id, status, progress)
-    result_url = None
-    result = job.return_value() if hasattr(job, "return_value") else job.result
-    if status == "finished" and isinstance(result, dict):
-        snapshot_id = result.get("snapshot_id")
-        if snapshot_id:
-            result_url = f"/api/report/reddit/{result.get('username')}?snapshot={snapshot_id}"
 
-    return JobStatusResponse(job_id=job_id, status=status, result_url=result_url, progress=progress)
+def _sse(event: dict) -> str:
+    return f"event: status\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    hub = get_job_event_hub()
+    # Watch before reading the state so an event published in between is not lost.
+    queue = hub.watch(job_id)
+    state = await _job_state(job_id)
+    if state is None:
+        hub.unwatch(job_id, queue)
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        current = state.model_dump()
+        logger.info("job_watch job_id=%s status=%s watchers=%s", job_id, current["status"], hub.watcher_count)
+        try:
+            yield _sse(current)
+            while current["status"] not in TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(queue.get(), JOB_EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    event = RESYNC
+                if event is RESYNC:
+                    # Covers events published before the subscription was up and RQ saving the final
+                    # status only after the success callback ran.
+                    resynced = await _job_state(job_id)
+                    if resynced is None:
+                        break
+                    event = resynced.model_dump()
+                    if event == current:
+                        yield ": keepalive\n\n"
+                        continue
+                current = event
+                yield _sse(current)
+        finally:
+            hub.unwatch(job_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/report/reddit/{username}", response_model=ReportResponse)
-def get_report(username: str, snapshot: str = "latest"):
-    cache = RedisCache(prefix="report")
-    with get_session() as session:
-        account = session.execute(
-            select(Account).where(Account.platform == Platform.reddit, Account.handle == username)
+async def get_report(username: str, snapshot: str = "latest"):
+    cache = AsyncRedisCache(prefix=REPORT_CACHE_PREFIX)
+    snapshot_id = await cache.get(latest_report_key(username)) if snapshot == "latest" else snapshot
+    if snapshot_id:
+        cached = await cache.get_json_body(report_cache_key(username, snapshot_id))
+        if cached:
+            return Response(content=cached, media_type="application/json")
+
+    async with get_async_session() as session:
+        account = (
+            await session.execute(
+                select(Account).where(Account.platform == Platform.reddit, Account.handle == username)
+            )
         ).scalar_one_or_none()
         if not account:
             raise HTTPException(status_code=404, detail="Account not found")
 
-        query = select(Snapshot).where(Snapshot.account_id == account.id)
-        if snapshot == "latest":
-            query = query.order_by(Snapshot.collected_at.desc()).limit(1)
+        query = (
+            select(Snapshot)
+            .where(Snapshot.account_id == account.id)
+            .options(selectinload(Snapshot.scores), selectinload(Snapshot.features))
+        )
+        if snapshot_id:
+            query = query.where(Snapshot.id == int(snapshot_id))
         else:
-            query = query.where(Snapshot.id == int(snapshot))
-        snapshot_obj = session.execute(query).scalar_one_or_none()
+            query = query.order_by(Snapshot.collected_at.desc()).limit(1)
+        snapshot_obj = (await session.execute(query)).scalar_one_or_none()
         if not snapshot_obj:
             raise HTTPException(status_code=404, detail="Snapshot not found")
 
-        cache_key = f"{username}:{snapshot_obj.id}"
-        cached = cache.get_json(cache_key)
+        if snapshot == "latest" and not snapshot_id:
+            # The worker owns the pointer; a read only fills it in when it is still missing, so a
+            # newer snapshot written meanwhile is not replaced by the one read here.
+            await cache.set(
+                latest_report_key(username), str(snapshot_obj.id), ttl_seconds=REPORT_CACHE_TTL_SECONDS, only_if_absent=True
+            )
+        cache_key = report_cache_key(username, snapshot_obj.id)
+        cached = await cache.get_json_body(cache_key)
         if cached:
-            return cached
+            return Response(content=cached, media_type="application/json")
 
-        _ = snapshot_obj.scores
-        _ = snapshot_obj.features
-        _ = snapshot_obj.account
         report = _build_report(snapshot_obj)
-        cache.set_json(cache_key, report.model_dump(), ttl_seconds=3600)
+        await cache.set_json(cache_key, report.model_dump(), ttl_seconds=REPORT_CACHE_TTL_SECONDS)
         return report
 
 
+def _encode_history_cursor(snapshot_id: int) -> str:
+    return base64.urlsafe_b64encode(str(snapshot_id).encode("utf-8")).decode("ascii")
+
+
+def _decode_history_cursor(cursor: str) -> int:
+    # Older cursors were "collected_at|id"; only the id is used.
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)[-1])
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/history/reddit/{username}", response_model=HistoryResponse)
-def history(username: str):
-    with get_session() as session:
-        account = session.execute(
-            select(Account).where(Account.platform == Platform.reddit, Account.handle == username)
+async def history(
+    username: str,
+    limit: int = Query(HISTORY_DEFAULT_LIMIT, ge=1, le=HISTORY_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    async with get_async_session() as session:
+        account_id = (
+            await session.execute(
+                select(Account.id).where(Account.platform == Platform.reddit, Account.handle == username)
+            )
         ).scalar_one_or_none()
-        if not account:
+        if account_id is None:
             raise HTTPException(status_code=404, detail="Account not found")
 
-        snapshots = session.execute(
-            select(Snapshot).where(Snapshot.account_id == account.id).order_by(Snapshot.collected_at.desc())
-        ).scalars()
-
-        items = []
-        for snapshot in snapshots:
-            score = snapshot.scores
-            items.append(
-                HistoryItem(
-                    snapshot_id=snapshot.id,
-                    collected_at=snapshot.collected_at.isoformat() if snapshot.collected_at else "",
-                    automation_score=score.automation_score if score else 0,
-                    coordination_score=score.coordination_score if score else None,
-                    confidence=score.confidence if score else None,
+        query = (
+            select(
+                Snapshot.id,
+                Snapshot.collected_at,
+                Score.automation_score,
+                Score.coordination_score,
+                Score.confidence,
+            )
+            .outerjoin(Score, Score.snapshot_id == Snapshot.id)
+            .where(Snapshot.account_id == account_id)
+        )
+        if since is not None:
+            query = query.where(Snapshot.collected_at >= since)
+        if until is not None:
+            query = query.where(Snapshot.collected_at < until)
+        if cursor:
+            cursor_id = _decode_history_cursor(cursor)
+            # The boundary timestamp is read back from the cursor row, so it compares in its stored
+            # form: a bound datetime renders microseconds SQLite's server default never stored.
+            cursor_at = select(Snapshot.collected_at).where(Snapshot.id == cursor_id).scalar_subquery()
+            query = query.where(
+                or_(
+                    Snapshot.collected_at < cursor_at,
+                    and_(Snapshot.collected_at == cursor_at, Snapshot.id < cursor_id),
                 )
             )
+        rows = (
+            await session.execute(query.order_by(Snapshot.collected_at.desc(), Snapshot.id.desc()).limit(limit + 1))
+        ).all()
+
+        items = [
+            HistoryItem(
+                snapshot_id=row.id,
+                collected_at=row.collected_at.isoformat() if row.collected_at else "",
+                automation_score=row.automation_score if row.automation_score is not None else 0,
+                coordination_score=row.coordination_score,
+                confidence=row.confidence,
+            )
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = _encode_history_cursor(rows[limit - 1].id)
+
+        return HistoryResponse(username=username, snapshots=items, next_cursor=next_cursor)
+
+
+@router.get("/trends/reddit/{username}", response_model=TrendResponse)
+def trends(username: str, limit: int = Query(TRENDS_DEFAULT_LIMIT, ge=1, le=TRENDS_MAX_LIMIT)):
+    with get_session() as session:
+        account_id = session.execute(
+            select(Account.id).where(Account.platform == Platform.reddit, Account.handle == username)
+        ).scalar_one_or_none()
+        if account_id is None:
+            raise HTTPException(status_code=404, detail="Account not found")
+
+        rows = session.execute(
+            select(Snapshot.id, Snapshot.collected_at, FeatureSet.json, Score.automation_score, Score.coordination_score)
+            .join(FeatureSet, FeatureSet.snapshot_id == Snapshot.id)
+            .outerjoin(Score, Score.snapshot_id == Snapshot.id)
+            .where(Snapshot.account_id == account_id)
+            .order_by(Snapshot.collected_at.desc(), Snapshot.id.desc())
+            .limit(limit)
+        ).all()
+        rows.reverse()
+        collected = {row.id: row.collected_at.isoformat() if row.collected_at else "" for row in rows}
+        series = [
+            TrendPoint(
+                snapshot_id=row.id,
+                collected_at=collected[row.id],
+                values=trend_values(
+                    row.json or {},
+                    {"automation_score": row.automation_score, "coordination_score": row.coordination_score},
+                ),
+            )
+            for row in rows
+        ]
+
+        baselines = {
+            row.metric: TrendBaselineStat(
+                count=row.count, mean=row.mean, std=Baseline(row.count, row.mean, row.variance).std
+            )
+            for row in session.execute(
+                select(TrendBaseline).where(TrendBaseline.account_id == account_id).order_by(TrendBaseline.metric)
+            ).scalars()
+        }
+        shifts = [
+            TrendShiftItem(
+                snapshot_id=row.snapshot_id,
+                collected_at=collected[row.snapshot_id],
+                metric=row.metric,
+                value=row.value,
+                baseline_mean=row.baseline_mean,
+                baseline_std=row.baseline_std,
+                z_score=row.z_score,
+                direction=row.direction,
+            )
+            for row in session.execute(
+                select(TrendShift)
+                .where(TrendShift.account_id == account_id, TrendShift.snapshot_id.in_(list(collected)))
+                .order_by(TrendShift.snapshot_id, TrendShift.metric)
+            ).scalars()
+        ]
+
+        return TrendResponse(
+            username=username, metrics=list(TREND_METRICS), baselines=baselines, series=series, shifts=shifts
+        )
+
+
+@router.post("/compare/reddit", response_model=CompareResponse)
+def compare_reddit(request: CompareRequest):
+    usernames = _parse_compare_usernames(request.usernames)
+    compare_url = _compare_url(usernames)
+
+    with get_session() as session:
+        snapshots = _latest_snapshots(session, usernames)
+        cutoff = datetime.utcnow() - timedelta(hours=settings.cache_hours)
+        stale = [
+            username
+            for username in usernames
+            if request.force_refresh
+            or username not in snapshots
+            or not snapshots[username].collected_at
+            or snapshots[username].collected_at <= cutoff
+        ]
+        if not stale:
+            return CompareResponse(status="cached", compare_url=compare_url, **build_comparison(usernames, snapshots))
+
+    cost = sum(estimate_api_calls() for _ in stale)
+    job = submit(
+        LANE_INTERACTIVE,
+        analyze_reddit_users,
+        stale,
+        cost=cost,
+        incremental=False if request.force_refresh else None,
+    )
+    logger.info("job_enqueue usernames=%s job_id=%s lane=%s cost=%s", ",".join(stale), job.id, LANE_INTERACTIVE, cost)
+    return CompareResponse(status="queued", job_id=job.id, pending=stale, compare_url=compare_url, usernames=usernames)
+
+
+@router.get("/compare/reddit", response_model=CompareResponse)
+def compare(usernames: str):
+    parsed = _parse_compare_usernames(usernames.split(","))
+    with get_session() as session:
+        snapshots = _latest_snapshots(session, parsed)
+        missing = [username for username in parsed if username not in snapshots]
+        return CompareResponse(
+            status="incomplete" if missing else "ok",
+            pending=missing,
+            compare_url=_compare_url(parsed),
+            **build_comparison(parsed, snapshots),
+        )
+
+
+@router.get("/queue/stats")
+def queue_stats():
+    return lane_stats()
+
 
-        return HistoryResponse(username=username, snapshots=items)
+@router.get("/cache/stats")
+def cache_stats():
+    local = get_local_cache()
+    return local.stats() if local is not None else {"enabled": False}
 
 
 @router.get("/health/reddit-credentials")
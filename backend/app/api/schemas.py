@@ -44,3 +44,61 @@ class HistoryItem(BaseModel):
 class HistoryResponse(BaseModel):
     username: str
     snapshots: list[HistoryItem]
+    next_cursor: Optional[str] = None
+
+
+class CompareRequest(BaseModel):
+    usernames: list[str]
+    force_refresh: bool = False
+
+
+class CompareAccount(BaseModel):
+    username: str
+    snapshot_id: Optional[int]
+    collected_at: Optional[str]
+    scores: list[Optional[float]]
+    features: list[Optional[float]]
+
+
+class CompareResponse(BaseModel):
+    status: str
+    job_id: Optional[str] = None
+    pending: list[str] = []
+    compare_url: Optional[str] = None
+    usernames: list[str]
+    score_names: list[str] = []
+    feature_names: list[str] = []
+    accounts: list[CompareAccount] = []
+    feature_deltas: dict[str, list[Optional[float]]] = {}
+    score_deltas: dict[str, list[Optional[float]]] = {}
+
+
+class TrendBaselineStat(BaseModel):
+    count: int
+    mean: float
+    std: float
+
+
+class TrendPoint(BaseModel):
+    snapshot_id: int
+    collected_at: str
+    values: dict[str, float]
+
+
+class TrendShiftItem(BaseModel):
+    snapshot_id: int
+    collected_at: str
+    metric: str
+    value: float
+    baseline_mean: float
+    baseline_std: float
+    z_score: float
+    direction: str
+
+
+class TrendResponse(BaseModel):
+    username: str
+    metrics: list[str]
+    baselines: dict[str, TrendBaselineStat]
+    series: list[TrendPoint]
+    shifts: list[TrendShiftItem]
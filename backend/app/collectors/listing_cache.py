@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.cache import RedisCache
+
+
+PAGE_SIZE = 100
+INDEX_MAX_NAMES = 1000
+# A head page fetched this recently counts as current; matches the old whole-page cache TTL.
+HEAD_FRESH_SECONDS = 300
+# Only the fields normalize_post/normalize_comment read; the other ~100 fields of a child are dropped.
+CACHED_FIELDS = ("name", "created_utc", "subreddit", "permalink", "selftext", "url", "body", "link_id", "parent_id")
+
+
+def listing_index_key(username: str, listing: str) -> str:
+    return f"listing:{username.lower()}:{listing}"
+
+
+def listing_head_key(username: str, listing: str) -> str:
+    return f"listing:{username.lower()}:{listing}:head"
+
+
+def listing_item_key(name: str) -> str:
+    return f"thing:{name}"
+
+
+def take_unseen(children: List[dict], known_ids: Optional[set], newest_utc: Optional[float]) -> Tuple[List[dict], bool]:
+    if not known_ids and newest_utc is None:
+        return children, False
+    unseen: List[dict] = []
+    for data in children:
+        created = data.get("created_utc")
+        if (known_ids and data.get("name") in known_ids) or (
+            newest_utc is not None and created is not None and float(created) <= newest_utc
+        ):
+            return unseen, True
+        unseen.append(data)
+    return unseen, False
+
+
+def _continuation(index: Optional[dict], head: List[str]) -> Optional[List[str]]:
+    # The cached index continues the fresh head page if the newest cached name shows up in it and
+    # everything after that point matches; anything else (a burst of >100 new items, deletions near
+    # the top) falls back to paging the API.
+    if not index or not index.get("names") or not head:
+        return None
+    cached = index["names"]
+    try:
+        overlap_at = head.index(cached[0])
+    except ValueError:
+        return None
+    overlap = len(head) - overlap_at
+    if cached[:overlap] != head[overlap_at:]:
+        return None
+    return cached[overlap:]
+
+
+# Walks one user listing. The head page is fetched to detect new activity unless the head marker says
+# it was fetched in the last HEAD_FRESH_SECONDS; when the cached
+# index of names continues it, the rest of the window is served from per-item keys and the API is only
+# paged again past the cached names or at an expired item. No Reddit I/O happens here, so the sync and
+# async clients share it: serve cached_page() while it returns a page, otherwise fetch next_params()
+# and feed() the payload, and call finish() to store the updated index. Edits and deletions of older
+# items are only picked up once their keys expire (LISTING_CACHE_HOURS).
+#
+# An incremental walk stops at the first known item. If the previous snapshot held fewer known items
+# than the limit, it instead resumes after oldest_known and fills the rest of the limit with older
+# items, skipping known ones, so a short earlier collection does not cap the history for good.
+class ListingWalk:
+
+    def __init__(
+        self,
+        cache: RedisCache,
+        username: str,
+        listing: str,
+        limit: int,
+        known_ids: Optional[set] = None,
+        newest_utc: Optional[float] = None,
+        stats: Optional[Counter] = None,
+        oldest_known: Optional[str] = None,
+    ) -> None:
+        self.cache = cache
+        self.username = username
+        self.listing = listing
+        self.limit = limit
+        self.known_ids = known_ids
+        self.newest_utc = newest_utc
+        self.oldest_known = oldest_known if known_ids and len(known_ids) < limit else None
+        self.backfilling = False
+        # Set when the walk jumped past names it never saw; the index only keeps the names before it.
+        self.gap_at: Optional[int] = None
+        self.stats = stats if stats is not None else Counter()
+        self.index = cache.get_json(listing_index_key(username, listing))
+        self.names: List[str] = []
+        self.continuation: Optional[List[str]] = None
+        self.after: Optional[str] = None
+        self.fetched = 0
+        self.head_fetched = False
+        self.complete = False
+        self.done = limit <= 0
+        head = cache.get(listing_head_key(username, listing))
+        if head and self.index and self.index.get("names") and self.index["names"][0] == head:
+            self.head_fetched = True
+            self.continuation = list(self.index["names"])
+        self.head_refreshed = False
+
+    def _serve(self, children: List[dict]) -> List[dict]:
+        if self.backfilling:
+            unseen, reached_known = [c for c in children if c.get("name") not in self.known_ids], False
+        else:
+            unseen, reached_known = take_unseen(children, self.known_ids, self.newest_utc)
+            if reached_known and self.oldest_known:
+                unseen += self._start_backfill(children)
+                reached_known = False
+        unseen = unseen[: self.limit - self.fetched]
+        self.fetched += len(unseen)
+        if reached_known or self.fetched >= self.limit:
+            self.done = True
+        return unseen
+
+    def _start_backfill(self, children: List[dict]) -> List[dict]:
+        # The known items are merged in by the caller, so new and older items share what they leave.
+        self.backfilling = True
+        self.limit -= len(self.known_ids)
+        names = [child.get("name") for child in children]
+        if self.oldest_known in names:
+            rest = children[names.index(self.oldest_known) + 1 :]
+            return [child for child in rest if child.get("name") not in self.known_ids]
+        if self.oldest_known in self.names:
+            return []
+        if self.continuation and self.oldest_known in self.continuation:
+            skipped = self.continuation.index(self.oldest_known) + 1
+            self.names.extend(self.continuation[:skipped])
+            self.continuation = self.continuation[skipped:]
+        else:
+            self.gap_at = len(self.names)
+            self.continuation = None
+        self.after = self.oldest_known
+        return []
+
+    def next_params(self) -> Optional[dict]:
+        if self.done or self.complete:
+            return None
+        params: Dict[str, object] = {"limit": PAGE_SIZE}
+        if self.after:
+            params["after"] = self.after
+        return params
+
+    def feed(self, payload: dict) -> List[dict]:
+        data = payload.get("data", {})
+        children = [
+            {field: child["data"].get(field) for field in CACHED_FIELDS}
+            for child in data.get("children", [])
+            if child.get("data", {}).get("name")
+        ]
+        self.stats["api_pages"] += 1
+        self.stats["api_items"] += len(children)
+        self.cache.set_many_json(
+            {listing_item_key(child["name"]): child for child in children}, ttl_seconds=self.ttl_seconds
+        )
+        page_names = [child["name"] for child in children]
+        if not self.after and not self.names:
+            self.head_refreshed = True
+        if not self.head_fetched:
+            self.head_fetched = True
+            self.continuation = _continuation(self.index, page_names)
+        self.names.extend(page_names)
+        self.after = data.get("after")
+        if not children or not self.after:
+            self.complete = True
+            self.continuation = None
+        return self._serve(children)
+
+    def cached_page(self) -> Optional[List[dict]]:
+        if self.done or not self.head_fetched or not self.continuation:
+            return None
+        window = self.continuation[:PAGE_SIZE]
+        cached = self.cache.get_many_json([listing_item_key(name) for name in window])
+        children: List[dict] = []
+        for child in cached:
+            if child is None:
+                break
+            children.append(child)
+        served_names = window[: len(children)]
+        if len(children) < len(window):
+            # An expired item: page the API from the last name we could serve.
+            self.continuation = None
+        else:
+            self.continuation = self.continuation[len(window) :]
+            if not self.continuation and self.index and self.index.get("complete"):
+                self.complete = True
+        self.stats["cached_items"] += len(children)
+        if served_names:
+            self.names.extend(served_names)
+            self.after = served_names[-1]
+        if not children:
+            return None
+        return self._serve(children)
+
+    def finish(self) -> None:
+        if self.gap_at is not None:
+            names, complete = self.names[: self.gap_at], False
+        else:
+            names = self.names + (self.continuation or [])
+            complete = self.complete or bool(self.continuation and self.index and self.index.get("complete"))
+        if not names:
+            return
+        if self.head_refreshed:
+            self.cache.set(listing_head_key(self.username, self.listing), names[0], ttl_seconds=HEAD_FRESH_SECONDS)
+        self.cache.set_json(
+            listing_index_key(self.username, self.listing),
+            {"names": names[:INDEX_MAX_NAMES], "complete": complete and len(names) <= INDEX_MAX_NAMES},
+            ttl_seconds=self.ttl_seconds,
+        )
+
+    @property
+    def ttl_seconds(self) -> int:
+        return int(settings.listing_cache_hours * 3600)
@@ -1,17 +1,27 @@
+import asyncio
+import itertools
+import queue
+import threading
 import time
+from collections import Counter
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
+import httpx
 import requests
 from requests.auth import HTTPBasicAuth
 
+from app.collectors.listing_cache import ListingWalk
 from app.config import settings
+from app.utils import metrics
 from app.utils.cache import RedisCache
-from app.utils.rate_limit import RateLimiter, backoff_from_headers
+from app.utils.rate_limit import RateLimiter, backoff_from_headers, backoff_seconds_from_headers
 
 
 TOKEN_CACHE: dict[str, float | str] = {}
+THROTTLED_RETRY_SECONDS = 5
 
 
 @dataclass
@@ -22,48 +32,100 @@ class RedditProfile:
     comment_karma: Optional[int]
 
 
+def _cached_token() -> Optional[str]:
+    cached_token = TOKEN_CACHE.get("access_token")
+    expires_at = TOKEN_CACHE.get("expires_at", 0)
+    if cached_token and isinstance(expires_at, float) and time.time() < expires_at:
+        return str(cached_token)
+    return None
+
+
+def _store_token(payload: dict) -> str:
+    token = payload["access_token"]
+    expires_in = payload.get("expires_in", 3600)
+    TOKEN_CACHE["access_token"] = token
+    TOKEN_CACHE["expires_at"] = time.time() + float(expires_in) - 60
+    return token
+
+
+@contextmanager
+def _api_call(url: str) -> Iterator[dict]:
+    # Counts and times one request under its endpoint (the last path segment, never the username).
+    endpoint = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+    call = {"status": "error"}
+    start = time.perf_counter()
+    try:
+        yield call
+    finally:
+        metrics.observe("reddit_api_request_seconds", time.perf_counter() - start, endpoint=endpoint)
+        metrics.inc("reddit_api_requests", endpoint=endpoint, status=call["status"])
+
+
+def _require_credentials() -> None:
+    if not settings.reddit_client_id or not settings.reddit_client_secret:
+        raise RuntimeError("Missing REDDIT_CLIENT_ID or REDDIT_CLIENT_SECRET")
+
+
+def _profile_from_payload(username: str, payload: dict) -> RedditProfile:
+    data = payload.get("data", {})
+    return RedditProfile(
+        username=username,
+        created_utc=data.get("created_utc"),
+        link_karma=data.get("link_karma"),
+        comment_karma=data.get("comment_karma"),
+    )
+
+
+def _known_markers(items: List[dict]) -> Tuple[set, Optional[float], Optional[str]]:
+    known_ids = {i.get("item_id") for i in items if i.get("item_id")}
+    dated = [(float(i["created_utc"]), i.get("item_id")) for i in items if i.get("created_utc") is not None and i.get("item_id")]
+    newest_utc = max(created for created, _ in dated) if dated else None
+    oldest_known = min(dated)[1] if dated else None
+    return known_ids, newest_utc, oldest_known
+
+
 class RedditClient:
     def __init__(self) -> None:
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": settings.reddit_user_agent})
         self.cache = RedisCache(prefix="reddit")
+        self.listing_stats: Counter = Counter()
         self.rate_limiter = RateLimiter("rate:reddit")
 
     def _get_token(self) -> str:
-        cached_token = TOKEN_CACHE.get("access_token")
-        expires_at = TOKEN_CACHE.get("expires_at", 0)
-        if cached_token and isinstance(expires_at, float) and time.time() < expires_at:
-            return str(cached_token)
-
-        if not settings.reddit_client_id or not settings.reddit_client_secret:
-            raise RuntimeError("Missing REDDIT_CLIENT_ID or REDDIT_CLIENT_SECRET")
+        cached_token = _cached_token()
+        if cached_token:
+            return cached_token
 
+        _require_credentials()
         auth = HTTPBasicAuth(settings.reddit_client_id, settings.reddit_client_secret)
         data = {"grant_type": "client_credentials"}
         headers = {"User-Agent": settings.reddit_user_agent}
-        response = requests.post(
-            "https://www.reddit.com/api/v1/access_token",
-            auth=auth,
-            data=data,
-            headers=headers,
-            timeout=30,
-        )
+        with _api_call(settings.reddit_auth_url) as call:
+            response = requests.post(
+                settings.reddit_auth_url,
+                auth=auth,
+                data=data,
+                headers=headers,
+                timeout=30,
+            )
+            call["status"] = str(response.status_code)
         response.raise_for_status()
-        payload = response.json()
-        token = payload["access_token"]
-        expires_in = payload.get("expires_in", 3600)
-        TOKEN_CACHE["access_token"] = token
-        TOKEN_CACHE["expires_at"] = time.time() + float(expires_in) - 60
-        return token
+        return _store_token(response.json())
 
     def _get(self, url: str, params: Optional[dict] = None) -> dict:
         self.rate_limiter.wait_for_slot()
         token = self._get_token()
         headers = {"Authorization": f"bearer {token}", "User-Agent": settings.reddit_user_agent}
-        response = self.session.get(url, headers=headers, params=params, timeout=30)
-        if response.status_code == 429:
-            time.sleep(5)
+        with _api_call(url) as call:
             response = self.session.get(url, headers=headers, params=params, timeout=30)
+            call["status"] = str(response.status_code)
+        if response.status_code == 429:
+            metrics.observe("rate_limit_wait_seconds", THROTTLED_RETRY_SECONDS, limiter="429")
+            time.sleep(THROTTLED_RETRY_SECONDS)
+            with _api_call(url) as call:
+                response = self.session.get(url, headers=headers, params=params, timeout=30)
+                call["status"] = str(response.status_code)
         response.raise_for_status()
         backoff_from_headers(response.headers)
         return response.json()
@@ -74,46 +136,182 @@ class RedditClient:
         if cached:
             return RedditProfile(**cached)
 
-        url = f"https://oauth.reddit.com/user/{username}/about"
+        url = f"{settings.reddit_api_base_url}/user/{username}/about"
         payload = self._get(url)
-        data = payload.get("data", {})
-        profile = RedditProfile(
-            username=username,
-            created_utc=data.get("created_utc"),
-            link_karma=data.get("link_karma"),
-            comment_karma=data.get("comment_karma"),
+        profile = _profile_from_payload(username, payload)
+        self.cache.set_json(cache_key, profile.__dict__, ttl_seconds=3600)
+        return profile
+
+    def iter_listing(
+        self,
+        username: str,
+        listing: str,
+        limit: int,
+        known_ids: Optional[set] = None,
+        newest_utc: Optional[float] = None,
+        oldest_known: Optional[str] = None,
+    ) -> Iterator[List[dict]]:
+        walk = ListingWalk(self.cache, username, listing, limit, known_ids, newest_utc, self.listing_stats, oldest_known)
+        url = f"{settings.reddit_api_base_url}/user/{username}/{listing}"
+        while True:
+            page = walk.cached_page()
+            if page is None:
+                params = walk.next_params()
+                if params is None:
+                    break
+                page = walk.feed(self._get(url, params=params))
+            if page:
+                yield page
+        walk.finish()
+
+    def stream_listing(
+        self,
+        username: str,
+        listing: str,
+        limit: int,
+        known_ids: Optional[set] = None,
+        newest_utc: Optional[float] = None,
+        oldest_known: Optional[str] = None,
+    ) -> Iterator[List[dict]]:
+        normalize = LISTING_NORMALIZERS[listing]
+        for page in self.iter_listing(username, listing, limit, known_ids, newest_utc, oldest_known):
+            yield [normalize(child) for child in page]
+
+    def fetch_listing(
+        self,
+        username: str,
+        listing: str,
+        limit: int,
+        known_ids: Optional[set] = None,
+        newest_utc: Optional[float] = None,
+        oldest_known: Optional[str] = None,
+    ) -> List[dict]:
+        items: List[dict] = []
+        for page in self.iter_listing(username, listing, limit, known_ids, newest_utc, oldest_known):
+            items.extend(page)
+        return items
+
+
+class AsyncRedditClient:
+    def __init__(self) -> None:
+        self.session = httpx.AsyncClient(
+            headers={"User-Agent": settings.reddit_user_agent},
+            limits=httpx.Limits(
+                max_connections=settings.reddit_max_connections,
+                max_keepalive_connections=settings.reddit_max_connections,
+            ),
+            timeout=30,
         )
+        self.cache = RedisCache(prefix="reddit")
+        self.listing_stats: Counter = Counter()
+        self.rate_limiter = RateLimiter("rate:reddit")
+        self._token_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncRedditClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
+
+    async def _get_token(self) -> str:
+        async with self._token_lock:
+            cached_token = _cached_token()
+            if cached_token:
+                return cached_token
+
+            _require_credentials()
+            with _api_call(settings.reddit_auth_url) as call:
+                response = await self.session.post(
+                    settings.reddit_auth_url,
+                    auth=(settings.reddit_client_id, settings.reddit_client_secret),
+                    data={"grant_type": "client_credentials"},
+                )
+                call["status"] = str(response.status_code)
+            response.raise_for_status()
+            return _store_token(response.json())
+
+    async def _get(self, url: str, params: Optional[dict] = None) -> dict:
+        await self.rate_limiter.acquire()
+        token = await self._get_token()
+        headers = {"Authorization": f"bearer {token}"}
+        with _api_call(url) as call:
+            response = await self.session.get(url, headers=headers, params=params)
+            call["status"] = str(response.status_code)
+        if response.status_code == 429:
+            metrics.observe("rate_limit_wait_seconds", THROTTLED_RETRY_SECONDS, limiter="429")
+            await asyncio.sleep(THROTTLED_RETRY_SECONDS)
+            with _api_call(url) as call:
+                response = await self.session.get(url, headers=headers, params=params)
+                call["status"] = str(response.status_code)
+        response.raise_for_status()
+        sleep_for = backoff_seconds_from_headers(response.headers)
+        if sleep_for:
+            metrics.observe("rate_limit_wait_seconds", sleep_for, limiter="headers")
+            await asyncio.sleep(sleep_for)
+        return response.json()
+
+    async def fetch_profile(self, username: str) -> RedditProfile:
+        cache_key = f"profile:{username}"
+        cached = self.cache.get_json(cache_key)
+        if cached:
+            return RedditProfile(**cached)
+
+        payload = await self._get(f"{settings.reddit_api_base_url}/user/{username}/about")
+        profile = _profile_from_payload(username, payload)
         self.cache.set_json(cache_key, profile.__dict__, ttl_seconds=3600)
         return profile
 
-    def fetch_listing(self, username: str, listing: str, limit: int) -> List[dict]:
+    async def iter_listing(
+        self,
+        username: str,
+        listing: str,
+        limit: int,
+        known_ids: Optional[set] = None,
+        newest_utc: Optional[float] = None,
+        oldest_known: Optional[str] = None,
+    ) -> AsyncIterator[List[dict]]:
+        walk = ListingWalk(self.cache, username, listing, limit, known_ids, newest_utc, self.listing_stats, oldest_known)
+        url = f"{settings.reddit_api_base_url}/user/{username}/{listing}"
+        while True:
+            page = walk.cached_page()
+            if page is None:
+                params = walk.next_params()
+                if params is None:
+                    break
+                page = walk.feed(await self._get(url, params=params))
+            if page:
+                yield page
+        walk.finish()
+
+    async def stream_listing(
+        self,
+        username: str,
+        listing: str,
+        limit: int,
+        known_ids: Optional[set] = None,
+        newest_utc: Optional[float] = None,
+        oldest_known: Optional[str] = None,
+    ) -> AsyncIterator[List[dict]]:
+        normalize = LISTING_NORMALIZERS[listing]
+        async for page in self.iter_listing(username, listing, limit, known_ids, newest_utc, oldest_known):
+            yield [normalize(child) for child in page]
+
+    async def fetch_listing(
+        self,
+        username: str,
+        listing: str,
+        limit: int,
+        known_ids: Optional[set] = None,
+        newest_utc: Optional[float] = None,
+        oldest_known: Optional[str] = None,
+    ) -> List[dict]:
         items: List[dict] = []
-        after: Optional[str] = None
-        fetched = 0
-        while fetched < limit:
-            batch = min(100, limit - fetched)
-            params = {"limit": batch}
-            if after:
-                params["after"] = after
-            cache_key = f"listing:{username}:{listing}:{after}:{batch}"
-            cached = self.cache.get_json(cache_key)
-            if cached:
-                payload = cached
-            else:
-                url = f"https://oauth.reddit.com/user/{username}/{listing}"
-                payload = self._get(url, params=params)
-                self.cache.set_json(cache_key, payload, ttl_seconds=300)
-            data = payload.get("data", {})
-            children = data.get("children", [])
-            if not children:
-                break
-            for child in children:
-                items.append(child.get("data", {}))
-            after = data.get("after")
-            fetched = len(items)
-            if not after:
-                break
-        return items[:limit]
+        async for page in self.iter_listing(username, listing, limit, known_ids, newest_utc, oldest_known):
+            items.extend(page)
+        return items
 
 
 def parse_username(input_value: str) -> str:
@@ -130,47 +328,207 @@ def parse_username(input_value: str) -> str:
     return input_value.lstrip("u/")
 
 
+def normalize_post(post: dict) -> dict:
+    return {
+        "kind": "post",
+        "item_id": post.get("name"),
+        "created_utc": post.get("created_utc"),
+        "subreddit": post.get("subreddit"),
+        "permalink": f"https://www.reddit.com{post.get('permalink', '')}",
+        "body_text": post.get("selftext") or None,
+        "url": post.get("url"),
+        "link_id": None,
+        "parent_id": None,
+    }
+
+
+def normalize_comment(comment: dict) -> dict:
+    return {
+        "kind": "comment",
+        "item_id": comment.get("name"),
+        "created_utc": comment.get("created_utc"),
+        "subreddit": comment.get("subreddit"),
+        "permalink": f"https://www.reddit.com{comment.get('permalink', '')}",
+        "body_text": comment.get("body") or None,
+        "url": None,
+        "link_id": comment.get("link_id"),
+        "parent_id": comment.get("parent_id"),
+    }
+
+
+LISTING_NORMALIZERS: Dict[str, Callable[[dict], dict]] = {
+    "submitted": normalize_post,
+    "comments": normalize_comment,
+}
+
+
 def normalize_items(submissions: List[dict], comments: List[dict]) -> List[dict]:
+    return [normalize_post(post) for post in submissions] + [normalize_comment(comment) for comment in comments]
+
+
+def merge_items(new_items: List[dict], previous_items: List[dict], submission_limit: int, comment_limit: int) -> List[dict]:
+    merged: List[dict] = []
+    for kind, limit in (("post", submission_limit), ("comment", comment_limit)):
+        seen: set = set()
+        kept: List[dict] = []
+        for item in new_items + previous_items:
+            if item.get("kind") != kind or item.get("item_id") in seen:
+                continue
+            seen.add(item.get("item_id"))
+            kept.append(item)
+        merged.extend(kept[:limit])
+    return merged
+
+
+def _split_previous(previous_items: Optional[List[dict]]) -> Tuple[List[dict], List[dict]]:
+    previous_items = previous_items or []
+    previous_posts = [i for i in previous_items if i.get("kind") == "post"]
+    previous_comments = [i for i in previous_items if i.get("kind") == "comment"]
+    return previous_posts, previous_comments
+
+
+def _listing_limits(max_items: Optional[int]) -> Tuple[int, int]:
+    max_items = max_items or settings.reddit_max_items
+    submission_limit = max_items // 2
+    return submission_limit, max_items - submission_limit
+
+
+def _merge_pages(pages: Iterator[List[dict]], previous: List[dict], kind: str, limit: int) -> Iterator[List[dict]]:
+    # merge_items for one listing, page by page: new items first, then previous ones, deduplicated
+    # by id and capped at the limit. The listing is still consumed to the end so its walk finishes.
+    seen: set = set()
+    kept = 0
+    for page in itertools.chain(pages, [previous]):
+        merged = []
+        for item in page:
+            if kept >= limit or item.get("kind") != kind or item.get("item_id") in seen:
+                continue
+            seen.add(item.get("item_id"))
+            merged.append(item)
+            kept += 1
+        if merged:
+            yield merged
+
+
+def stream_user(
+    client: RedditClient,
+    username: str,
+    max_items: Optional[int] = None,
+    previous_items: Optional[List[dict]] = None,
+) -> Iterator[List[dict]]:
+    # Normalized items page by page; each raw page is released before the next request. With
+    # previous items, the pages are those of merge_items(new, previous).
+    submission_limit, comment_limit = _listing_limits(max_items)
+    previous_posts, previous_comments = _split_previous(previous_items)
+    for listing, kind, limit, previous in (
+        ("submitted", "post", submission_limit, previous_posts),
+        ("comments", "comment", comment_limit, previous_comments),
+    ):
+        pages = client.stream_listing(username, listing, limit, *_known_markers(previous))
+        yield from _merge_pages(pages, previous, kind, limit) if previous_items else pages
+
+
+def prefetch_pages(pages: Iterator[List[dict]], depth: int = 2) -> Iterator[List[dict]]:
+    # Pulls pages in a background thread, so the next request is in flight while the caller works
+    # on the current page. Errors are re-raised in the caller; closing the iterator stops the thread.
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def produce() -> None:
+        try:
+            for page in pages:
+                while not stop.is_set():
+                    try:
+                        buffer.put(page, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            result: Any = done
+        except BaseException as exc:
+            result = exc
+        while not stop.is_set():
+            try:
+                buffer.put(result, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    thread = threading.Thread(target=produce, name="collector-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            page = buffer.get()
+            if page is done:
+                return
+            if isinstance(page, BaseException):
+                raise page
+            yield page
+    finally:
+        # Not joined: the thread may be inside a request or a rate-limit wait, and exits after it.
+        stop.set()
+
+
+def collect_user_pages(
+    username_or_url: str,
+    max_items: Optional[int] = None,
+    previous_items: Optional[List[dict]] = None,
+    client: Optional[RedditClient] = None,
+) -> Tuple[RedditProfile, Iterator[List[dict]]]:
+    # The profile, and the items collect_user would return as pages that are fetched ahead while
+    # the caller consumes them. The async collector gathers everything first and yields one page.
+    if client is None and settings.reddit_async_collector:
+        profile, items = asyncio.run(collect_user_async(username_or_url, max_items, previous_items))
+        return profile, iter([items])
+
+    username = parse_username(username_or_url)
+    client = client or RedditClient()
+    profile = client.fetch_profile(username)
+    return profile, prefetch_pages(stream_user(client, username, max_items, previous_items))
+
+
+def collect_user(
+    username_or_url: str,
+    max_items: Optional[int] = None,
+    previous_items: Optional[List[dict]] = None,
+    client: Optional[RedditClient] = None,
+) -> Tuple[RedditProfile, List[dict]]:
+    if client is None and settings.reddit_async_collector:
+        return asyncio.run(collect_user_async(username_or_url, max_items, previous_items))
+
+    username = parse_username(username_or_url)
+    client = client or RedditClient()
+    profile = client.fetch_profile(username)
     items: List[dict] = []
-    for post in submissions:
-        items.append(
-            {
-                "kind": "post",
-                "item_id": post.get("name"),
-                "created_utc": post.get("created_utc"),
-                "subreddit": post.get("subreddit"),
-                "permalink": f"https://www.reddit.com{post.get('permalink', '')}",
-                "body_text": post.get("selftext") or None,
-                "url": post.get("url"),
-                "link_id": None,
-                "parent_id": None,
-            }
-        )
-    for comment in comments:
-        items.append(
-            {
-                "kind": "comment",
-                "item_id": comment.get("name"),
-                "created_utc": comment.get("created_utc"),
-                "subreddit": comment.get("subreddit"),
-                "permalink": f"https://www.reddit.com{comment.get('permalink', '')}",
-                "body_text": comment.get("body") or None,
-                "url": None,
-                "link_id": comment.get("link_id"),
-                "parent_id": comment.get("parent_id"),
-            }
-        )
+    for page in stream_user(client, username, max_items, previous_items):
+        items.extend(page)
+    return profile, items
+
+
+async def _collect_listing(client: AsyncRedditClient, username: str, listing: str, limit: int, previous: List[dict]) -> List[dict]:
+    items: List[dict] = []
+    async for page in client.stream_listing(username, listing, limit, *_known_markers(previous)):
+        items.extend(page)
     return items
 
 
-def collect_user(username_or_url: str, max_items: Optional[int] = None) -> Tuple[RedditProfile, List[dict]]:
+async def collect_user_async(
+    username_or_url: str,
+    max_items: Optional[int] = None,
+    previous_items: Optional[List[dict]] = None,
+) -> Tuple[RedditProfile, List[dict]]:
     username = parse_username(username_or_url)
-    client = RedditClient()
-    profile = client.fetch_profile(username)
-    max_items = max_items or settings.reddit_max_items
-    submission_limit = max_items // 2
-    comment_limit = max_items - submission_limit
-    submissions = client.fetch_listing(username, "submitted", submission_limit)
-    comments = client.fetch_listing(username, "comments", comment_limit)
-    items = normalize_items(submissions, comments)
+    submission_limit, comment_limit = _listing_limits(max_items)
+    previous_posts, previous_comments = _split_previous(previous_items)
+    async with AsyncRedditClient() as client:
+        profile, submissions, comments = await asyncio.gather(
+            client.fetch_profile(username),
+            _collect_listing(client, username, "submitted", submission_limit, previous_posts),
+            _collect_listing(client, username, "comments", comment_limit, previous_comments),
+        )
+    items = submissions + comments
+    if previous_items:
+        items = merge_items(items, previous_items, submission_limit, comment_limit)
     return profile, items
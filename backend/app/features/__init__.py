@@ -2,23 +2,25 @@ from __future__ import annotations
 
 from typing import Dict, List
 
+from app.features.batch import ItemBatch
 from app.features.content import compute_content_features
 from app.features.interaction import compute_interaction_features
 from app.features.repetition import compute_repetition_features
 from app.features.timing import compute_timing_features
 
 
-def compute_features(items: List[dict]) -> Dict[str, dict]:
-    timing = compute_timing_features(items)
-    repetition = compute_repetition_features(items)
-    content = compute_content_features(items)
-    interaction = compute_interaction_features(items)
+def compute_features(items: ItemBatch | List[dict]) -> Dict[str, dict]:
+    batch = ItemBatch.ensure(items)
+    timing = compute_timing_features(batch)
+    repetition = compute_repetition_features(batch)
+    content = compute_content_features(batch)
+    interaction = compute_interaction_features(batch)
 
     coverage_flags = {
-        "has_items": bool(items),
+        "has_items": bool(len(batch)),
         "has_timestamps": timing.get("timestamp_completeness", 0) > 0,
-        "has_comments": any(i.get("kind") == "comment" for i in items),
-        "has_posts": any(i.get("kind") == "post" for i in items),
+        "has_comments": bool(batch.is_comment.any()),
+        "has_posts": bool(batch.is_post.any()),
     }
 
     return {
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+
+KIND_OTHER = 0
+KIND_POST = 1
+KIND_COMMENT = 2
+_KIND_CODES = {"post": KIND_POST, "comment": KIND_COMMENT}
+
+
+def _intern(values: List[Optional[str]], lookup: Optional[Dict[str, int]] = None) -> Tuple[np.ndarray, List[str]]:
+    # Ids are assigned in first-seen order so bincount/argmax ties resolve like Counter.most_common.
+    lookup = {} if lookup is None else lookup
+    ids = np.fromiter(
+        (lookup.setdefault(value, len(lookup)) if value else -1 for value in values),
+        dtype=np.int64,
+        count=len(values),
+    )
+    return ids, list(lookup)
+
+
+def url_domain(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    netloc = urlparse(url).netloc
+    return netloc.lower() if netloc else None
+
+
+def sequential_sum(values: np.ndarray) -> float:
+    # np.sum uses pairwise summation; accumulate adds left to right exactly like Python's sum().
+    if not values.size:
+        return 0.0
+    return float(np.add.accumulate(values)[-1])
+
+
+@dataclass
+class ItemBatch:
+    items: List[dict]
+    created_utc: np.ndarray
+    kind: np.ndarray
+    text_length: np.ndarray
+    has_text: np.ndarray
+    has_url: np.ndarray
+    subreddit_id: np.ndarray
+    subreddits: List[str]
+    domain_id: np.ndarray
+    domains: List[str]
+    link_id: np.ndarray
+    derived: Dict[str, object] = field(default_factory=dict)
+
+    @classmethod
+    def from_items(cls, items: List[dict], item_domains: Optional[Sequence[Optional[str]]] = None) -> "ItemBatch":
+        builder = ItemBatchBuilder()
+        builder.extend(items, item_domains)
+        return builder.build()
+
+    @classmethod
+    def ensure(cls, items: "ItemBatch | List[dict]") -> "ItemBatch":
+        return items if isinstance(items, ItemBatch) else cls.from_items(items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def is_post(self) -> np.ndarray:
+        return self.kind == KIND_POST
+
+    @property
+    def is_comment(self) -> np.ndarray:
+        return self.kind == KIND_COMMENT
+
+    def select(self, mask: np.ndarray) -> List[dict]:
+        return [self.items[i] for i in np.flatnonzero(mask)]
+
+
+class ItemBatchBuilder:
+    # Accumulates the columns page by page so a streamed collection never needs the raw listing
+    # payloads in memory at once; build() gives the same batch as ItemBatch.from_items(all items).
+    def __init__(self) -> None:
+        self.items: List[dict] = []
+        self._columns: Dict[str, List[np.ndarray]] = {
+            name: [] for name in ("created_utc", "kind", "text_length", "has_url", "subreddit_id", "domain_id", "link_id")
+        }
+        self._subreddits: Dict[str, int] = {}
+        self._domains: Dict[str, int] = {}
+        self._link_ids: Dict[str, int] = {}
+
+    def extend(self, items: List[dict], item_domains: Optional[Sequence[Optional[str]]] = None) -> None:
+        count = len(items)
+        columns = self._columns
+        columns["created_utc"].append(
+            np.fromiter(
+                (float(i.get("created_utc")) if i.get("created_utc") else np.nan for i in items),
+                dtype=np.float64,
+                count=count,
+            )
+        )
+        columns["kind"].append(
+            np.fromiter((_KIND_CODES.get(i.get("kind"), KIND_OTHER) for i in items), dtype=np.int8, count=count)
+        )
+        columns["text_length"].append(
+            np.fromiter((len(i.get("body_text") or "") for i in items), dtype=np.int64, count=count)
+        )
+        columns["has_url"].append(np.fromiter((bool(i.get("url")) for i in items), dtype=bool, count=count))
+        columns["subreddit_id"].append(_intern([i.get("subreddit") for i in items], self._subreddits)[0])
+        if item_domains is None:
+            item_domains = [url_domain(i.get("url")) for i in items]
+        columns["domain_id"].append(_intern(list(item_domains), self._domains)[0])
+        columns["link_id"].append(_intern([i.get("link_id") for i in items], self._link_ids)[0])
+        self.items.extend(items)
+
+    def _column(self, name: str, dtype: type) -> np.ndarray:
+        parts = self._columns[name]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    def build(self) -> ItemBatch:
+        text_length = self._column("text_length", np.int64)
+        return ItemBatch(
+            items=self.items,
+            created_utc=self._column("created_utc", np.float64),
+            kind=self._column("kind", np.int8),
+            text_length=text_length,
+            has_text=text_length > 0,
+            has_url=self._column("has_url", bool),
+            subreddit_id=self._column("subreddit_id", np.int64),
+            subreddits=list(self._subreddits),
+            domain_id=self._column("domain_id", np.int64),
+            domains=list(self._domains),
+            link_id=self._column("link_id", np.int64),
+        )
@@ -3,15 +3,18 @@ from __future__ import annotations
 import statistics
 from typing import Dict, List
 
+import numpy as np
 
-def compute_content_features(items: List[dict]) -> Dict[str, float | int]:
-    comments = [i for i in items if i.get("kind") == "comment"]
-    comment_lengths = [len(i.get("body_text") or "") for i in comments]
+from app.features.batch import ItemBatch
+
+
+def compute_content_features(items: ItemBatch | List[dict]) -> Dict[str, float | int]:
+    batch = ItemBatch.ensure(items)
+    comment_lengths = batch.text_length[batch.is_comment].tolist()
     avg_comment_length = statistics.mean(comment_lengths) if comment_lengths else 0.0
     median_comment_length = statistics.median(comment_lengths) if comment_lengths else 0.0
 
-    url_items = [i for i in items if i.get("url")]
-    url_rate = len(url_items) / len(items) if items else 0.0
+    url_rate = int(np.count_nonzero(batch.has_url)) / len(batch) if len(batch) else 0.0
 
     return {
         "avg_comment_length": avg_comment_length,
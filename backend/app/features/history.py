@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+
+def compute_history_features(text_items: List[dict], matched: List[bool]) -> Dict[str, float | int | list]:
+    reused = [item for item, hit in zip(text_items, matched) if hit]
+    history_reuse_rate = len(reused) / len(text_items) if text_items else 0.0
+    return {
+        "history_reuse_rate": history_reuse_rate,
+        "history_reused_items": len(reused),
+        "history_reuse_permalinks": [i.get("permalink") for i in reused if i.get("permalink")][:3],
+    }
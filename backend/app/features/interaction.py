@@ -2,14 +2,16 @@ from __future__ import annotations
 
 from typing import Dict, List
 
+import numpy as np
 
-def compute_interaction_features(items: List[dict]) -> Dict[str, float | int]:
-    comments = [i for i in items if i.get("kind") == "comment"]
-    thread_ids = [i.get("link_id") for i in comments if i.get("link_id")]
-    unique_threads = len(set(thread_ids))
+from app.features.batch import ItemBatch
+
+
+def compute_interaction_features(items: ItemBatch | List[dict]) -> Dict[str, float | int]:
+    batch = ItemBatch.ensure(items)
+    thread_ids = batch.link_id[batch.is_comment]
+    unique_threads = int(np.unique(thread_ids[thread_ids >= 0]).size)
     reply_depth_mean = 0.0
-    if comments:
-        reply_depth_mean = 0.0
     return {
         "unique_threads_replied_to": unique_threads,
         "reply_depth_mean": reply_depth_mean,
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import hashlib
+import struct
+from typing import Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.features.batch import ItemBatch, ItemBatchBuilder, url_domain
+from app.features.minhash import NUM_PERM
+from app.features.repetition import TextFingerprints, derive_texts
+from app.utils.redis_client import get_redis
+
+
+# Bump when tokenization, shingling or MinHash parameters change so stale entries are never read.
+ITEM_CACHE_VERSION = 1
+_LOAD_CHUNK = 1000
+# text_length, domain byte length (_NO_DOMAIN for None), normalized text byte length, shingle count;
+# followed by the domain, the space-joined tokens, uint32 shingles and the uint32 signature.
+_HEADER = struct.Struct("<IIII")
+_NO_DOMAIN = 0xFFFFFFFF
+
+# GET + sliding TTL refresh for a whole chunk of keys in one round trip.
+_LOAD_LUA = """
+local values = {}
+for index, key in ipairs(KEYS) do
+  local value = redis.call('GET', key)
+  if value then
+    redis.call('EXPIRE', key, ARGV[1])
+    values[index] = value
+  else
+    values[index] = false
+  end
+end
+return values
+"""
+
+
+class ItemDerived(NamedTuple):
+    text_length: int
+    domain: Optional[str]
+    tokens: List[str]
+    shingles: List[int]
+    signature: Optional[np.ndarray]
+
+
+def item_cache_key(item: dict) -> Optional[str]:
+    item_id = item.get("item_id")
+    if not item_id:
+        return None
+    content = f"{item.get('body_text') or ''}\x00{item.get('url') or ''}".encode("utf-8")
+    digest = hashlib.blake2b(content, digest_size=12).hexdigest()
+    return f"itemfeat:v{ITEM_CACHE_VERSION}:{item_id}:{digest}"
+
+
+def _encode(record: ItemDerived) -> bytes:
+    domain = record.domain.encode("utf-8") if record.domain is not None else b""
+    text = " ".join(record.tokens).encode("utf-8")
+    header = _HEADER.pack(
+        record.text_length,
+        len(domain) if record.domain is not None else _NO_DOMAIN,
+        len(text),
+        len(record.shingles),
+    )
+    shingles = np.asarray(record.shingles, dtype=np.uint32).tobytes()
+    signature = record.signature.astype(np.uint32).tobytes() if record.signature is not None else b""
+    return header + domain + text + shingles + signature
+
+
+def _decode(value: bytes) -> ItemDerived:
+    text_length, domain_size, text_size, shingle_count = _HEADER.unpack_from(value)
+    offset = _HEADER.size
+    domain = None
+    if domain_size != _NO_DOMAIN:
+        domain = value[offset : offset + domain_size].decode("utf-8")
+        offset += domain_size
+    tokens = value[offset : offset + text_size].decode("utf-8").split()
+    offset += text_size
+    shingles = np.frombuffer(value, dtype=np.uint32, count=shingle_count, offset=offset).tolist()
+    offset += shingle_count * 4
+    signature = None
+    if len(value) > offset:
+        signature = np.frombuffer(value, dtype=np.uint32, offset=offset).astype(np.uint64)
+    return ItemDerived(text_length, domain, tokens, shingles, signature)
+
+
+# Content-addressed per-item derived data keyed by item_id + hash of text and URL. Reads refresh
+# the TTL, so items of accounts that keep being analysed stay warm and the rest expire after
+# ITEM_CACHE_TTL_DAYS of disuse (Redis maxmemory-policy volatile-lru bounds the total size).
+class ItemFeatureCache:
+    def __init__(self, ttl_seconds: Optional[int] = None) -> None:
+        self.ttl_seconds = settings.item_cache_ttl_days * 86400 if ttl_seconds is None else ttl_seconds
+        self.redis = get_redis()
+
+    def load(self, items: List[dict]) -> List[Optional[ItemDerived]]:
+        records: List[Optional[ItemDerived]] = [None] * len(items)
+        if self.ttl_seconds <= 0:
+            return records
+        keyed = [(index, key) for index, key in enumerate(map(item_cache_key, items)) if key]
+        if not keyed:
+            return records
+        values: list = []
+        try:
+            load = self.redis.register_script(_LOAD_LUA)
+            for start in range(0, len(keyed), _LOAD_CHUNK):
+                chunk = keyed[start : start + _LOAD_CHUNK]
+                values.extend(load(keys=[key for _, key in chunk], args=[self.ttl_seconds]))
+        except Exception:
+            return records
+        for (index, _), value in zip(keyed, values):
+            if value is None:
+                continue
+            try:
+                records[index] = _decode(value)
+            except (ValueError, UnicodeDecodeError, struct.error):
+                continue
+        return records
+
+    def store(self, items: List[dict], records: List[ItemDerived]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        try:
+            pipeline = self.redis.pipeline(transaction=False)
+            for item, record in zip(items, records):
+                key = item_cache_key(item)
+                if key:
+                    pipeline.set(key, _encode(record), ex=self.ttl_seconds)
+            pipeline.execute()
+        except Exception:
+            return
+
+
+def derive_items(items: List[dict]) -> List[ItemDerived]:
+    text_indexes = [index for index, item in enumerate(items) if item.get("body_text")]
+    token_lists, shingle_sets, signatures = derive_texts([items[index]["body_text"] for index in text_indexes])
+    by_index = {index: position for position, index in enumerate(text_indexes)}
+    records: List[ItemDerived] = []
+    for index, item in enumerate(items):
+        position = by_index.get(index)
+        records.append(
+            ItemDerived(
+                text_length=len(item.get("body_text") or ""),
+                domain=url_domain(item.get("url")),
+                tokens=token_lists[position] if position is not None else [],
+                shingles=shingle_sets[position] if position is not None else [],
+                signature=signatures[position] if position is not None else None,
+            )
+        )
+    return records
+
+
+def _cached_records(items: List[dict], cache: ItemFeatureCache) -> List[ItemDerived]:
+    records = cache.load(items)
+    missing = [index for index, record in enumerate(records) if record is None]
+    if missing:
+        missing_items = [items[index] for index in missing]
+        derived = derive_items(missing_items)
+        for index, record in zip(missing, derived):
+            records[index] = record
+        cache.store(missing_items, derived)
+    return records
+
+
+def cached_batch(items: List[dict], cache: Optional[ItemFeatureCache] = None) -> ItemBatch:
+    return cached_batch_pages([items], cache)
+
+
+def cached_batch_pages(pages: Iterable[List[dict]], cache: Optional[ItemFeatureCache] = None) -> ItemBatch:
+    # Derives each page as it arrives, so a streamed collection overlaps with per-item feature work;
+    # the result equals cached_batch(all items).
+    cache = cache or ItemFeatureCache()
+    builder = ItemBatchBuilder()
+    text_items: List[dict] = []
+    tokens: List[List[str]] = []
+    shingles: List[List[int]] = []
+    signatures: List[np.ndarray] = []
+    for items in pages:
+        records = _cached_records(items, cache)
+        builder.extend(items, item_domains=[record.domain for record in records])
+        for item, record in zip(items, records):
+            if record.text_length:
+                text_items.append(item)
+                tokens.append(record.tokens)
+                shingles.append(record.shingles)
+                signatures.append(record.signature)
+
+    batch = builder.build()
+    batch.derived["text_fingerprints"] = TextFingerprints(
+        text_items,
+        tokens,
+        shingles,
+        np.vstack(signatures) if signatures else np.empty((0, NUM_PERM), dtype=np.uint64),
+    )
+    return batch
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import zlib
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+
+MERSENNE_PRIME = (1 << 31) - 1
+NUM_PERM = 64
+LSH_BANDS = 21
+LSH_THRESHOLD = 0.4
+_BAND_MULTIPLIER = np.uint64(0x100000001B3)
+_BAND_KEY_MASK = np.uint64((1 << 63) - 1)
+_SHINGLE_MASK = (1 << 32) - 1
+_TOKEN_MULTIPLIER = 1_000_003
+
+
+def token_hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def shingle_hashes(tokens: Sequence[str], n: int = 3) -> List[int]:
+    hashes = [token_hash(token) for token in tokens]
+    if not hashes:
+        return []
+    if len(hashes) < n:
+        n = len(hashes)
+    shingles: List[int] = []
+    for i in range(len(hashes) - n + 1):
+        value = 0
+        for h in hashes[i : i + n]:
+            value = (value * _TOKEN_MULTIPLIER + h) & _SHINGLE_MASK
+        shingles.append(value)
+    return shingles
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_sets: Sequence[Iterable[int]], chunk_shingles: int = 200_000) -> np.ndarray:
+        signatures = np.full((len(shingle_sets), self.num_perm), MERSENNE_PRIME, dtype=np.uint64)
+        start = 0
+        while start < len(shingle_sets):
+            end = start
+            values: List[int] = []
+            offsets: List[int] = []
+            rows: List[int] = []
+            while end < len(shingle_sets) and (not values or len(values) < chunk_shingles):
+                shingles = set(shingle_sets[end])
+                if shingles:
+                    offsets.append(len(values))
+                    rows.append(end)
+                    values.extend(shingles)
+                end += 1
+            if values:
+                x = np.fromiter(values, dtype=np.uint64, count=len(values))
+                hashed = (self.a[:, None] * x[None, :] + self.b[:, None]) % MERSENNE_PRIME
+                signatures[rows] = np.minimum.reduceat(hashed, offsets, axis=1).T
+            start = end
+        return signatures
+
+
+class _UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> None:
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+
+def band_keys(signatures: np.ndarray, bands: int = LSH_BANDS) -> np.ndarray:
+    rows_per_band = signatures.shape[1] // bands
+    keys = np.zeros((signatures.shape[0], bands), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for band in range(bands):
+            for row in range(band * rows_per_band, (band + 1) * rows_per_band):
+                keys[:, band] = keys[:, band] * _BAND_MULTIPLIER + signatures[:, row]
+    return (keys & _BAND_KEY_MASK).astype(np.int64)
+
+
+def signature_agreement(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+def is_empty_signature(signature: np.ndarray) -> bool:
+    return bool(np.all(signature == MERSENNE_PRIME))
+
+
+def lsh_clusters(signatures: np.ndarray, bands: int = LSH_BANDS, threshold: float = LSH_THRESHOLD) -> List[List[int]]:
+    count = signatures.shape[0]
+    union_find = _UnionFind(count)
+    empty = np.all(signatures == MERSENNE_PRIME, axis=1)
+    keys = band_keys(signatures, bands)
+    for band in range(bands):
+        buckets: Dict[int, int] = {}
+        for index, key in enumerate(keys[:, band].tolist()):
+            first = buckets.setdefault(key, index)
+            if first == index:
+                continue
+            if empty[index] or signature_agreement(signatures[first], signatures[index]) >= threshold:
+                union_find.union(first, index)
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(count):
+        groups.setdefault(union_find.find(index), []).append(index)
+    return list(groups.values())
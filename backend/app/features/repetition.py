@@ -3,11 +3,17 @@ from __future__ import annotations
 import math
 import re
 from collections import Counter
-from typing import Dict, List
-from urllib.parse import urlparse
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from app.features.batch import ItemBatch
+from app.features.minhash import MinHasher, lsh_clusters, shingle_hashes
 
 
 _WORD_RE = re.compile(r"[a-z0-9]+")
+_MINHASHER = MinHasher()
+_CLUSTER_SAMPLE_LIMIT = 5
 
 
 def _normalize_text(text: str) -> str:
@@ -15,12 +21,6 @@ def _normalize_text(text: str) -> str:
     return " ".join(tokens)
 
 
-def _ngrams(tokens: List[str], n: int) -> List[str]:
-    if len(tokens) < n:
-        return []
-    return [" ".join(tokens[i : i + n]) for i in range(len(tokens) - n + 1)]
-
-
 def _entropy(values: List[int]) -> float:
     total = sum(values)
     if total == 0:
@@ -33,46 +33,83 @@ def _entropy(values: List[int]) -> float:
     return entropy
 
 
-def compute_repetition_features(items: List[dict]) -> Dict[str, float | str | dict]:
-    texts = [i.get("body_text") for i in items if i.get("body_text")]
-    normalized = [_normalize_text(t) for t in texts if t]
-    total_texts = len(normalized)
-    unique_texts = len(set(normalized))
+class TextFingerprints(NamedTuple):
+    items: List[dict]
+    token_lists: List[List[str]]
+    shingle_sets: List[List[int]]
+    signatures: np.ndarray
+
+
+def derive_texts(texts: List[str]) -> Tuple[List[List[str]], List[List[int]], np.ndarray]:
+    token_lists = [_normalize_text(text).split() for text in texts]
+    shingle_sets = [shingle_hashes(tokens, 3) for tokens in token_lists]
+    return token_lists, shingle_sets, _MINHASHER.signatures(shingle_sets)
+
+
+def text_fingerprints(batch: ItemBatch) -> TextFingerprints:
+    cached = batch.derived.get("text_fingerprints")
+    if cached is not None:
+        return cached
+    text_items = batch.select(batch.has_text)
+    token_lists, shingle_sets, signatures = derive_texts([i["body_text"] for i in text_items])
+    fingerprints = TextFingerprints(text_items, token_lists, shingle_sets, signatures)
+    batch.derived["text_fingerprints"] = fingerprints
+    return fingerprints
+
+
+def _top_share(ids: np.ndarray, size: int) -> tuple[int | None, float]:
+    ids = ids[ids >= 0]
+    if not ids.size:
+        return None, 0.0
+    counts = np.bincount(ids, minlength=size)
+    top = int(np.argmax(counts))
+    return top, int(counts[top]) / ids.size
+
+
+def compute_repetition_features(items: ItemBatch | List[dict]) -> Dict[str, float | str | dict]:
+    batch = ItemBatch.ensure(items)
+    fingerprints = text_fingerprints(batch)
+    text_items = fingerprints.items
+    total_texts = len(text_items)
+
+    phrase_counts: Counter[int] = Counter()
+    for tokens, shingles in zip(fingerprints.token_lists, fingerprints.shingle_sets):
+        if len(tokens) >= 3:
+            phrase_counts.update(shingles)
+
+    clusters = lsh_clusters(fingerprints.signatures) if total_texts else []
     near_duplicate_rate = 0.0
     if total_texts:
-        near_duplicate_rate = max(0.0, 1 - (unique_texts / total_texts))
+        near_duplicate_rate = max(0.0, 1 - (len(clusters) / total_texts))
+
+    duplicate_clusters = sorted((c for c in clusters if len(c) > 1), key=len, reverse=True)
+    near_duplicate_clusters = [
+        {
+            "size": len(cluster),
+            "sample_permalinks": [
+                text_items[i].get("permalink") for i in cluster[:3] if text_items[i].get("permalink")
+            ],
+        }
+        for cluster in duplicate_clusters[:_CLUSTER_SAMPLE_LIMIT]
+    ]
 
-    phrase_counts: Counter[str] = Counter()
-    for text in normalized:
-        tokens = text.split()
-        phrase_counts.update(_ngrams(tokens, 3))
     top_phrase_reuse = 0.0
     if phrase_counts:
         top_phrase, top_count = phrase_counts.most_common(1)[0]
-        top_phrase_reuse = top_count / max(len(normalized), 1)
-
-    domains: List[str] = []
-    for item in items:
-        url = item.get("url")
-        if not url:
-            continue
-        parsed = urlparse(url)
-        if parsed.netloc:
-            domains.append(parsed.netloc.lower())
-    domain_counts = Counter(domains)
-    link_domain_concentration = 0.0
-    top_domain = None
-    if domain_counts:
-        top_domain, top_count = domain_counts.most_common(1)[0]
-        link_domain_concentration = top_count / max(sum(domain_counts.values()), 1)
-
-    subreddit_counts = Counter([i.get("subreddit") for i in items if i.get("subreddit")])
-    entropy = _entropy(list(subreddit_counts.values()))
+        top_phrase_reuse = top_count / max(total_texts, 1)
+
+    top_domain_id, link_domain_concentration = _top_share(batch.domain_id, len(batch.domains))
+    top_domain = batch.domains[top_domain_id] if top_domain_id is not None else None
+
+    subreddit_ids = batch.subreddit_id[batch.subreddit_id >= 0]
+    subreddit_counts = np.bincount(subreddit_ids, minlength=len(batch.subreddits)).tolist()
+    entropy = _entropy(subreddit_counts)
     max_entropy = math.log(len(subreddit_counts)) if subreddit_counts else 1.0
     subreddit_entropy = entropy / max_entropy if max_entropy else 0.0
 
     return {
         "near_duplicate_rate": near_duplicate_rate,
+        "near_duplicate_clusters": near_duplicate_clusters,
         "top_phrase_reuse": top_phrase_reuse,
         "link_domain_concentration": link_domain_concentration,
         "top_domain": top_domain,
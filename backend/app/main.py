@@ -4,6 +4,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
+from app.api.metrics import router as metrics_router
 from app.api.routes import router
 from app.store.db import init_db
 
@@ -25,6 +26,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.include_router(router)
+app.include_router(metrics_router)
 
 
 @app.on_event("startup")
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import math
+import operator
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Rule directions: "up" scales from min_points at `low` to max_points at `high` (more is worse), "down"
+# the other way round (less is worse). "at_least"/"below" are flat: max_points once the input reaches
+# `high` / drops below `high`. `when` gates a rule on other inputs, e.g. (("comment_count", ">", 20),).
+DIRECTIONS = ("up", "down", "at_least", "below")
+_GATE_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+@dataclass(frozen=True)
+class Rule:
+    key: str
+    feature: str
+    low: float
+    high: float
+    min_points: int
+    max_points: int
+    direction: str
+    title: str
+    details: str
+    when: Tuple[Tuple[str, str, float], ...] = ()
+
+    @property
+    def inputs(self) -> Tuple[str, ...]:
+        return (self.feature,) + tuple(name for name, _, _ in self.when)
+
+
+def _scaled(rule: Rule, ratio: float) -> int:
+    return int(round(rule.min_points + ratio * (rule.max_points - rule.min_points)))
+
+
+def rule_points(rule: Rule, inputs: Mapping[str, Optional[float]]) -> int:
+    for name, op, threshold in rule.when:
+        value = inputs.get(name)
+        if value is None or not _GATE_OPS[op](value, threshold):
+            return 0
+    value = inputs.get(rule.feature)
+    if value is None or math.isnan(value):
+        return 0
+    if rule.direction == "at_least":
+        return rule.max_points if value >= rule.high else 0
+    if rule.direction == "below":
+        return rule.max_points if value < rule.high else 0
+    if rule.direction == "up":
+        if value <= rule.low:
+            return 0
+        if value >= rule.high:
+            return rule.max_points
+        return _scaled(rule, (value - rule.low) / (rule.high - rule.low))
+    if value >= rule.high:
+        return 0
+    if value <= rule.low:
+        return rule.max_points
+    return _scaled(rule, (rule.high - value) / (rule.high - rule.low))
+
+
+def score_rules(rules: Sequence[Rule], inputs: Mapping[str, Optional[float]]) -> Dict[str, int]:
+    return {rule.key: rule_points(rule, inputs) for rule in rules}
+
+
+def input_names(rules: Sequence[Rule]) -> Tuple[str, ...]:
+    names: Dict[str, None] = {}
+    for rule in rules:
+        names.update(dict.fromkeys(rule.inputs))
+    return tuple(names)
+
+
+def as_columns(matrix: Any, names: Sequence[str]) -> Mapping[str, Any]:
+    # A 2-D array is read as one column per name, in order; anything indexable by name (a dict of
+    # arrays, a pyarrow.Table) is used as is.
+    if isinstance(matrix, np.ndarray):
+        if matrix.ndim != 2 or matrix.shape[1] != len(names):
+            raise ValueError(f"expected an (n, {len(names)}) matrix, got {matrix.shape}")
+        return {name: matrix[:, index] for index, name in enumerate(names)}
+    return matrix
+
+
+def _column(columns: Mapping[str, Any], name: str) -> np.ndarray:
+    # Missing values are NaN; every comparison with NaN is false, so gates and thresholds skip them.
+    return np.asarray(columns[name], dtype=np.float64)
+
+
+def score_matrix(rules: Sequence[Rule], matrix: Any) -> np.ndarray:
+    # Points per (row, rule) for a whole feature matrix, matching rule_points row by row.
+    columns = as_columns(matrix, input_names(rules))
+    rows = len(_column(columns, rules[0].feature)) if rules else 0
+    points = np.zeros((rows, len(rules)), dtype=np.int64)
+    with np.errstate(invalid="ignore"):
+        for index, rule in enumerate(rules):
+            value = _column(columns, rule.feature)
+            gate = ~np.isnan(value)
+            for name, op, threshold in rule.when:
+                gate &= _GATE_OPS[op](_column(columns, name), threshold)
+            if rule.direction == "at_least":
+                column = np.where(value >= rule.high, rule.max_points, 0)
+            elif rule.direction == "below":
+                column = np.where(value < rule.high, rule.max_points, 0)
+            else:
+                if rule.direction == "up":
+                    ratio = (value - rule.low) / (rule.high - rule.low)
+                    zero, full = value <= rule.low, value >= rule.high
+                else:
+                    ratio = (rule.high - value) / (rule.high - rule.low)
+                    zero, full = value >= rule.high, value <= rule.low
+                scaled = np.round(rule.min_points + ratio * (rule.max_points - rule.min_points))
+                column = np.where(zero, 0, np.where(full, rule.max_points, scaled))
+            points[:, index] = np.where(gate, column, 0)
+    return points
@@ -1,26 +1,72 @@
 from __future__ import annotations
 
-import math
 import time
-from typing import Dict, List, Tuple
-
-
-def _scale_points(value: float, low: float, high: float, min_points: int, max_points: int) -> int:
-    if value <= low:
-        return 0
-    if value >= high:
-        return max_points
-    ratio = (value - low) / (high - low)
-    return int(round(min_points + ratio * (max_points - min_points)))
-
-
-def _inverse_scale_points(value: float, low: float, high: float, min_points: int, max_points: int) -> int:
-    if value >= high:
-        return 0
-    if value <= low:
-        return max_points
-    ratio = (high - value) / (high - low)
-    return int(round(min_points + ratio * (max_points - min_points)))
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.features.batch import ItemBatch
+from app.scoring.engine import Rule, as_columns, input_names, score_matrix, score_rules
+
+
+RULE_VERSION = "v1"
+# The v1 rule table, in reason order. Inputs are the flat values built by rule_inputs; details are
+# formatted with them.
+RULES: Tuple[Rule, ...] = (
+    Rule("activity", "activity_per_day", 20, 200, 8, 25, "up", "Very high activity volume",
+         "Average activity {activity_per_day:.1f}/day across collected span."),
+    Rule("cadence", "burstiness_index", 0.1, 1.0, 8, 15, "down", "Unusually regular posting cadence",
+         "Inter-arrival CV {burstiness_index:.2f} suggests regular timing."),
+    Rule("sleep_gap", "sleep_gap_hours_p95", 3, 8, 8, 15, "down", "Low extended idle time",
+         "95th percentile gap {sleep_gap_hours_p95:.1f} hours."),
+    Rule("near_duplicates", "near_duplicate_rate", 0.1, 0.6, 8, 30, "up", "High near-duplicate rate",
+         "Duplicate rate {near_duplicate_rate:.2f}."),
+    Rule("history_reuse", "history_reuse_rate", 0.1, 0.6, 8, 20, "up", "Content reused from earlier activity",
+         "{history_reuse_rate:.2f} of texts near-duplicate items from earlier snapshots."),
+    Rule("domain", "link_domain_concentration", 0.3, 0.8, 8, 15, "up", "Single domain dominates",
+         "Top domain share {link_domain_concentration:.2f}."),
+    Rule("subreddit", "subreddit_concentration", 0.4, 0.9, 8, 10, "up", "Subreddit concentration",
+         "Subreddit concentration {subreddit_concentration:.2f}."),
+    Rule("short_comments", "short_comment_rate", 0.6, 0.6, 10, 10, "at_least", "Many very short comments",
+         "Short comment rate {short_comment_rate:.2f}."),
+    Rule("url_rate", "url_rate", 0.3, 0.8, 5, 15, "up", "URL-heavy posting", "URL rate {url_rate:.2f}."),
+    Rule("new_account", "activity_per_day", 50, 200, 6, 10, "up", "High activity on a new account",
+         "Account age {account_age_days:.0f} days.",
+         when=(("account_age_days", "<", 30), ("activity_per_day", ">", 50))),
+    Rule("thread_diversity", "thread_diversity", 0.2, 0.2, 8, 8, "below", "Low thread diversity",
+         "Thread diversity ratio {thread_diversity:.2f}.", when=(("comment_count", ">", 20),)),
+)
+# Inputs that come from the items and profile rather than FeatureSet.json; score stores them with
+# the explanations so stored snapshots can be rescored without their items.
+ITEM_INPUTS = ("short_comment_rate", "account_age_days", "comment_count")
+INPUTS = input_names(RULES) + ("subreddit_entropy", "total_items", "span_days", "timestamp_completeness")
+
+
+def rule_inputs(features: Dict[str, dict], item_inputs: Dict[str, Optional[float]]) -> Dict[str, Optional[float]]:
+    timing = features.get("timing", {})
+    repetition = features.get("repetition", {})
+    subreddit_entropy = repetition.get("subreddit_entropy", 1) or 1
+    comment_count = item_inputs.get("comment_count") or 0
+    return {
+        "activity_per_day": (timing.get("posts_per_day", 0) or 0) + (timing.get("comments_per_day", 0) or 0),
+        "burstiness_index": timing.get("burstiness_index", 0) or 0,
+        "sleep_gap_hours_p95": timing.get("sleep_gap_hours_p95", 0) or 0,
+        "near_duplicate_rate": repetition.get("near_duplicate_rate", 0) or 0,
+        "history_reuse_rate": features.get("history", {}).get("history_reuse_rate", 0) or 0,
+        "link_domain_concentration": repetition.get("link_domain_concentration", 0) or 0,
+        "subreddit_concentration": 1 - subreddit_entropy,
+        "short_comment_rate": item_inputs.get("short_comment_rate"),
+        "url_rate": features.get("content", {}).get("url_rate", 0) or 0,
+        "account_age_days": item_inputs.get("account_age_days"),
+        "thread_diversity": (features.get("interaction", {}).get("unique_threads_replied_to", 0) or 0)
+        / max(comment_count, 1),
+        "comment_count": comment_count,
+        "subreddit_entropy": subreddit_entropy,
+        "total_items": timing.get("total_items", 0) or 0,
+        "span_days": timing.get("span_days", 0) or 0,
+        "timestamp_completeness": timing.get("timestamp_completeness", 0) or 0,
+    }
 
 
 def compute_confidence(features: Dict[str, dict]) -> float:
@@ -28,171 +74,72 @@ def compute_confidence(features: Dict[str, dict]) -> float:
     total_items = timing.get("total_items", 0) or 0
     span_days = timing.get("span_days", 0) or 0
     completeness = timing.get("timestamp_completeness", 0) or 0
+    return float(_confidence(total_items, span_days, completeness))
 
-    volume_factor = min(1.0, total_items / 200)
-    span_factor = min(1.0, span_days / 30)
-    completeness_factor = min(1.0, completeness)
-
-    base = 0.5 * volume_factor + 0.3 * span_factor + 0.2 * completeness_factor
-    penalty = 0.3 if total_items < 30 else 0.0
-    return max(0.0, min(1.0, base - penalty))
 
+def _confidence(total_items, span_days, completeness):
+    # Scalars or arrays alike.
+    volume_factor = np.minimum(1.0, np.divide(total_items, 200))
+    span_factor = np.minimum(1.0, np.divide(span_days, 30))
+    completeness_factor = np.minimum(1.0, completeness)
 
-def score(features: Dict[str, dict], profile: dict, items: List[dict]) -> Tuple[dict, List[dict]]:
-    timing = features.get("timing", {})
+    base = 0.5 * volume_factor + 0.3 * span_factor + 0.2 * completeness_factor
+    penalty = np.where(np.less(total_items, 30), 0.3, 0.0)
+    return np.maximum(0.0, np.minimum(1.0, base - penalty))
+
+
+def score(
+    features: Dict[str, dict],
+    profile: dict,
+    items: List[dict],
+    batch: Optional[ItemBatch] = None,
+    rules: Tuple[Rule, ...] = RULES,
+    now: Optional[float] = None,
+) -> Tuple[dict, List[dict]]:
+    if batch is None:
+        batch = ItemBatch.from_items(items)
+    comments = batch.select(batch.is_comment)
+    item_inputs = {
+        "short_comment_rate": _short_comment_rate(batch),
+        "account_age_days": _account_age_days(profile, now),
+        "comment_count": len(comments),
+    }
+    inputs = rule_inputs(features, item_inputs)
     repetition = features.get("repetition", {})
-    content = features.get("content", {})
-    interaction = features.get("interaction", {})
-
-    reasons: List[dict] = []
-    explanations: List[dict] = []
-
-    posts_per_day = timing.get("posts_per_day", 0) or 0
-    comments_per_day = timing.get("comments_per_day", 0) or 0
-    activity_per_day = posts_per_day + comments_per_day
-
-    # Activity score
-    activity_points = _scale_points(activity_per_day, low=20, high=200, min_points=8, max_points=25)
-    if activity_points:
-        reasons.append(
-            {
-                "title": "Very high activity volume",
-                "impact": activity_points,
-                "evidence": _sample_permalinks(items, 3),
-                "details": f"Average activity {activity_per_day:.1f}/day across collected span.",
-            }
-        )
-
-    # Cadence regularity (low CV)
-    burstiness = timing.get("burstiness_index", 0) or 0
-    cadence_points = _inverse_scale_points(burstiness, low=0.1, high=1.0, min_points=8, max_points=15)
-    if cadence_points:
-        reasons.append(
-            {
-                "title": "Unusually regular posting cadence",
-                "impact": cadence_points,
-                "evidence": [],
-                "details": f"Inter-arrival CV {burstiness:.2f} suggests regular timing.",
-            }
-        )
-
-    # Sleep gap
-    sleep_gap = timing.get("sleep_gap_hours_p95", 0) or 0
-    sleep_points = _inverse_scale_points(sleep_gap, low=3, high=8, min_points=8, max_points=15)
-    if sleep_points:
-        reasons.append(
-            {
-                "title": "Low extended idle time",
-                "impact": sleep_points,
-                "evidence": [],
-                "details": f"95th percentile gap {sleep_gap:.1f} hours.",
-            }
-        )
-
-    # Duplicate rate
-    dup_rate = repetition.get("near_duplicate_rate", 0) or 0
-    dup_points = _scale_points(dup_rate, low=0.1, high=0.6, min_points=8, max_points=30)
-    if dup_points:
-        reasons.append(
-            {
-                "title": "High near-duplicate rate",
-                "impact": dup_points,
-                "evidence": _sample_permalinks(items, 3),
-                "details": f"Duplicate rate {dup_rate:.2f}.",
-            }
-        )
-
-    # Domain concentration
-    domain_concentration = repetition.get("link_domain_concentration", 0) or 0
-    domain_points = _scale_points(domain_concentration, low=0.3, high=0.8, min_points=8, max_points=15)
-    if domain_points:
-        reasons.append(
-            {
-                "title": "Single domain dominates",
-                "impact": domain_points,
-                "evidence": _sample_permalinks(items, 3),
-                "details": f"Top domain share {domain_concentration:.2f}.",
-            }
-        )
-
-    # Subreddit concentration
-    subreddit_entropy = repetition.get("subreddit_entropy", 1) or 1
-    subreddit_concentration = 1 - subreddit_entropy
-    subreddit_points = _scale_points(subreddit_concentration, low=0.4, high=0.9, min_points=8, max_points=10)
-    if subreddit_points:
-        reasons.append(
-            {
-                "title": "Subreddit concentration",
-                "impact": subreddit_points,
-                "evidence": [],
-                "details": f"Subreddit concentration {subreddit_concentration:.2f}.",
-            }
-        )
-
-    # Short / generic comments
-    short_comment_rate = _short_comment_rate(items)
-    short_points = 10 if short_comment_rate >= 0.6 else 0
-    if short_points:
-        reasons.append(
-            {
-                "title": "Many very short comments",
-                "impact": short_points,
-                "evidence": _sample_permalinks([i for i in items if i.get("kind") == "comment"], 3),
-                "details": f"Short comment rate {short_comment_rate:.2f}.",
-            }
-        )
-
-    # URL-heavy posting
-    url_rate = content.get("url_rate", 0) or 0
-    url_points = _scale_points(url_rate, low=0.3, high=0.8, min_points=5, max_points=15)
-    if url_points:
-        reasons.append(
-            {
-                "title": "URL-heavy posting",
-                "impact": url_points,
-                "evidence": _sample_permalinks([i for i in items if i.get("url")], 3),
-                "details": f"URL rate {url_rate:.2f}.",
-            }
-        )
-
-    # New account high activity
-    account_age_days = _account_age_days(profile)
-    new_account_points = 0
-    if account_age_days is not None and account_age_days < 30 and activity_per_day > 50:
-        new_account_points = _scale_points(activity_per_day, low=50, high=200, min_points=6, max_points=10)
-        reasons.append(
-            {
-                "title": "High activity on a new account",
-                "impact": new_account_points,
-                "evidence": _sample_permalinks(items, 3),
-                "details": f"Account age {account_age_days:.0f} days.",
-            }
-        )
-
-    # Low thread diversity
-    comments = [i for i in items if i.get("kind") == "comment"]
-    thread_count = interaction.get("unique_threads_replied_to", 0) or 0
-    thread_diversity = thread_count / max(len(comments), 1)
-    thread_points = 8 if len(comments) > 20 and thread_diversity < 0.2 else 0
-    if thread_points:
-        reasons.append(
-            {
-                "title": "Low thread diversity",
-                "impact": thread_points,
-                "evidence": _sample_permalinks(comments, 3),
-                "details": f"Thread diversity ratio {thread_diversity:.2f}.",
-            }
-        )
+    history = features.get("history", {})
+    evidence = {
+        "activity": lambda: _sample_permalinks(items, 3),
+        "near_duplicates": lambda: _cluster_permalinks(repetition, 3) or _sample_permalinks(items, 3),
+        "history_reuse": lambda: history.get("history_reuse_permalinks") or _sample_permalinks(items, 3),
+        "domain": lambda: _sample_permalinks(items, 3),
+        "short_comments": lambda: _sample_permalinks(comments, 3),
+        "url_rate": lambda: _sample_permalinks(batch.select(batch.has_url), 3),
+        "new_account": lambda: _sample_permalinks(items, 3),
+        "thread_diversity": lambda: _sample_permalinks(comments, 3),
+    }
 
+    points = score_rules(rules, inputs)
+    reasons = [
+        _reason(rule, points[rule.key], evidence[rule.key]() if rule.key in evidence else [], inputs)
+        for rule in rules
+        if points[rule.key]
+    ]
     automation_score = min(100, sum(r["impact"] for r in reasons))
 
-    coordination_score = _coordination_proxy_score(dup_rate, domain_concentration, subreddit_entropy)
+    coordination_score = int(
+        _coordination_proxy_score(
+            max(inputs["near_duplicate_rate"], inputs["history_reuse_rate"]),
+            inputs["link_domain_concentration"],
+            inputs["subreddit_entropy"],
+        )
+    )
 
     confidence = compute_confidence(features)
 
     explanations = {
         "coverage": features.get("coverage_flags", {}),
         "confidence": confidence,
+        "rule_inputs": item_inputs,
     }
 
     return {
@@ -204,27 +151,69 @@ def score(features: Dict[str, dict], profile: dict, items: List[dict]) -> Tuple[
     }, reasons
 
 
-def _coordination_proxy_score(dup_rate: float, domain_concentration: float, subreddit_entropy: float) -> int:
+def _reason(rule: Rule, impact: int, evidence: List[str], inputs: Dict[str, Optional[float]]) -> dict:
+    return {"title": rule.title, "impact": impact, "evidence": evidence, "details": rule.details.format(**inputs)}
+
+
+def score_inputs(matrix: Any) -> Dict[str, np.ndarray]:
+    # Vectorized score over a matrix with one column per INPUTS name (or a dict of columns / Arrow
+    # table); NaN marks a missing input, which scores no points.
+    columns = as_columns(matrix, INPUTS)
+    points = score_matrix(RULES, columns)
+    subreddit_entropy = np.asarray(columns["subreddit_entropy"], dtype=np.float64)
+    return {
+        "points": points,
+        "automation_score": np.minimum(100, points.sum(axis=1)),
+        "coordination_score": _coordination_proxy_score(
+            np.maximum(
+                np.asarray(columns["near_duplicate_rate"], dtype=np.float64),
+                np.asarray(columns["history_reuse_rate"], dtype=np.float64),
+            ),
+            np.asarray(columns["link_domain_concentration"], dtype=np.float64),
+            subreddit_entropy,
+        ).astype(np.int64),
+        "confidence": _confidence(
+            np.asarray(columns["total_items"], dtype=np.float64),
+            np.asarray(columns["span_days"], dtype=np.float64),
+            np.asarray(columns["timestamp_completeness"], dtype=np.float64),
+        ),
+    }
+
+
+def input_matrix(rows: List[Dict[str, Optional[float]]]) -> np.ndarray:
+    # rule_inputs dicts -> (n, len(INPUTS)) float matrix, None -> NaN.
+    matrix = np.array([[row.get(name) for name in INPUTS] for row in rows], dtype=np.float64)
+    return matrix.reshape(len(rows), len(INPUTS))
+
+
+def _coordination_proxy_score(dup_rate, domain_concentration, subreddit_entropy):
+    # Scalars or arrays alike.
     concentration = 1 - subreddit_entropy
     score = (dup_rate * 0.4 + domain_concentration * 0.3 + concentration * 0.3) * 100
-    return int(max(0, min(100, round(score))))
+    return np.maximum(0, np.minimum(100, np.round(score)))
 
 
-def _short_comment_rate(items: List[dict]) -> float:
-    comments = [i for i in items if i.get("kind") == "comment" and i.get("body_text")]
-    if not comments:
+def _short_comment_rate(batch: ItemBatch) -> float:
+    comment_lengths = batch.text_length[batch.is_comment & batch.has_text]
+    if not comment_lengths.size:
         return 0.0
-    short = [i for i in comments if len(i.get("body_text", "")) < 20]
-    return len(short) / len(comments)
+    return int(np.count_nonzero(comment_lengths < 20)) / comment_lengths.size
 
 
-def _account_age_days(profile: dict) -> float | None:
+def _account_age_days(profile: dict, now: Optional[float] = None) -> float | None:
     created = profile.get("created_utc")
     if not created:
         return None
-    return (time.time() - float(created)) / 86400
+    return ((time.time() if now is None else now) - float(created)) / 86400
 
 
 def _sample_permalinks(items: List[dict], limit: int) -> List[str]:
-    links = [i.get("permalink") for i in items if i.get("permalink")]
+    links = (i.get("permalink") for i in items if i.get("permalink"))
+    return list(islice(links, limit))
+
+
+def _cluster_permalinks(repetition: dict, limit: int) -> List[str]:
+    links: List[str] = []
+    for cluster in repetition.get("near_duplicate_clusters") or []:
+        links.extend(cluster.get("sample_permalinks", []))
     return links[:limit]
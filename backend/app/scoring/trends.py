@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+# Each metric is read from FeatureSet.json ("section.name") or from the score payload ("scores.name").
+# The value is the smallest absolute spread we test against (RELATIVE_TOLERANCE of the mean also
+# applies) so short or near-constant baselines do not turn ordinary sampling noise into shifts.
+TREND_METRICS: Dict[str, float] = {
+    "timing.posts_per_day": 0.5,
+    "timing.comments_per_day": 1.0,
+    "timing.burstiness_index": 0.1,
+    "timing.regularity_score": 0.1,
+    "repetition.near_duplicate_rate": 0.05,
+    "repetition.top_phrase_reuse": 0.05,
+    "repetition.link_domain_concentration": 0.05,
+    "repetition.subreddit_entropy": 0.2,
+    "content.url_rate": 0.05,
+    "history.history_reuse_rate": 0.05,
+    "scores.automation_score": 5.0,
+    "scores.coordination_score": 5.0,
+}
+RELATIVE_TOLERANCE = 0.1
+BASELINE_ALPHA = 0.3
+MIN_BASELINE_SAMPLES = 3
+DRIFT_Z_THRESHOLD = 3.0
+
+
+@dataclass
+class Baseline:
+    count: int = 0
+    mean: float = 0.0
+    variance: float = 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(max(self.variance, 0.0))
+
+    def update(self, value: float) -> "Baseline":
+        # Exponentially weighted mean/variance, so the baseline follows the recent snapshots and
+        # each update costs O(1) no matter how long the account's history is.
+        if self.count == 0:
+            return Baseline(count=1, mean=value, variance=0.0)
+        diff = value - self.mean
+        increment = BASELINE_ALPHA * diff
+        return Baseline(
+            count=self.count + 1,
+            mean=self.mean + increment,
+            variance=(1 - BASELINE_ALPHA) * (self.variance + diff * increment),
+        )
+
+
+def trend_values(features: dict, scores: dict) -> Dict[str, float]:
+    values: Dict[str, float] = {}
+    for metric in TREND_METRICS:
+        section, name = metric.split(".", 1)
+        source = scores if section == "scores" else (features.get(section) or {})
+        value = source.get(name)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            continue
+        values[metric] = float(value)
+    return values
+
+
+def detect_shift(metric: str, baseline: Baseline, value: float) -> Optional[dict]:
+    if baseline.count < MIN_BASELINE_SAMPLES:
+        return None
+    spread = max(baseline.std, TREND_METRICS.get(metric, 0.0), RELATIVE_TOLERANCE * abs(baseline.mean))
+    if spread <= 0:
+        return None
+    z_score = (value - baseline.mean) / spread
+    if abs(z_score) < DRIFT_Z_THRESHOLD:
+        return None
+    return {
+        "metric": metric,
+        "value": value,
+        "baseline_mean": baseline.mean,
+        "baseline_std": baseline.std,
+        "z_score": z_score,
+        "direction": "up" if z_score > 0 else "down",
+    }
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+from app.scoring import rules_v1
+from app.scoring.engine import Rule
+
+
+# Named rule tables. Live analyses score with rules_v1.RULE_VERSION; offline rescoring can write
+# Score rows under any registered version side by side.
+RULE_VERSIONS: Dict[str, Tuple[Rule, ...]] = {
+    rules_v1.RULE_VERSION: rules_v1.RULES,
+}
+
+
+def get_rules(version: str) -> Tuple[Rule, ...]:
+    try:
+        return RULE_VERSIONS[version]
+    except KeyError:
+        raise ValueError(f"Unknown rule version {version}") from None
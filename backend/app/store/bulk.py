@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import io
+from typing import Iterable, List, Sequence
+
+from sqlalchemy import Insert, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.store.models import Item, ItemKind
+
+
+ITEM_COLUMNS = (
+    "snapshot_id",
+    "kind",
+    "item_id",
+    "created_utc",
+    "subreddit",
+    "permalink",
+    "body_text",
+    "url",
+    "link_id",
+    "parent_id",
+)
+
+
+def item_row(snapshot_id: int, item: dict) -> dict:
+    return {
+        "snapshot_id": snapshot_id,
+        "kind": ItemKind.post if item.get("kind") == "post" else ItemKind.comment,
+        "item_id": item.get("item_id") or "",
+        "created_utc": item.get("created_utc"),
+        "subreddit": item.get("subreddit"),
+        "permalink": item.get("permalink"),
+        "body_text": item.get("body_text"),
+        "url": item.get("url"),
+        "link_id": item.get("link_id"),
+        "parent_id": item.get("parent_id"),
+    }
+
+
+def item_dict(item: Item) -> dict:
+    return {
+        "kind": item.kind.value,
+        "item_id": item.item_id,
+        "created_utc": item.created_utc,
+        "subreddit": item.subreddit,
+        "permalink": item.permalink,
+        "body_text": item.body_text,
+        "url": item.url,
+        "link_id": item.link_id,
+        "parent_id": item.parent_id,
+    }
+
+
+def _csv_value(value: object) -> str:
+    # COPY's CSV format treats an unquoted empty field as NULL and a quoted one as "".
+    if value is None:
+        return ""
+    if isinstance(value, ItemKind):
+        value = value.name
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return repr(value)
+
+
+def copy_rows(session: Session, table: str, columns: Sequence[str], rows: List[dict]) -> None:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_csv_value(row[column]) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    dbapi_connection = session.connection().connection.driver_connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def supports_copy(session: Session) -> bool:
+    bind = session.get_bind()
+    return bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+
+
+def insert_ignoring_conflicts_statement(session: Session, model: type, index_elements: Sequence[str]) -> Insert:
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing(index_elements=list(index_elements))
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing(index_elements=list(index_elements))
+    return insert(model)
+
+
+def insert_ignoring_conflicts(session: Session, model: type, rows: List[dict], index_elements: Sequence[str]) -> None:
+    session.execute(insert_ignoring_conflicts_statement(session, model, index_elements), rows)
+
+
+def bulk_insert_items(session: Session, snapshot_id: int, items: Iterable[dict]) -> int:
+    rows = [item_row(snapshot_id, item) for item in items]
+    if not rows:
+        return 0
+    if supports_copy(session):
+        copy_rows(session, Item.__tablename__, ITEM_COLUMNS, rows)
+    else:
+        session.execute(insert(Item), rows)
+    return len(rows)
@@ -30,3 +30,6 @@ def get_session() -> Session:
 
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.features.minhash import LSH_THRESHOLD, band_keys, is_empty_signature, signature_agreement
+from app.store.bulk import insert_ignoring_conflicts_statement
+from app.store.models import FingerprintBand, ItemFingerprint
+
+
+_SIGNATURE_DTYPE = np.uint32
+_LOOKUP_CHUNK = 500
+
+
+def _encode_signature(signature: np.ndarray) -> bytes:
+    return signature.astype(_SIGNATURE_DTYPE).tobytes()
+
+
+def _decode_signature(value: bytes) -> np.ndarray:
+    return np.frombuffer(value, dtype=_SIGNATURE_DTYPE).astype(np.uint64)
+
+
+class FingerprintIndex:
+    def __init__(self, session: Session, account_id: int) -> None:
+        self.session = session
+        self.account_id = account_id
+
+    def match(self, item_ids: Sequence[str], signatures: np.ndarray, threshold: float = LSH_THRESHOLD) -> List[bool]:
+        matched = [False] * len(item_ids)
+        if not len(item_ids):
+            return matched
+        # Stored items still in the current window are already counted by the in-window features;
+        # only content from outside the window is history.
+        window = set(item_ids)
+        keys = band_keys(signatures)
+        wanted: Dict[Tuple[int, int], List[int]] = {}
+        for index, row in enumerate(keys.tolist()):
+            if is_empty_signature(signatures[index]):
+                continue
+            for band, bucket in enumerate(row):
+                wanted.setdefault((band, bucket), []).append(index)
+
+        buckets_by_band: Dict[int, List[int]] = {}
+        for band, bucket in wanted:
+            buckets_by_band.setdefault(band, []).append(bucket)
+        for band, buckets in buckets_by_band.items():
+            for start in range(0, len(buckets), _LOOKUP_CHUNK):
+                rows = self.session.execute(
+                    select(FingerprintBand.bucket, ItemFingerprint.item_id, ItemFingerprint.signature)
+                    .join(ItemFingerprint, ItemFingerprint.id == FingerprintBand.fingerprint_id)
+                    .where(
+                        FingerprintBand.account_id == self.account_id,
+                        FingerprintBand.band == band,
+                        FingerprintBand.bucket.in_(buckets[start : start + _LOOKUP_CHUNK]),
+                    )
+                )
+                for bucket, stored_item_id, stored_signature in rows:
+                    if stored_item_id in window:
+                        continue
+                    stored = None
+                    for index in wanted[(band, bucket)]:
+                        if matched[index]:
+                            continue
+                        if stored is None:
+                            stored = _decode_signature(stored_signature)
+                        if signature_agreement(signatures[index], stored) >= threshold:
+                            matched[index] = True
+        return matched
+
+    def add(self, item_ids: Sequence[str], created_utc: Sequence[float | None], signatures: np.ndarray) -> int:
+        existing = set()
+        unique_ids = [i for i in dict.fromkeys(item_ids) if i]
+        for start in range(0, len(unique_ids), _LOOKUP_CHUNK):
+            existing.update(
+                self.session.execute(
+                    select(ItemFingerprint.item_id).where(
+                        ItemFingerprint.account_id == self.account_id,
+                        ItemFingerprint.item_id.in_(unique_ids[start : start + _LOOKUP_CHUNK]),
+                    )
+                ).scalars()
+            )
+
+        new_indexes: List[int] = []
+        for index, item_id in enumerate(item_ids):
+            if not item_id or item_id in existing or is_empty_signature(signatures[index]):
+                continue
+            existing.add(item_id)
+            new_indexes.append(index)
+        if not new_indexes:
+            return 0
+
+        # A concurrent analysis of the same account may insert the same items between the check above
+        # and this insert; conflicting rows are skipped and only the rows returned here get bands.
+        statement = insert_ignoring_conflicts_statement(self.session, ItemFingerprint, ("account_id", "item_id"))
+        inserted = self.session.execute(
+            statement.returning(ItemFingerprint.id, ItemFingerprint.item_id),
+            [
+                {
+                    "account_id": self.account_id,
+                    "item_id": item_ids[index],
+                    "created_utc": created_utc[index],
+                    "signature": _encode_signature(signatures[index]),
+                }
+                for index in new_indexes
+            ],
+        ).all()
+        if not inserted:
+            return 0
+        index_by_item = {item_ids[index]: index for index in new_indexes}
+        keys = band_keys(signatures[[index_by_item[item_id] for _, item_id in inserted]])
+        band_rows = [
+            {"fingerprint_id": fingerprint_id, "band": band, "bucket": bucket, "account_id": self.account_id}
+            for (fingerprint_id, _), row in zip(inserted, keys.tolist())
+            for band, bucket in enumerate(row)
+        ]
+        self.session.execute(insert(FingerprintBand), band_rows)
+        return len(inserted)
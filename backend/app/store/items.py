@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.store.bulk import bulk_insert_items, copy_rows, insert_ignoring_conflicts, item_dict, item_row, supports_copy
+from app.store.models import CanonicalItem, Item, Platform, SnapshotItem
+
+
+ITEM_STORAGE_SNAPSHOT = "snapshot"
+ITEM_STORAGE_NORMALIZED = "normalized"
+SNAPSHOT_ITEM_COLUMNS = ("snapshot_id", "position", "item_ref")
+_CONTENT_COLUMNS = ("kind", "created_utc", "subreddit", "permalink", "body_text", "url", "link_id", "parent_id")
+_LOOKUP_CHUNK = 500
+
+
+def content_hash(row: dict) -> str:
+    payload = json.dumps(
+        [row[column].name if column == "kind" else row[column] for column in _CONTENT_COLUMNS],
+        separators=(",", ":"),
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def upsert_canonical_items(session: Session, platform: Platform, items: List[dict]) -> List[int]:
+    rows = []
+    for item in items:
+        row = item_row(0, item)
+        row.pop("snapshot_id")
+        row["item_id"] = row["item_id"] or None
+        row["platform"] = platform
+        row["content_hash"] = content_hash(row)
+        rows.append(row)
+
+    latest: Dict[str, dict] = {row["item_id"]: row for row in rows if row["item_id"]}
+    wanted = list(latest)
+    existing: Dict[str, tuple] = {}
+    for start in range(0, len(wanted), _LOOKUP_CHUNK):
+        for item_ref, item_id, stored_hash in session.execute(
+            select(CanonicalItem.id, CanonicalItem.item_id, CanonicalItem.content_hash).where(
+                CanonicalItem.platform == platform,
+                CanonicalItem.item_id.in_(wanted[start : start + _LOOKUP_CHUNK]),
+            )
+        ):
+            existing[item_id] = (item_ref, stored_hash)
+
+    # Edited items keep their canonical row and take the latest content; unchanged ones cost no write.
+    changed = [
+        {"id": existing[item_id][0], **{column: row[column] for column in _CONTENT_COLUMNS + ("content_hash",)}}
+        for item_id, row in latest.items()
+        if item_id in existing and existing[item_id][1] != row["content_hash"]
+    ]
+    if changed:
+        session.execute(update(CanonicalItem), changed)
+
+    new_rows = [row for item_id, row in latest.items() if item_id not in existing]
+    if new_rows:
+        insert_ignoring_conflicts(session, CanonicalItem, new_rows, ("platform", "item_id"))
+        missing = [row["item_id"] for row in new_rows]
+        for start in range(0, len(missing), _LOOKUP_CHUNK):
+            for item_ref, item_id in session.execute(
+                select(CanonicalItem.id, CanonicalItem.item_id).where(
+                    CanonicalItem.platform == platform,
+                    CanonicalItem.item_id.in_(missing[start : start + _LOOKUP_CHUNK]),
+                )
+            ):
+                existing[item_id] = (item_ref, None)
+
+    refs: List[int] = []
+    for row in rows:
+        if row["item_id"]:
+            refs.append(existing[row["item_id"]][0])
+        else:
+            refs.append(session.execute(insert(CanonicalItem).returning(CanonicalItem.id), row).scalar_one())
+    return refs
+
+
+def link_snapshot_items(session: Session, snapshot_id: int, item_refs: List[int]) -> int:
+    rows = [
+        {"snapshot_id": snapshot_id, "position": position, "item_ref": item_ref}
+        for position, item_ref in enumerate(item_refs)
+    ]
+    if not rows:
+        return 0
+    if supports_copy(session):
+        copy_rows(session, SnapshotItem.__tablename__, SNAPSHOT_ITEM_COLUMNS, rows)
+    else:
+        session.execute(insert(SnapshotItem), rows)
+    return len(rows)
+
+
+def store_snapshot_items(
+    session: Session, platform: Platform, snapshot_id: int, items: List[dict], storage: Optional[str] = None
+) -> int:
+    if (storage or settings.item_storage) != ITEM_STORAGE_NORMALIZED:
+        return bulk_insert_items(session, snapshot_id, items)
+    return link_snapshot_items(session, snapshot_id, upsert_canonical_items(session, platform, items))
+
+
+def load_snapshot_items(session: Session, snapshot_id: int) -> List[dict]:
+    rows = session.execute(
+        select(CanonicalItem)
+        .join(SnapshotItem, SnapshotItem.item_ref == CanonicalItem.id)
+        .where(SnapshotItem.snapshot_id == snapshot_id)
+        .order_by(SnapshotItem.position)
+    ).scalars().all()
+    if not rows:
+        rows = session.execute(select(Item).where(Item.snapshot_id == snapshot_id).order_by(Item.id)).scalars().all()
+    items = [item_dict(row) for row in rows]
+    for item in items:
+        item["item_id"] = item["item_id"] or ""
+    return items
@@ -4,7 +4,8 @@ import enum
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import DateTime, Enum, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import BigInteger, DateTime, Enum, Float, ForeignKey, Index, Integer, LargeBinary, SmallInteger, String, Text
+from sqlalchemy import UniqueConstraint
 from sqlalchemy import JSON
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -55,6 +56,14 @@ class Snapshot(Base):
     )
 
 
+Index(
+    "ix_snapshots_account_id_collected_at",
+    Snapshot.account_id,
+    Snapshot.collected_at.desc(),
+    Snapshot.id.desc(),
+)
+
+
 class Item(Base):
     __tablename__ = "items"
 
@@ -73,6 +82,32 @@ class Item(Base):
     snapshot: Mapped["Snapshot"] = relationship(back_populates="items")
 
 
+class CanonicalItem(Base):
+    __tablename__ = "canonical_items"
+    __table_args__ = (UniqueConstraint("platform", "item_id"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    platform: Mapped[Platform] = mapped_column(Enum(Platform))
+    kind: Mapped[ItemKind] = mapped_column(Enum(ItemKind))
+    item_id: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    content_hash: Mapped[str] = mapped_column(String(32))
+    created_utc: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    subreddit: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    permalink: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    body_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    url: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    link_id: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    parent_id: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+
+
+class SnapshotItem(Base):
+    __tablename__ = "snapshot_items"
+
+    snapshot_id: Mapped[int] = mapped_column(ForeignKey("snapshots.id"), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, primary_key=True)
+    item_ref: Mapped[int] = mapped_column(ForeignKey("canonical_items.id"), index=True)
+
+
 class FeatureSet(Base):
     __tablename__ = "features"
 
@@ -95,3 +130,67 @@ class Score(Base):
     explanations: Mapped[dict] = mapped_column(JSON)
 
     snapshot: Mapped["Snapshot"] = relationship(back_populates="scores")
+
+
+# Scores recomputed offline under a named rule version, next to the live Score row of the snapshot.
+class ScoreVersion(Base):
+    __tablename__ = "score_versions"
+    __table_args__ = (UniqueConstraint("snapshot_id", "rule_version"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    snapshot_id: Mapped[int] = mapped_column(ForeignKey("snapshots.id"), index=True)
+    rule_version: Mapped[str] = mapped_column(String(32), index=True)
+    automation_score: Mapped[int] = mapped_column(Integer)
+    coordination_score: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    confidence: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    reasons: Mapped[dict] = mapped_column(JSON)
+    explanations: Mapped[dict] = mapped_column(JSON)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class ItemFingerprint(Base):
+    __tablename__ = "item_fingerprints"
+    __table_args__ = (UniqueConstraint("account_id", "item_id"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id"), index=True)
+    item_id: Mapped[str] = mapped_column(String(32))
+    created_utc: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    signature: Mapped[bytes] = mapped_column(LargeBinary)
+
+
+class FingerprintBand(Base):
+    __tablename__ = "fingerprint_bands"
+    __table_args__ = (Index("ix_fingerprint_bands_lookup", "account_id", "band", "bucket"),)
+
+    fingerprint_id: Mapped[int] = mapped_column(ForeignKey("item_fingerprints.id"), primary_key=True)
+    band: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id"))
+    bucket: Mapped[int] = mapped_column(BigInteger)
+
+
+class TrendBaseline(Base):
+    __tablename__ = "trend_baselines"
+    __table_args__ = (UniqueConstraint("account_id", "metric"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id"), index=True)
+    metric: Mapped[str] = mapped_column(String(64))
+    count: Mapped[int] = mapped_column(Integer)
+    mean: Mapped[float] = mapped_column(Float)
+    variance: Mapped[float] = mapped_column(Float)
+    last_snapshot_id: Mapped[int] = mapped_column(ForeignKey("snapshots.id"))
+
+
+class TrendShift(Base):
+    __tablename__ = "trend_shifts"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id"), index=True)
+    snapshot_id: Mapped[int] = mapped_column(ForeignKey("snapshots.id"), index=True)
+    metric: Mapped[str] = mapped_column(String(64))
+    value: Mapped[float] = mapped_column(Float)
+    baseline_mean: Mapped[float] = mapped_column(Float)
+    baseline_std: Mapped[float] = mapped_column(Float)
+    z_score: Mapped[float] = mapped_column(Float)
+    direction: Mapped[str] = mapped_column(String(8))
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.scoring.trends import Baseline, detect_shift, trend_values
+from app.store.models import Account, FeatureSet, Score, Snapshot, TrendBaseline, TrendShift
+
+
+class TrendTracker:
+    def __init__(self, session: Session, account_id: int) -> None:
+        self.session = session
+        self.account_id = account_id
+
+    def _lock(self) -> None:
+        # analyze_reddit_users bypasses singleflight, so two analyses of one account can reach this
+        # at once. Locking the account row serializes them, and the second reads the baselines the
+        # first committed instead of inserting them again. NO KEY UPDATE (not FOR UPDATE) because
+        # the snapshot inserts already hold key-share locks on the account row.
+        self.session.execute(select(Account.id).where(Account.id == self.account_id).with_for_update(key_share=True))
+
+    def _load(self) -> Dict[str, TrendBaseline]:
+        rows = self.session.execute(
+            select(TrendBaseline).where(TrendBaseline.account_id == self.account_id)
+        ).scalars()
+        return {row.metric: row for row in rows}
+
+    def _history(self, before_snapshot_id: int) -> List[Tuple[int, Dict[str, float]]]:
+        rows = self.session.execute(
+            select(Snapshot.id, FeatureSet.json, Score.automation_score, Score.coordination_score)
+            .join(FeatureSet, FeatureSet.snapshot_id == Snapshot.id)
+            .outerjoin(Score, Score.snapshot_id == Snapshot.id)
+            .where(Snapshot.account_id == self.account_id, Snapshot.id < before_snapshot_id)
+            .order_by(Snapshot.id)
+        ).all()
+        return [
+            (
+                row.id,
+                trend_values(
+                    row.json or {},
+                    {"automation_score": row.automation_score, "coordination_score": row.coordination_score},
+                ),
+            )
+            for row in rows
+        ]
+
+    def observe(self, snapshot_id: int, values: Dict[str, float]) -> List[dict]:
+        self._lock()
+        stored = self._load()
+        baselines = {metric: Baseline(row.count, row.mean, row.variance) for metric, row in stored.items()}
+        if not stored:
+            # Accounts analysed before trends existed: seed the baselines once from their stored
+            # snapshots. After that every new snapshot only updates them.
+            for _, previous in self._history(snapshot_id):
+                for metric, value in previous.items():
+                    baselines[metric] = baselines.get(metric, Baseline()).update(value)
+
+        shifts: List[dict] = []
+        for metric, value in values.items():
+            row = stored.get(metric)
+            if row is not None and row.last_snapshot_id >= snapshot_id:
+                continue
+            baseline = baselines.get(metric, Baseline())
+            shift = detect_shift(metric, baseline, value)
+            if shift is not None:
+                shifts.append(shift)
+                self.session.add(TrendShift(account_id=self.account_id, snapshot_id=snapshot_id, **shift))
+            updated = baseline.update(value)
+            if row is None:
+                row = TrendBaseline(account_id=self.account_id, metric=metric)
+                self.session.add(row)
+            row.count = updated.count
+            row.mean = updated.mean
+            row.variance = updated.variance
+            row.last_snapshot_id = snapshot_id
+        return shifts
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import Dict
+
+from sqlalchemy import delete, func, select
+
+from app.store.bulk import item_dict
+from app.store.db import get_session, init_db
+from app.store.items import link_snapshot_items, upsert_canonical_items
+from app.store.models import Account, CanonicalItem, Item, Snapshot, SnapshotItem
+
+logger = logging.getLogger("worker")
+
+
+# Moves per-snapshot Item rows into canonical_items + snapshot_items. Snapshots are processed in id
+# order, one transaction per batch; a snapshot that already has membership rows is skipped, so the
+# tool can be interrupted and re-run. Legacy rows are only deleted with --delete-legacy.
+def backfill(batch_size: int = 100, delete_legacy: bool = False) -> Dict[str, int]:
+    totals = {"snapshots": 0, "legacy_rows": 0, "linked_rows": 0, "deleted_rows": 0}
+    last_id = 0
+    while True:
+        with get_session() as session:
+            rows = session.execute(
+                select(Snapshot.id, Account.platform)
+                .join(Account, Account.id == Snapshot.account_id)
+                .where(Snapshot.id > last_id)
+                .order_by(Snapshot.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            linked = set(
+                session.execute(
+                    select(SnapshotItem.snapshot_id)
+                    .where(SnapshotItem.snapshot_id.in_([row.id for row in rows]))
+                    .distinct()
+                ).scalars()
+            )
+            for snapshot_id, platform in rows:
+                if snapshot_id not in linked:
+                    legacy = session.execute(
+                        select(Item).where(Item.snapshot_id == snapshot_id).order_by(Item.id)
+                    ).scalars()
+                    items = [item_dict(row) for row in legacy]
+                    if items:
+                        refs = upsert_canonical_items(session, platform, items)
+                        totals["linked_rows"] += link_snapshot_items(session, snapshot_id, refs)
+                        totals["legacy_rows"] += len(items)
+                        linked.add(snapshot_id)
+                if delete_legacy and snapshot_id in linked:
+                    totals["deleted_rows"] += session.execute(
+                        delete(Item).where(Item.snapshot_id == snapshot_id)
+                    ).rowcount
+                totals["snapshots"] += 1
+            last_id = rows[-1].id
+        logger.info("backfill_progress last_snapshot_id=%s %s", last_id, " ".join(f"{k}={v}" for k, v in totals.items()))
+
+    with get_session() as session:
+        totals["canonical_rows"] = session.execute(select(func.count()).select_from(CanonicalItem)).scalar_one()
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill normalized item storage from per-snapshot item rows.")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--delete-legacy", action="store_true", help="Delete per-snapshot rows once linked.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    init_db()
+    totals = backfill(args.batch_size, args.delete_legacy)
+    print(" ".join(f"{key}={value}" for key, value in totals.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select, update
+
+from app.scoring.rules_v1 import INPUTS, ITEM_INPUTS, RULES, input_matrix, rule_inputs, score_inputs
+from app.store.db import get_session, init_db
+from app.store.models import Account, FeatureSet, Score, Snapshot
+from app.utils.cache import REPORT_CACHE_PREFIX, RedisCache, report_cache_key
+
+logger = logging.getLogger("worker")
+
+
+# Rescores stored snapshots from FeatureSet.json with the v1 rule table, one vectorized pass per chunk
+# of snapshot ids. Snapshots scored before rule inputs were stored with the explanations have no
+# short-comment rate or account age; rules reading those keep their previous points. Nothing is
+# written without --write.
+def rescore(chunk_size: int = 1000, write: bool = False, limit: Optional[int] = None) -> Dict[str, float]:
+    totals: Counter = Counter()
+    timings: Counter = Counter()
+    cache = RedisCache(prefix=REPORT_CACHE_PREFIX) if write else None
+    last_id = 0
+    started = time.perf_counter()
+    while limit is None or totals["rows"] < limit:
+        start = time.perf_counter()
+        with get_session() as session:
+            rows = session.execute(
+                select(
+                    Snapshot.id,
+                    Snapshot.comment_count,
+                    Account.handle,
+                    FeatureSet.json,
+                    Score.id.label("score_id"),
+                    Score.automation_score,
+                    Score.coordination_score,
+                    Score.confidence,
+                    Score.reasons,
+                    Score.explanations,
+                )
+                .join(Account, Account.id == Snapshot.account_id)
+                .join(FeatureSet, FeatureSet.snapshot_id == Snapshot.id)
+                .join(Score, Score.snapshot_id == Snapshot.id)
+                .where(Snapshot.id > last_id)
+                .order_by(Snapshot.id)
+                .limit(chunk_size if limit is None else min(chunk_size, limit - totals["rows"]))
+            ).all()
+            if not rows:
+                break
+            inputs = []
+            for row in rows:
+                stored = dict((row.explanations or {}).get("rule_inputs") or {})
+                totals["legacy"] += not stored
+                stored.setdefault("comment_count", row.comment_count)
+                inputs.append(rule_inputs(row.json or {}, stored))
+            matrix = input_matrix(inputs)
+            timings["load"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = score_inputs(matrix)
+            points = _carry_over(result["points"], matrix, [row.reasons for row in rows])
+            automation = np.minimum(100, points.sum(axis=1))
+            timings["score"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            updates = []
+            for index, row in enumerate(rows):
+                changed = (
+                    int(automation[index]) != row.automation_score
+                    or int(result["coordination_score"][index]) != row.coordination_score
+                    or [int(value) for value in points[index] if value] != [r.get("impact") for r in row.reasons or []]
+                )
+                totals["score_delta"] += abs(int(automation[index]) - row.automation_score)
+                if not changed:
+                    continue
+                totals["changed"] += 1
+                updates.append(
+                    {
+                        "id": row.score_id,
+                        "automation_score": int(automation[index]),
+                        "coordination_score": int(result["coordination_score"][index]),
+                        "confidence": float(result["confidence"][index]),
+                        "reasons": _reasons(points[index], inputs[index], row.reasons or []),
+                    }
+                )
+            if write and updates:
+                session.execute(update(Score), updates)
+            timings["write"] += time.perf_counter() - start
+        if cache is not None and updates:
+            rewritten = {entry["id"] for entry in updates}
+            cache.delete_many([report_cache_key(row.handle, row.id) for row in rows if row.score_id in rewritten])
+        totals["rows"] += len(rows)
+        last_id = rows[-1].id
+        logger.info(
+            "rescore_progress last_snapshot_id=%s rows=%s changed=%s rows_per_s=%.0f",
+            last_id,
+            totals["rows"],
+            totals["changed"],
+            totals["rows"] / (time.perf_counter() - started),
+        )
+
+    elapsed = time.perf_counter() - started
+    report: Dict[str, float] = {
+        "rows": totals["rows"],
+        "changed": totals["changed"],
+        "legacy": totals["legacy"],
+        "written": totals["changed"] if write else 0,
+        "mean_abs_delta": round(totals["score_delta"] / max(totals["rows"], 1), 3),
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(totals["rows"] / elapsed) if elapsed else 0,
+    }
+    report.update({f"{phase}_s": round(seconds, 3) for phase, seconds in timings.items()})
+    return report
+
+
+def _carry_over(points: np.ndarray, matrix: np.ndarray, reasons: List[Optional[list]]) -> np.ndarray:
+    # Rules whose item inputs were never stored keep the impact of the previous reason with their title.
+    missing = np.isnan(matrix[:, [INPUTS.index(name) for name in ITEM_INPUTS]])
+    # (rules, item inputs): which item inputs each rule reads.
+    reads = np.array([[name in rule.inputs for name in ITEM_INPUTS] for rule in RULES])
+    carried = (missing.astype(np.int64) @ reads.T.astype(np.int64)) > 0
+    points = points.copy()
+    for index in np.flatnonzero(carried.any(axis=1)):
+        previous = {reason.get("title"): reason.get("impact", 0) for reason in reasons[index] or []}
+        for column in np.flatnonzero(carried[index]):
+            points[index, column] = previous.get(RULES[column].title, 0)
+    return points
+
+
+def _reasons(points: np.ndarray, inputs: Dict[str, Optional[float]], previous: List[dict]) -> List[dict]:
+    # Evidence comes from the items, which are not loaded; it is kept from the previous reason.
+    by_title = {reason.get("title"): reason for reason in previous}
+    reasons = []
+    for rule, impact in zip(RULES, points):
+        if not impact:
+            continue
+        old = by_title.get(rule.title, {})
+        try:
+            details = rule.details.format(**inputs)
+        except (TypeError, ValueError):
+            details = old.get("details", "")
+        reasons.append({"title": rule.title, "impact": int(impact), "evidence": old.get("evidence", []), "details": details})
+    return reasons
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rescore stored feature sets with the current rule table.")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many snapshots.")
+    parser.add_argument("--write", action="store_true", help="Persist changed scores; otherwise only report.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    init_db()
+    report = rescore(args.chunk_size, args.write, args.limit)
+    print(" ".join(f"{key}={value}" for key, value in report.items()))
+
+
+if __name__ == "__main__":
+    main()
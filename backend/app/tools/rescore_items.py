@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from itertools import groupby, islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.orm import Session
+
+from app.features import compute_features
+from app.features.batch import ItemBatch
+from app.scoring.engine import Rule
+from app.scoring.rules_v1 import RULE_VERSION, score
+from app.scoring.versions import get_rules
+from app.store.bulk import insert_ignoring_conflicts, item_dict
+from app.store.db import engine, get_session, init_db
+from app.store.models import CanonicalItem, FeatureSet, Item, Score, ScoreVersion, Snapshot, SnapshotItem
+from app.workers.scheduler import LANE_OFFLINE, submit
+
+logger = logging.getLogger("worker")
+
+_ITEM_COLUMNS = ("kind", "item_id", "created_utc", "subreddit", "permalink", "body_text", "url", "link_id", "parent_id")
+
+# (snapshot_id, items, stored history features, stored account age, collected_at timestamp,
+#  stored reasons of a legacy score)
+Task = Tuple[int, List[dict], Optional[dict], Optional[float], Optional[float], Optional[list]]
+
+
+# Recomputes features and scores from stored items under a named rule version, without collecting
+# again. Snapshots are taken in id windows; each window's items are streamed through a server-side
+# cursor, scored in a process pool in chunks of roughly `chunk_items` items, and written as
+# ScoreVersion rows in one transaction. Snapshots that already have a row for the version are
+# skipped, so the run can be interrupted and resumed. Snapshots scored before the account age was
+# stored with the explanations are counted as legacy; rules that read it keep their stored reason.
+def rescore_items(
+    version: str = RULE_VERSION,
+    workers: Optional[int] = None,
+    window: int = 500,
+    chunk_items: int = 20_000,
+    fetch_size: int = 5_000,
+    min_id: int = 1,
+    max_id: Optional[int] = None,
+) -> Dict[str, float]:
+    get_rules(version)
+    workers = workers or os.cpu_count() or 1
+    totals = {"snapshots": 0, "items": 0, "written": 0, "legacy": 0}
+    bounds = [Snapshot.id >= min_id] + ([Snapshot.id <= max_id] if max_id is not None else [])
+    with get_session() as session:
+        remaining = session.execute(
+            select(func.count()).select_from(Snapshot).where(_pending(version), *bounds)
+        ).scalar_one()
+    started = time.perf_counter()
+    last_id = min_id - 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        while True:
+            with get_session() as session:
+                pending = session.execute(
+                    select(Snapshot.id, Snapshot.collected_at, FeatureSet.json, Score.explanations, Score.reasons)
+                    .outerjoin(FeatureSet, FeatureSet.snapshot_id == Snapshot.id)
+                    .outerjoin(Score, Score.snapshot_id == Snapshot.id)
+                    .where(Snapshot.id > last_id, _pending(version), *bounds)
+                    .order_by(Snapshot.id)
+                    .limit(window)
+                ).all()
+                if not pending:
+                    break
+                meta = {row.id: row for row in pending}
+                futures: List[Future] = []
+                chunk: List[Task] = []
+                chunk_size = 0
+                unseen = set(meta)
+                for snapshot_id, items in _stream_items(session, list(meta), fetch_size):
+                    unseen.discard(snapshot_id)
+                    chunk.append(_task(meta[snapshot_id], items))
+                    chunk_size += len(items)
+                    if chunk_size >= chunk_items:
+                        futures.append(executor.submit(_score_chunk, version, chunk))
+                        chunk, chunk_size = [], 0
+                chunk.extend(_task(meta[snapshot_id], []) for snapshot_id in sorted(unseen))
+                if chunk:
+                    futures.append(executor.submit(_score_chunk, version, chunk))
+
+                rows = []
+                for future in futures:
+                    scored, item_count, legacy = future.result()
+                    rows.extend(scored)
+                    totals["items"] += item_count
+                    totals["legacy"] += legacy
+                insert_ignoring_conflicts(session, ScoreVersion, rows, ("snapshot_id", "rule_version"))
+            totals["snapshots"] += len(pending)
+            totals["written"] += len(rows)
+            last_id = pending[-1].id
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "rescore_items_progress version=%s last_snapshot_id=%s snapshots=%s/%s items=%s items_per_s=%.0f",
+                version,
+                last_id,
+                totals["snapshots"],
+                remaining,
+                totals["items"],
+                totals["items"] / elapsed,
+            )
+
+    elapsed = time.perf_counter() - started
+    return {
+        "version": version,
+        "workers": workers,
+        **totals,
+        "seconds": round(elapsed, 3),
+        "items_per_s": round(totals["items"] / elapsed) if elapsed else 0,
+        "snapshots_per_s": round(totals["snapshots"] / elapsed, 1) if elapsed else 0,
+    }
+
+
+def enqueue_windows(
+    version: str = RULE_VERSION,
+    workers: Optional[int] = None,
+    window: int = 500,
+    chunk_items: int = 20_000,
+    fetch_size: int = 5_000,
+) -> List[str]:
+    # One offline-lane job per window of pending snapshot ids; the jobs make no API calls, so they
+    # are admitted at zero cost and run after interactive and refresh work.
+    get_rules(version)
+    job_ids: List[str] = []
+    with get_session() as session:
+        pending = session.execute(
+            select(Snapshot.id).where(_pending(version)).order_by(Snapshot.id), execution_options={"yield_per": fetch_size}
+        ).scalars()
+        while True:
+            ids = list(islice(pending, window))
+            if not ids:
+                break
+            job = submit(
+                LANE_OFFLINE,
+                rescore_items,
+                version,
+                workers,
+                window,
+                chunk_items,
+                fetch_size,
+                min_id=ids[0],
+                max_id=ids[-1],
+            )
+            job_ids.append(job.id)
+    return job_ids
+
+
+def _pending(version: str):
+    return ~exists().where(and_(ScoreVersion.snapshot_id == Snapshot.id, ScoreVersion.rule_version == version))
+
+
+def _task(row, items: List[dict]) -> Task:
+    history = (row.json or {}).get("history")
+    stored = (row.explanations or {}).get("rule_inputs") or {}
+    collected_at = row.collected_at.timestamp() if isinstance(row.collected_at, datetime) else None
+    # Stored reasons travel only with legacy scores, which have no account age to score with.
+    legacy_reasons = row.reasons if "account_age_days" not in stored else None
+    return row.id, items, history, stored.get("account_age_days"), collected_at, legacy_reasons
+
+
+def _stream_items(session: Session, snapshot_ids: List[int], fetch_size: int) -> Iterator[Tuple[int, List[dict]]]:
+    # Normalized storage first; snapshots without membership rows fall back to per-snapshot rows, as in
+    # load_snapshot_items. yield_per streams both through a server-side cursor on Postgres.
+    options = {"yield_per": fetch_size}
+    normalized = session.execute(
+        select(SnapshotItem.snapshot_id, *(getattr(CanonicalItem, column) for column in _ITEM_COLUMNS))
+        .join(CanonicalItem, CanonicalItem.id == SnapshotItem.item_ref)
+        .where(SnapshotItem.snapshot_id.in_(snapshot_ids))
+        .order_by(SnapshotItem.snapshot_id, SnapshotItem.position),
+        execution_options=options,
+    )
+    seen = set()
+    for snapshot_id, rows in groupby(normalized, key=lambda row: row.snapshot_id):
+        seen.add(snapshot_id)
+        yield snapshot_id, [_item(row) for row in rows]
+    legacy_ids = [snapshot_id for snapshot_id in snapshot_ids if snapshot_id not in seen]
+    if not legacy_ids:
+        return
+    legacy = session.execute(
+        select(Item.snapshot_id, *(getattr(Item, column) for column in _ITEM_COLUMNS))
+        .where(Item.snapshot_id.in_(legacy_ids))
+        .order_by(Item.snapshot_id, Item.id),
+        execution_options=options,
+    )
+    for snapshot_id, rows in groupby(legacy, key=lambda row: row.snapshot_id):
+        yield snapshot_id, [_item(row) for row in rows]
+
+
+def _item(row) -> dict:
+    item = item_dict(row)
+    item["item_id"] = item["item_id"] or ""
+    return item
+
+
+def _init_worker() -> None:
+    # Forked workers must not close the parent's pooled connections on exit.
+    engine.dispose(close=False)
+
+
+def _score_chunk(version: str, chunk: List[Task]) -> Tuple[List[dict], int, int]:
+    # Runs in a pool process: pure computation, no database or Redis access.
+    rules = get_rules(version)
+    rows = []
+    item_count = 0
+    legacy = 0
+    for snapshot_id, items, history, account_age_days, collected_at, reasons in chunk:
+        batch = ItemBatch.from_items(items)
+        features = compute_features(batch)
+        # History reuse was matched against the fingerprints stored before the snapshot; it is kept.
+        if history is not None:
+            features["history"] = history
+        now = collected_at if collected_at is not None else time.time()
+        profile = {"created_utc": now - account_age_days * 86400} if account_age_days is not None else {}
+        payload, _ = score(features, profile, items, batch, rules=rules, now=now)
+        if reasons is not None:
+            legacy += 1
+            _carry_over(payload, rules, reasons)
+        rows.append({"snapshot_id": snapshot_id, "rule_version": version, **payload})
+        item_count += len(items)
+    return rows, item_count, legacy
+
+
+def _carry_over(payload: dict, rules: Tuple[Rule, ...], previous: list) -> None:
+    # Rules that read the unknown account age keep the impact and text of the stored reason.
+    carried = {rule.title for rule in rules if "account_age_days" in rule.inputs}
+    kept = {reason.get("title"): reason for reason in previous if reason.get("title") in carried and reason.get("impact")}
+    if not kept:
+        return
+    by_title = {reason["title"]: reason for reason in payload["reasons"]}
+    by_title.update(kept)
+    payload["reasons"] = [by_title[rule.title] for rule in rules if rule.title in by_title]
+    payload["automation_score"] = min(100, sum(reason["impact"] for reason in payload["reasons"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute features and scores from stored items under a rule version.")
+    parser.add_argument("--version", default=RULE_VERSION, help="Registered rule version to score with.")
+    parser.add_argument("--workers", type=int, default=None, help="Scoring processes (default: all cores).")
+    parser.add_argument("--window", type=int, default=500, help="Snapshots per transaction.")
+    parser.add_argument("--chunk-items", type=int, default=20_000, help="Items per pool task.")
+    parser.add_argument("--fetch-size", type=int, default=5_000, help="Rows per server-side cursor fetch.")
+    parser.add_argument("--enqueue", action="store_true", help="Submit one offline-lane job per window instead of running here.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    init_db()
+    if args.enqueue:
+        job_ids = enqueue_windows(args.version, args.workers, args.window, args.chunk_items, args.fetch_size)
+        print(f"version={args.version} jobs={len(job_ids)} lane={LANE_OFFLINE}")
+        return
+    report = rescore_items(args.version, args.workers, args.window, args.chunk_items, args.fetch_size)
+    print(" ".join(f"{key}={value}" for key, value in report.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,28 @@
-import json
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
 
-from app.utils.redis_client import get_redis
+from app.utils import metrics
+from app.utils.codec import CodecError, decode, get_codec, json_body
+from app.utils.local_cache import MISSING, get_local_cache, publish_invalidation, publish_invalidation_async
+from app.utils.redis_client import get_async_redis, get_redis
+
+
+REPORT_CACHE_PREFIX = "report"
+REPORT_CACHE_TTL_SECONDS = 3600
+
+
+def report_cache_key(username: str, snapshot_id: int | str) -> str:
+    return f"{username}:{snapshot_id}"
+
+
+def latest_report_key(username: str) -> str:
+    return f"latest:{username}"
+
+
+def _count_lookups(prefix: str, l1: int = 0, hit: int = 0, miss: int = 0) -> None:
+    # Per-prefix lookups by where they were answered: the in-process L1, Redis, or neither.
+    for result, count in (("l1", l1), ("hit", hit), ("miss", miss)):
+        if count:
+            metrics.inc("cache_requests", count, prefix=prefix, result=result)
 
 
 class RedisCache:
@@ -12,38 +33,209 @@ class RedisCache:
     def _key(self, key: str) -> str:
         return f"{self.prefix}:{key}"
 
+    def _decode_json(self, value: Any) -> Optional[dict]:
+        try:
+            return decode(value)
+        except CodecError:
+            return None
+
+    def _written(self, keys: List[str]) -> None:
+        local = get_local_cache()
+        if local is not None:
+            local.invalidate(keys)
+            publish_invalidation(keys)
+
     def get_json(self, key: str) -> Optional[dict]:
+        return self.get_many_json([key])[0]
+
+    def set_json(self, key: str, payload: dict, ttl_seconds: int) -> None:
+        value = get_codec().encode(payload)
         try:
-            value = self.redis.get(self._key(key))
+            self.redis.setex(self._key(key), ttl_seconds, value)
         except Exception:
+            return
+        self._written([self._key(key)])
+
+    def get_many_json(self, keys: List[str]) -> List[Optional[dict]]:
+        if not keys:
+            return []
+        full_keys = [self._key(key) for key in keys]
+        payloads: List[Any] = [MISSING] * len(keys)
+        local = get_local_cache()
+        if local is not None:
+            generation = local.generation
+            payloads = [local.get(key, "json") for key in full_keys]
+        missing = [index for index, payload in enumerate(payloads) if payload is MISSING]
+        if not missing:
+            _count_lookups(self.prefix, l1=len(keys))
+            return payloads
+        try:
+            values = self.redis.mget([full_keys[index] for index in missing])
+        except Exception:
+            values = [None] * len(missing)
+        for index, value in zip(missing, values):
+            payloads[index] = self._decode_json(value) if value is not None else None
+            if local is not None and payloads[index] is not None:
+                local.put(full_keys[index], payloads[index], len(value), "json", generation=generation)
+        hits = sum(payloads[index] is not None for index in missing)
+        _count_lookups(self.prefix, l1=len(keys) - len(missing), hit=hits, miss=len(missing) - hits)
+        return payloads
+
+    def set_many_json(self, payloads: Dict[str, dict], ttl_seconds: int) -> None:
+        if not payloads:
+            return
+        try:
+            codec = get_codec()
+            pipeline = self.redis.pipeline(transaction=False)
+            for key, payload in payloads.items():
+                pipeline.setex(self._key(key), ttl_seconds, codec.encode(payload))
+            pipeline.execute()
+        except Exception:
+            return
+        self._written([self._key(key) for key in payloads])
+
+    def get(self, key: str) -> Optional[str]:
+        full_key = self._key(key)
+        local = get_local_cache()
+        if local is not None:
+            generation = local.generation
+            cached = local.get(full_key)
+            if cached is not MISSING:
+                _count_lookups(self.prefix, l1=1)
+                return cached
+        try:
+            value = self.redis.get(full_key)
+        except Exception:
+            _count_lookups(self.prefix, miss=1)
             return None
-        if value is None:
-            return None
+        _count_lookups(self.prefix, hit=int(value is not None), miss=int(value is None))
         if isinstance(value, bytes):
             value = value.decode("utf-8")
+        if local is not None and value is not None:
+            local.put(full_key, value, len(value), generation=generation)
+        return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        try:
+            self.redis.setex(self._key(key), ttl_seconds, value)
+        except Exception:
+            return
+        self._written([self._key(key)])
+
+    def delete_many(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        full_keys = [self._key(key) for key in keys]
+        try:
+            self.redis.delete(*full_keys)
+        except Exception:
+            return
+        self._written(full_keys)
+
+
+class AsyncRedisCache:
+    # The async API routes' view of RedisCache: same keys, codec and L1, over redis.asyncio.
+    def __init__(self, prefix: str = "cache"):
+        self.prefix = prefix
+        self.redis = get_async_redis()
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def _written(self, keys: List[str]) -> None:
+        local = get_local_cache()
+        if local is not None:
+            local.invalidate(keys)
+            await publish_invalidation_async(keys)
+
+    async def get_json(self, key: str) -> Optional[dict]:
+        full_key = self._key(key)
+        local = get_local_cache()
+        if local is not None:
+            generation = local.generation
+            cached = local.get(full_key, "json")
+            if cached is not MISSING:
+                _count_lookups(self.prefix, l1=1)
+                return cached
         try:
-            return json.loads(value)
-        except json.JSONDecodeError:
+            value = await self.redis.get(full_key)
+        except Exception:
+            value = None
+        if value is None:
+            _count_lookups(self.prefix, miss=1)
             return None
+        try:
+            payload = decode(value)
+        except CodecError:
+            _count_lookups(self.prefix, miss=1)
+            return None
+        _count_lookups(self.prefix, hit=1)
+        if local is not None:
+            local.put(full_key, payload, len(value), "json", generation=generation)
+        return payload
 
-    def set_json(self, key: str, payload: dict, ttl_seconds: int) -> None:
-        value = json.dumps(payload)
+    async def get_json_body(self, key: str) -> Optional[bytes]:
+        # Like get_json, but returns the payload as JSON bytes ready to be sent as a response.
+        full_key = self._key(key)
+        local = get_local_cache()
+        if local is not None:
+            generation = local.generation
+            cached = local.get(full_key, "body")
+            if cached is not MISSING:
+                _count_lookups(self.prefix, l1=1)
+                return cached
         try:
-            self.redis.setex(self._key(key), ttl_seconds, value)
+            value = await self.redis.get(full_key)
+        except Exception:
+            value = None
+        if value is None:
+            _count_lookups(self.prefix, miss=1)
+            return None
+        try:
+            body = json_body(value)
+        except CodecError:
+            _count_lookups(self.prefix, miss=1)
+            return None
+        _count_lookups(self.prefix, hit=1)
+        if local is not None:
+            local.put(full_key, body, len(body), "body", generation=generation)
+        return body
+
+    async def set_json(self, key: str, payload: dict, ttl_seconds: int) -> None:
+        try:
+            await self.redis.setex(self._key(key), ttl_seconds, get_codec().encode(payload))
         except Exception:
             return
+        await self._written([self._key(key)])
 
-    def get(self, key: str) -> Optional[str]:
+    async def get(self, key: str) -> Optional[str]:
+        full_key = self._key(key)
+        local = get_local_cache()
+        if local is not None:
+            generation = local.generation
+            cached = local.get(full_key)
+            if cached is not MISSING:
+                _count_lookups(self.prefix, l1=1)
+                return cached
         try:
-            value = self.redis.get(self._key(key))
+            value = await self.redis.get(full_key)
         except Exception:
+            _count_lookups(self.prefix, miss=1)
             return None
+        _count_lookups(self.prefix, hit=int(value is not None), miss=int(value is None))
         if isinstance(value, bytes):
-            return value.decode("utf-8")
+            value = value.decode("utf-8")
+        if local is not None and value is not None:
+            local.put(full_key, value, len(value), generation=generation)
         return value
 
-    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+    async def set(self, key: str, value: str, ttl_seconds: int, only_if_absent: bool = False) -> None:
         try:
-            self.redis.setex(self._key(key), ttl_seconds, value)
+            if only_if_absent:
+                if not await self.redis.set(self._key(key), value, ex=ttl_seconds, nx=True):
+                    return
+            else:
+                await self.redis.setex(self._key(key), ttl_seconds, value)
         except Exception:
             return
+        await self._written([self._key(key)])
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+
+# orjson, msgpack and zstandard are optional; without them JSON falls back to the stdlib and only
+# the codecs that are installed can be configured.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Cached values are written as MAGIC + version + format + compression + body. The magic starts with
+# a NUL byte, which no JSON text can, so entries written before the envelope existed still decode as
+# plain JSON. Readers treat an envelope they cannot decode (newer version, codec not installed) as a
+# cache miss.
+ENVELOPE_MAGIC = b"\x00\xc5"
+ENVELOPE_VERSION = 1
+FORMAT_JSON = "json"
+FORMAT_MSGPACK = "msgpack"
+COMPRESSION_NONE = "none"
+COMPRESSION_ZLIB = "zlib"
+COMPRESSION_ZSTD = "zstd"
+_FORMAT_IDS = {FORMAT_JSON: 1, FORMAT_MSGPACK: 2}
+_COMPRESSION_IDS = {COMPRESSION_NONE: 0, COMPRESSION_ZLIB: 1, COMPRESSION_ZSTD: 2}
+_HEADER_SIZE = len(ENVELOPE_MAGIC) + 3
+
+
+class CodecError(ValueError):
+    pass
+
+
+def dumps_json(payload: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def loads_json(body: bytes | str) -> Any:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def _formats() -> Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    formats = {FORMAT_JSON: (dumps_json, loads_json)}
+    if msgpack is not None:
+        formats[FORMAT_MSGPACK] = (
+            lambda payload: msgpack.packb(payload, use_bin_type=True),
+            lambda body: msgpack.unpackb(body, raw=False, strict_map_key=False),
+        )
+    return formats
+
+
+def _compressions() -> Dict[str, Tuple[Callable[[bytes, int], bytes], Callable[[bytes], bytes]]]:
+    compressions = {
+        COMPRESSION_NONE: (lambda body, level: body, lambda body: body),
+        COMPRESSION_ZLIB: (lambda body, level: zlib.compress(body, level), zlib.decompress),
+    }
+    if zstandard is not None:
+        compressions[COMPRESSION_ZSTD] = (
+            lambda body, level: zstandard.ZstdCompressor(level=level).compress(body),
+            lambda body: zstandard.ZstdDecompressor().decompress(body),
+        )
+    return compressions
+
+
+_FORMATS = _formats()
+_COMPRESSIONS = _compressions()
+_FORMAT_NAMES = {value: key for key, value in _FORMAT_IDS.items()}
+_COMPRESSION_NAMES = {value: key for key, value in _COMPRESSION_IDS.items()}
+
+
+class Codec:
+    def __init__(
+        self, format: str = FORMAT_JSON, compression: str = COMPRESSION_NONE, level: int = 3, min_compress_bytes: int = 1024
+    ) -> None:
+        if format not in _FORMATS:
+            raise RuntimeError(f"Cache codec format {format!r} is unknown or its package is not installed")
+        if compression not in _COMPRESSIONS:
+            raise RuntimeError(f"Cache compression {compression!r} is unknown or its package is not installed")
+        self.format = format
+        self.compression = compression
+        self.level = level
+        self.min_compress_bytes = min_compress_bytes
+        self.name = format if compression == COMPRESSION_NONE else f"{format}+{compression}"
+
+    def encode(self, payload: Any) -> bytes:
+        body = _FORMATS[self.format][0](payload)
+        compression = self.compression
+        # Small values (single listing items, pointers) do not shrink enough to pay for compression.
+        if compression != COMPRESSION_NONE and len(body) >= self.min_compress_bytes:
+            body = _COMPRESSIONS[compression][0](body, self.level)
+        else:
+            compression = COMPRESSION_NONE
+        header = bytes((ENVELOPE_VERSION, _FORMAT_IDS[self.format], _COMPRESSION_IDS[compression]))
+        return ENVELOPE_MAGIC + header + body
+
+
+def decode(value: bytes | str) -> Any:
+    if isinstance(value, str) or not value.startswith(ENVELOPE_MAGIC):
+        # Plain JSON text written before the envelope.
+        try:
+            return loads_json(value)
+        except ValueError as exc:
+            raise CodecError(str(exc)) from exc
+    if len(value) < _HEADER_SIZE:
+        raise CodecError("truncated cache envelope")
+    version, format_id, compression_id = value[len(ENVELOPE_MAGIC) : _HEADER_SIZE]
+    format = _FORMAT_NAMES.get(format_id)
+    compression = _COMPRESSION_NAMES.get(compression_id)
+    if version != ENVELOPE_VERSION or format not in _FORMATS or compression not in _COMPRESSIONS:
+        raise CodecError(f"unsupported cache envelope version={version} format={format_id} compression={compression_id}")
+    try:
+        body = _COMPRESSIONS[compression][1](value[_HEADER_SIZE:])
+        return _FORMATS[format][1](body)
+    except Exception as exc:
+        raise CodecError(str(exc)) from exc
+
+
+def json_body(value: bytes | str) -> bytes:
+    # A cached value as a JSON response body. Envelopes in the JSON format are only decompressed;
+    # the body is served as stored instead of being parsed and re-serialized.
+    if isinstance(value, bytes) and value.startswith(ENVELOPE_MAGIC) and len(value) >= _HEADER_SIZE:
+        version, format_id, compression_id = value[len(ENVELOPE_MAGIC) : _HEADER_SIZE]
+        compression = _COMPRESSION_NAMES.get(compression_id)
+        if version == ENVELOPE_VERSION and _FORMAT_NAMES.get(format_id) == FORMAT_JSON and compression in _COMPRESSIONS:
+            try:
+                return _COMPRESSIONS[compression][1](value[_HEADER_SIZE:])
+            except Exception as exc:
+                raise CodecError(str(exc)) from exc
+    return dumps_json(decode(value))
+
+
+def parse_codec(spec: str, level: int = 3, min_compress_bytes: int = 1024) -> Codec:
+    format, _, compression = spec.partition("+")
+    return Codec(format, compression or COMPRESSION_NONE, level, min_compress_bytes)
+
+
+_codec: Optional[Codec] = None
+
+
+def get_codec() -> Codec:
+    global _codec
+    if _codec is None:
+        _codec = parse_codec(settings.cache_codec, settings.cache_compress_level, settings.cache_compress_min_bytes)
+    return _codec
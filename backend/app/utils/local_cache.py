@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.config import settings
+from app.utils.redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger("api")
+
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+# Rough per-entry overhead of the key, tuple and OrderedDict node on top of the payload bytes.
+ENTRY_OVERHEAD_BYTES = 200
+MISSING = object()
+# A Redis key can be read as the raw string (get), decoded (get_json) or as a JSON response body
+# (get_json_body); each is cached separately.
+KINDS = ("raw", "json", "body")
+
+
+class _Entry(NamedTuple):
+    value: Any
+    size: int
+    expires_at: float
+
+
+# Bounded LRU in front of Redis. Entries are sized by their Redis payload and evicted oldest-used
+# first once max_bytes is exceeded; every entry also expires after at most ttl_seconds, which bounds
+# staleness if an invalidation message is lost. Values are shared between callers and must be
+# treated as read-only.
+class LocalCache:
+    def __init__(self, max_bytes: int, ttl_seconds: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size = 0
+        self.generation = 0
+        self.counters: Counter = Counter()
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, kind: str = "raw") -> Any:
+        now = time.monotonic()
+        slot = (key, kind)
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is None:
+                self.counters["misses"] += 1
+                return MISSING
+            if entry.expires_at <= now:
+                self._drop(slot)
+                self.counters["expirations"] += 1
+                self.counters["misses"] += 1
+                return MISSING
+            self._entries.move_to_end(slot)
+            self.counters["hits"] += 1
+            return entry.value
+
+    def put(
+        self,
+        key: str,
+        value: Any,
+        size: int,
+        kind: str = "raw",
+        ttl_seconds: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        slot = (key, kind)
+        size += ENTRY_OVERHEAD_BYTES
+        ttl = min(self.ttl_seconds, ttl_seconds) if ttl_seconds is not None else self.ttl_seconds
+        with self._lock:
+            # A fill that raced an invalidation may hold the value that was just replaced.
+            if (generation is not None and generation != self.generation) or size > self.max_bytes or ttl <= 0:
+                return
+            self._drop(slot)
+            self._entries[slot] = _Entry(value, size, time.monotonic() + ttl)
+            self.size += size
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.counters["evictions"] += 1
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                for kind in KINDS:
+                    if self._drop((key, kind)):
+                        self.counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                **{name: self.counters[name] for name in ("hits", "misses", "evictions", "expirations", "invalidations")},
+            }
+
+    def _drop(self, key: Tuple[str, str]) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size -= entry.size
+        return True
+
+
+# Writes through RedisCache publish the changed keys; every process drops them from its own L1.
+# Messages from this process are skipped since the writer already dropped them locally. While the
+# subscription is down the L1 is flushed, as invalidations may have been missed.
+class InvalidationListener:
+    def __init__(self, cache: LocalCache) -> None:
+        self.cache = cache
+        self.origin = uuid.uuid4().hex
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+                self._thread.start()
+
+    def message(self, keys: List[str]) -> str:
+        return json.dumps({"origin": self.origin, "keys": keys})
+
+    def publish(self, keys: List[str]) -> None:
+        try:
+            get_redis().publish(INVALIDATION_CHANNEL, self.message(keys))
+        except Exception:
+            return
+
+    async def publish_async(self, keys: List[str]) -> None:
+        try:
+            await get_async_redis().publish(INVALIDATION_CHANNEL, self.message(keys))
+        except Exception:
+            return
+
+    def _run(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                self.cache.clear()
+                delay = 1.0
+                for message in pubsub.listen():
+                    self._handle(message)
+            except Exception as exc:
+                logger.warning("cache_invalidation_disconnected error=%s retry_in=%.0fs", exc, delay)
+                self.cache.clear()
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def _handle(self, message: dict) -> None:
+        if message.get("type") != "message":
+            return
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") != self.origin:
+            self.cache.invalidate(payload.get("keys", []))
+
+
+_local_cache: Optional[LocalCache] = None
+_listener: Optional[InvalidationListener] = None
+
+
+def get_local_cache() -> Optional[LocalCache]:
+    global _local_cache, _listener
+    if settings.l1_cache_mb <= 0:
+        return None
+    if _local_cache is None:
+        _local_cache = LocalCache(int(settings.l1_cache_mb * 1024 * 1024), settings.l1_cache_seconds)
+        _listener = InvalidationListener(_local_cache)
+    _listener.ensure_started()
+    return _local_cache
+
+
+def publish_invalidation(keys: List[str]) -> None:
+    if _listener is not None and keys:
+        _listener.publish(keys)
+
+
+async def publish_invalidation_async(keys: List[str]) -> None:
+    if _listener is not None and keys:
+        await _listener.publish_async(keys)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterator, Tuple
+
+from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily, Metric as MetricFamily
+from prometheus_client.utils import floatToGoString
+
+from app.config import settings
+from app.utils.redis_client import get_redis
+
+
+# Metrics are recorded into a per-process buffer and added to one Redis hash by a flush thread, so
+# the API and every RQ work horse, on any host, aggregate into the same series. The hash holds
+# counter values, histogram bucket counts (not cumulative) and sums; /metrics renders it.
+METRICS_KEY = "metrics"
+
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+WAIT_BUCKETS = (0.0, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclass(frozen=True)
+class Metric:
+    name: str
+    kind: str  # counter | histogram
+    help: str
+    labels: Tuple[str, ...] = ()
+    buckets: Tuple[float, ...] = ()
+
+
+METRICS: Dict[str, Metric] = {
+    metric.name: metric
+    for metric in (
+        Metric("job_stage_seconds", "histogram", "Analysis time per pipeline stage.", ("stage",), STAGE_BUCKETS),
+        Metric("job_seconds", "histogram", "Analysis job wall time.", ("function", "status"), STAGE_BUCKETS),
+        Metric("reddit_api_requests", "counter", "Reddit API requests by endpoint and HTTP status.", ("endpoint", "status")),
+        Metric("reddit_api_request_seconds", "histogram", "Reddit API request latency.", ("endpoint",), REQUEST_BUCKETS),
+        Metric("rate_limit_wait_seconds", "histogram", "Time spent waiting before a Reddit API request.", ("limiter",), WAIT_BUCKETS),
+        Metric("cache_requests", "counter", "RedisCache lookups by prefix and result (l1, hit, miss).", ("prefix", "result")),
+    )
+}
+_BOUNDS = {
+    name: [floatToGoString(bound) for bound in metric.buckets + (math.inf,)]
+    for name, metric in METRICS.items()
+}
+
+
+def _field(name: str, labels: Dict[str, str], suffix: str) -> str:
+    return json.dumps([name, [str(labels.get(label, "")) for label in METRICS[name].labels], suffix])
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        # A forked work horse starts empty: the parent's buffer is the parent's to flush.
+        self._lock = threading.Lock()
+        self._pending: Dict[str, float] = defaultdict(float)
+        self._thread: threading.Thread | None = None
+
+    def add(self, fields: Dict[str, float]) -> None:
+        with self._lock:
+            for field, amount in fields.items():
+                self._pending[field] += amount
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(settings.metrics_flush_seconds)
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+        if not pending:
+            return
+        try:
+            pipeline = get_redis().pipeline(transaction=False)
+            for field, amount in pending.items():
+                pipeline.hincrbyfloat(METRICS_KEY, field, amount)
+            pipeline.execute()
+        except Exception:
+            # Keep the deltas for the next flush; the buffer is bounded by the number of series.
+            with self._lock:
+                for field, amount in pending.items():
+                    self._pending[field] += amount
+
+
+_recorder = _Recorder()
+
+
+def inc(name: str, amount: float = 1.0, **labels: str) -> None:
+    if settings.metrics_enabled:
+        _recorder.add({_field(name, labels, "value"): amount})
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    if not settings.metrics_enabled:
+        return
+    metric = METRICS[name]
+    bucket = _BOUNDS[name][bisect_left(metric.buckets, value)]
+    _recorder.add({_field(name, labels, bucket): 1, _field(name, labels, "sum"): value})
+
+
+def flush() -> None:
+    # RQ work horses exit without running threads or atexit hooks, so jobs flush before returning.
+    _recorder.flush()
+
+
+class StageTimer:
+    # Observes the time since the previous mark (or since creation) under the given stage.
+    def __init__(self, name: str = "job_stage_seconds") -> None:
+        self.name = name
+        self._start = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        observe(self.name, now - self._start, stage=stage)
+        self._start = now
+
+
+class RedisMetricsCollector:
+    # Renders the shared hash as Prometheus families; register it on a per-scrape registry.
+    def collect(self) -> Iterator[MetricFamily]:
+        series: Dict[str, Dict[Tuple[str, ...], Dict[str, float]]] = defaultdict(lambda: defaultdict(dict))
+        for field, value in get_redis().hgetall(METRICS_KEY).items():
+            try:
+                name, labels, suffix = json.loads(field)
+            except ValueError:
+                continue
+            if name in METRICS and len(labels) == len(METRICS[name].labels):
+                series[name][tuple(labels)][suffix] = float(value)
+
+        for name, metric in METRICS.items():
+            if metric.kind == "counter":
+                family = CounterMetricFamily(name, metric.help, labels=metric.labels)
+                for labels, values in sorted(series[name].items()):
+                    family.add_metric(labels, values.get("value", 0.0))
+            else:
+                family = HistogramMetricFamily(name, metric.help, labels=metric.labels)
+                for labels, values in sorted(series[name].items()):
+                    cumulative = 0.0
+                    buckets = []
+                    for bound in _BOUNDS[name]:
+                        cumulative += values.get(bound, 0.0)
+                        buckets.append((bound, cumulative))
+                    family.add_metric(labels, buckets, values.get("sum", 0.0))
+            yield family
@@ -1,37 +1,82 @@
+import asyncio
 import time
 
 from app.config import settings
+from app.utils import metrics
 from app.utils.redis_client import get_redis
 
 
+# Token bucket shared by every worker. Each call reserves one token, letting the balance go
+# negative, and returns how long the caller must wait for its reservation to mature. Callers are
+# therefore served in arrival order at the refill rate instead of waking together at a window edge.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + tonumber(clock[2]) / 1000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ttl)
+if tokens >= 0 then
+  return 0
+end
+return math.ceil(-tokens / rate)
+"""
+
+
 class RateLimiter:
-    def __init__(self, key: str, limit_per_minute: int | None = None) -> None:
+    def __init__(self, key: str, limit_per_minute: int | None = None, burst: int | None = None) -> None:
         self.key = key
         self.limit = limit_per_minute or settings.rate_limit_qpm
+        self.burst = burst or settings.rate_limit_burst
         self.redis = get_redis()
+        self._script = self.redis.register_script(TOKEN_BUCKET_LUA)
 
-    def wait_for_slot(self) -> None:
+    def reserve(self) -> float:
+        rate_per_ms = self.limit / 60000
+        ttl_ms = int(max(60000, self.burst / rate_per_ms * 2))
         try:
-            current = self.redis.incr(self.key)
-            if current == 1:
-                self.redis.expire(self.key, 60)
-            if current > self.limit:
-                ttl = self.redis.ttl(self.key)
-                sleep_for = max(ttl, 1)
-                time.sleep(sleep_for)
+            wait_ms = self._script(keys=[self.key], args=[rate_per_ms, self.burst, ttl_ms])
         except Exception:
-            return
+            return 0.0
+        return max(float(wait_ms or 0), 0.0) / 1000
 
+    def wait_for_slot(self) -> float:
+        wait = self.reserve()
+        metrics.observe("rate_limit_wait_seconds", wait, limiter=self.key)
+        if wait:
+            time.sleep(wait)
+        return wait
 
-def backoff_from_headers(headers: dict) -> None:
+    async def acquire(self) -> float:
+        wait = await asyncio.to_thread(self.reserve)
+        metrics.observe("rate_limit_wait_seconds", wait, limiter=self.key)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+def backoff_seconds_from_headers(headers: dict) -> float:
     remaining = headers.get("X-Ratelimit-Remaining")
     reset = headers.get("X-Ratelimit-Reset")
     if remaining is None or reset is None:
-        return
+        return 0.0
     try:
         remaining_val = float(remaining)
         reset_val = float(reset)
     except ValueError:
-        return
+        return 0.0
     if remaining_val <= 1:
-        time.sleep(max(reset_val, 1))
+        return max(reset_val, 1)
+    return 0.0
+
+
+def backoff_from_headers(headers: dict) -> None:
+    sleep_for = backoff_seconds_from_headers(headers)
+    if sleep_for:
+        metrics.observe("rate_limit_wait_seconds", sleep_for, limiter="headers")
+        time.sleep(sleep_for)
@@ -1,9 +1,11 @@
 from redis import Redis
+from redis.asyncio import BlockingConnectionPool, Redis as AsyncRedis
 
 from app.config import settings
 
 
 _redis_client: Redis | None = None
+_async_redis_client: AsyncRedis | None = None
 
 
 def get_redis() -> Redis:
@@ -11,3 +13,16 @@ def get_redis() -> Redis:
     if _redis_client is None:
         _redis_client = Redis.from_url(settings.redis_url)
     return _redis_client
+
+
+def get_async_redis() -> AsyncRedis:
+    # One pool per process; the API serves every request from a single event loop. The pool is
+    # bounded and blocking: past REDIS_MAX_CONNECTIONS a command waits up to REDIS_POOL_TIMEOUT
+    # for a free connection instead of failing with MaxConnectionsError.
+    global _async_redis_client
+    if _async_redis_client is None:
+        pool = BlockingConnectionPool.from_url(
+            settings.redis_url, max_connections=settings.redis_max_connections, timeout=settings.redis_pool_timeout
+        )
+        _async_redis_client = AsyncRedis(connection_pool=pool)
+    return _async_redis_client
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional
+
+from app.utils.redis_client import get_redis
+
+
+# Every job state change is published on one channel; each API process holds a single subscription
+# and fans events out to its own SSE watchers by job id.
+JOB_EVENTS_CHANNEL = "jobs:events"
+TERMINAL_STATUSES = ("finished", "failed", "stopped", "canceled")
+
+
+def compare_url(usernames: List[str]) -> str:
+    return f"/api/compare/reddit?usernames={','.join(usernames)}"
+
+
+def result_url(result: Any) -> Optional[str]:
+    if not isinstance(result, dict):
+        return None
+    if result.get("snapshot_id"):
+        return f"/api/report/reddit/{result.get('username')}?snapshot={result['snapshot_id']}"
+    if result.get("usernames"):
+        return compare_url(result["usernames"])
+    return None
+
+
+def job_event(job_id: str, status: str, progress: Optional[float] = None, url: Optional[str] = None) -> Dict[str, Any]:
+    return {"job_id": job_id, "status": status, "result_url": url, "progress": progress}
+
+
+def publish_job_event(job_id: str, status: str, progress: Optional[float] = None, url: Optional[str] = None) -> None:
+    # Best effort: watchers re-read the job hash periodically, so a lost event only delays them.
+    try:
+        get_redis().publish(JOB_EVENTS_CHANNEL, json.dumps(job_event(job_id, status, progress, url)))
+    except Exception:
+        return
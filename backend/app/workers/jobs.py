@@ -2,111 +2,226 @@ from __future__ import annotations
 
 import logging
 import time
-from typing import Dict
+from typing import Callable, Dict, List, Optional
 
 from rq import get_current_job
+from rq.job import Job, JobStatus
 
 from sqlalchemy import select
 
-from app.collectors.reddit import collect_user
+from app.collectors.reddit import RedditClient, collect_user_pages, parse_username
 from app.config import settings
 from app.features import compute_features
+from app.features.history import compute_history_features
+from app.features.item_cache import cached_batch_pages
+from app.features.repetition import TextFingerprints, text_fingerprints
+from app.scoring.trends import trend_values
 from app.scoring.rules_v1 import score
 from app.store.db import get_session
-from app.store.models import Account, FeatureSet, Item, ItemKind, Platform, Score, Snapshot
+from app.store.fingerprints import FingerprintIndex
+from app.store.items import load_snapshot_items, store_snapshot_items
+from app.store.models import Account, FeatureSet, Platform, Score, Snapshot
+from app.store.trends import TrendTracker
+from app.utils import metrics
+from app.utils.cache import REPORT_CACHE_PREFIX, REPORT_CACHE_TTL_SECONDS, RedisCache, latest_report_key
+from app.workers.events import publish_job_event
+from app.workers.singleflight import release_inflight
 
 logger = logging.getLogger("worker")
 
 
-def analyze_reddit_user(username_or_url: str) -> Dict[str, object]:
-    job = get_current_job()
-    start = time.time()
+def _load_previous_items(username: str) -> List[dict]:
+    with get_session() as session:
+        snapshot_id = session.execute(
+            select(Snapshot.id)
+            .join(Account, Snapshot.account_id == Account.id)
+            .where(Account.platform == Platform.reddit, Account.handle == username)
+            .order_by(Snapshot.collected_at.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+        if snapshot_id is None:
+            return []
+        return load_snapshot_items(session, snapshot_id)
+
+
+def _match_history(username: str, fingerprints: TextFingerprints) -> List[bool]:
+    with get_session() as session:
+        account_id = session.execute(
+            select(Account.id).where(Account.platform == Platform.reddit, Account.handle == username)
+        ).scalar_one_or_none()
+        if account_id is None:
+            return [False] * len(fingerprints.items)
+        item_ids = [i.get("item_id") or "" for i in fingerprints.items]
+        return FingerprintIndex(session, account_id).match(item_ids, fingerprints.signatures)
+
+
+def _analyze(
+    username_or_url: str,
+    incremental: Optional[bool],
+    set_progress: Callable[[float], None],
+    client: Optional[RedditClient] = None,
+    max_items: Optional[int] = None,
+) -> Dict[str, object]:
+    if incremental is None:
+        incremental = settings.reddit_incremental
+    stages = metrics.StageTimer()
+    previous_items = _load_previous_items(parse_username(username_or_url)) if incremental else []
+    # Per-item tokens, shingles and signatures are derived while the next page is being fetched.
+    profile, pages = collect_user_pages(username_or_url, max_items or settings.reddit_max_items, previous_items, client)
+    batch = cached_batch_pages(pages)
+    items = batch.items
+    stages.mark("collect")
+    set_progress(0.3)
+    features = compute_features(batch)
+    fingerprints = text_fingerprints(batch)
+    matched = _match_history(profile.username, fingerprints)
+    features["history"] = compute_history_features(fingerprints.items, matched)
+    stages.mark("features")
+    set_progress(0.6)
+    score_payload, _ = score(features, profile.__dict__, items, batch)
+    stages.mark("score")
+    set_progress(0.8)
+
+    post_count = int(batch.is_post.sum())
+    comment_count = int(batch.is_comment.sum())
+    span_days = int(features.get("timing", {}).get("span_days", 0) or 0)
+
+    with get_session() as session:
+        account = session.execute(
+            select(Account).where(Account.platform == Platform.reddit, Account.handle == profile.username)
+        ).scalar_one_or_none()
+        if account is None:
+            account = Account(platform=Platform.reddit, handle=profile.username)
+            session.add(account)
+            session.flush()
+
+        snapshot = Snapshot(
+            account_id=account.id,
+            post_count=post_count,
+            comment_count=comment_count,
+            data_coverage_days=span_days,
+            collector_version=settings.collector_version,
+        )
+        session.add(snapshot)
+        session.flush()
+
+        store_snapshot_items(session, Platform.reddit, snapshot.id, items)
+        FingerprintIndex(session, account.id).add(
+            [i.get("item_id") or "" for i in fingerprints.items],
+            [i.get("created_utc") for i in fingerprints.items],
+            fingerprints.signatures,
+        )
+
+        session.add(FeatureSet(snapshot_id=snapshot.id, json=features))
+        session.add(
+            Score(
+                snapshot_id=snapshot.id,
+                automation_score=score_payload["automation_score"],
+                coordination_score=score_payload["coordination_score"],
+                confidence=score_payload["confidence"],
+                reasons=score_payload["reasons"],
+                explanations=score_payload["explanations"],
+            )
+        )
+
+        shifts = TrendTracker(session, account.id).observe(snapshot.id, trend_values(features, score_payload))
+        if shifts:
+            logger.info(
+                "trend_shift username=%s snapshot_id=%s metrics=%s",
+                profile.username,
+                snapshot.id,
+                ",".join(shift["metric"] for shift in shifts),
+            )
 
+        session.flush()
+        snapshot_id = snapshot.id
+
+    RedisCache(prefix=REPORT_CACHE_PREFIX).set(
+        latest_report_key(profile.username), str(snapshot_id), ttl_seconds=REPORT_CACHE_TTL_SECONDS
+    )
+    stages.mark("persist")
+    set_progress(1.0)
+
+    return {
+        "snapshot_id": snapshot_id,
+        "username": profile.username,
+        "scores": score_payload,
+        "items": len(items),
+        "previous_items": len(previous_items),
+    }
+
+
+def _progress_setter(job: Optional[Job], low: float = 0.0, high: float = 1.0) -> Callable[[float], None]:
     def set_progress(value: float) -> None:
         if job is None:
             return
-        job.meta["progress"] = value
+        job.meta["progress"] = low + (high - low) * value
         job.save_meta()
+        publish_job_event(job.id, JobStatus.STARTED.value, job.meta["progress"])
+
+    return set_progress
+
+
+def analyze_reddit_user(username_or_url: str, incremental: Optional[bool] = None) -> Dict[str, object]:
+    job = get_current_job()
+    start = time.time()
+    set_progress = _progress_setter(job)
 
     logger.info("job_start username=%s job_id=%s", username_or_url, job.id if job else "n/a")
     set_progress(0.1)
     try:
-        profile, items = collect_user(username_or_url, settings.reddit_max_items)
-        set_progress(0.3)
-        features = compute_features(items)
-        set_progress(0.6)
-        score_payload, _ = score(features, profile.__dict__, items)
-        set_progress(0.8)
-
-        post_count = len([i for i in items if i.get("kind") == "post"])
-        comment_count = len([i for i in items if i.get("kind") == "comment"])
-        span_days = int(features.get("timing", {}).get("span_days", 0) or 0)
-
-        with get_session() as session:
-            account = session.execute(
-                select(Account).where(Account.platform == Platform.reddit, Account.handle == profile.username)
-            ).scalar_one_or_none()
-            if account is None:
-                account = Account(platform=Platform.reddit, handle=profile.username)
-                session.add(account)
-                session.flush()
-
-            snapshot = Snapshot(
-                account_id=account.id,
-                post_count=post_count,
-                comment_count=comment_count,
-                data_coverage_days=span_days,
-                collector_version=settings.collector_version,
-            )
-            session.add(snapshot)
-            session.flush()
-
-            for item in items:
-                session.add(
-                    Item(
-                        snapshot_id=snapshot.id,
-                        kind=ItemKind.post if item.get("kind") == "post" else ItemKind.comment,
-                        item_id=item.get("item_id") or "",
-                        created_utc=item.get("created_utc"),
-                        subreddit=item.get("subreddit"),
-                        permalink=item.get("permalink"),
-                        body_text=item.get("body_text"),
-                        url=item.get("url"),
-                        link_id=item.get("link_id"),
-                        parent_id=item.get("parent_id"),
-                    )
-                )
-
-            session.add(FeatureSet(snapshot_id=snapshot.id, json=features))
-            session.add(
-                Score(
-                    snapshot_id=snapshot.id,
-                    automation_score=score_payload["automation_score"],
-                    coordination_score=score_payload["coordination_score"],
-                    confidence=score_payload["confidence"],
-                    reasons=score_payload["reasons"],
-                    explanations=score_payload["explanations"],
-                )
-            )
+        result = _analyze(username_or_url, incremental, set_progress)
+        duration = time.time() - start
+        metrics.observe("job_seconds", duration, function="analyze_reddit_user", status="finished")
+        logger.info(
+            "job_finish username=%s job_id=%s duration=%.2fs items=%s previous_items=%s",
+            result["username"],
+            job.id if job else "n/a",
+            duration,
+            result.pop("items"),
+            result.pop("previous_items"),
+        )
+        return result
+    except Exception:
+        duration = time.time() - start
+        metrics.observe("job_seconds", duration, function="analyze_reddit_user", status="failed")
+        logger.exception("job_error username=%s job_id=%s duration=%.2fs", username_or_url, job.id if job else "n/a", duration)
+        raise
+    finally:
+        if job is not None:
+            release_inflight(parse_username(username_or_url), job.id)
+        metrics.flush()
 
-            session.flush()
-            set_progress(1.0)
 
-            duration = time.time() - start
-            logger.info(
-                "job_finish username=%s job_id=%s duration=%.2fs items=%s",
-                profile.username,
-                job.id if job else "n/a",
-                duration,
-                len(items),
-            )
+def analyze_reddit_users(usernames: List[str], incremental: Optional[bool] = None) -> Dict[str, object]:
+    job = get_current_job()
+    start = time.time()
+    client = RedditClient()
+    results: List[Dict[str, object]] = []
 
-            return {
-                "snapshot_id": snapshot.id,
-                "username": profile.username,
-                "scores": score_payload,
-            }
+    logger.info("job_start usernames=%s job_id=%s", ",".join(usernames), job.id if job else "n/a")
+    try:
+        for index, username in enumerate(usernames):
+            set_progress = _progress_setter(job, index / len(usernames), (index + 1) / len(usernames))
+            result = _analyze(username, incremental, set_progress, client)
+            result.pop("items")
+            result.pop("previous_items")
+            results.append(result)
+        duration = time.time() - start
+        metrics.observe("job_seconds", duration, function="analyze_reddit_users", status="finished")
+        logger.info(
+            "job_finish usernames=%s job_id=%s duration=%.2fs",
+            ",".join(usernames),
+            job.id if job else "n/a",
+            duration,
+        )
+        return {"usernames": usernames, "results": results}
     except Exception:
         duration = time.time() - start
-        logger.exception("job_error username=%s job_id=%s duration=%.2fs", username_or_url, job.id if job else "n/a", duration)
+        metrics.observe("job_seconds", duration, function="analyze_reddit_users", status="failed")
+        logger.exception(
+            "job_error usernames=%s job_id=%s duration=%.2fs", ",".join(usernames), job.id if job else "n/a", duration
+        )
         raise
+    finally:
+        metrics.flush()
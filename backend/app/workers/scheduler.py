@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from rq import Queue
+from rq.job import Callback, Job, JobStatus
+
+from app.config import settings
+from app.utils.redis_client import get_redis
+from app.workers.events import publish_job_event, result_url
+from app.workers.queue import get_queue
+
+logger = logging.getLogger("worker")
+
+LANE_INTERACTIVE = "interactive"
+LANE_REFRESH = "refresh"
+LANE_OFFLINE = "offline"
+LANES = (LANE_INTERACTIVE, LANE_REFRESH, LANE_OFFLINE)
+# Share of the API-call budget each lane may fill; refresh leaves headroom for interactive work.
+LANE_BUDGET_SHARE = {LANE_INTERACTIVE: 1.0, LANE_REFRESH: 0.6, LANE_OFFLINE: 1.0}
+
+INFLIGHT_KEY = "sched:inflight"
+INFLIGHT_EXPIRY_KEY = "sched:inflight:expiry"
+INFLIGHT_TTL_SECONDS = 900
+STATS_SAMPLES = 1000
+
+# Pops the head of a lane's pending list if the calls already committed to running jobs plus
+# the head job's estimated cost fit in the lane's budget. Entries are "job_id|cost"; entries of
+# jobs that outlived INFLIGHT_TTL_SECONDS (crashed workers) are dropped from the ledger first.
+_ADMIT_LUA = """
+local now = tonumber(ARGV[1])
+local budget = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+for _, job_id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)) do
+  redis.call('HDEL', KEYS[2], job_id)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+local head = redis.call('LINDEX', KEYS[1], 0)
+if not head then
+  return false
+end
+local sep = string.find(head, '|', 1, true)
+local job_id = string.sub(head, 1, sep - 1)
+local cost = tonumber(string.sub(head, sep + 1))
+if cost > 0 then
+  local committed = 0
+  for _, value in ipairs(redis.call('HVALS', KEYS[2])) do
+    committed = committed + tonumber(value)
+  end
+  if committed > 0 and committed + cost > budget then
+    return false
+  end
+end
+redis.call('LPOP', KEYS[1])
+redis.call('HSET', KEYS[2], job_id, cost)
+redis.call('ZADD', KEYS[3], now + ttl, job_id)
+return job_id
+"""
+
+
+def pending_key(lane: str) -> str:
+    return f"sched:pending:{lane}"
+
+
+def stats_key(lane: str, metric: str) -> str:
+    return f"sched:stats:{lane}:{metric}"
+
+
+def estimate_api_calls(max_items: Optional[int] = None, incremental: bool = False) -> int:
+    if incremental:
+        return 3
+    max_items = max_items or settings.reddit_max_items
+    submission_limit = max_items // 2
+    comment_limit = max_items - submission_limit
+    return 1 + math.ceil(submission_limit / 100) + math.ceil(comment_limit / 100)
+
+
+def api_budget() -> int:
+    return int(settings.rate_limit_qpm * settings.scheduler_horizon_minutes)
+
+
+def submit(
+    lane: str,
+    func: Union[Callable, str],
+    *args: Any,
+    cost: int = 0,
+    job_id: Optional[str] = None,
+    **kwargs: Any,
+) -> Job:
+    if lane not in LANES:
+        raise ValueError(f"Unknown lane {lane}")
+    redis = get_redis()
+    queue = get_queue(lane)
+    job = queue.create_job(
+        func,
+        args=args,
+        kwargs=kwargs,
+        job_id=job_id,
+        meta={"lane": lane, "cost": cost, "submitted_at": time.time()},
+        status=JobStatus.DEFERRED,
+        on_success=Callback(on_job_success),
+        on_failure=Callback(on_job_failure),
+    )
+    job.save()
+    redis.rpush(pending_key(lane), f"{job.id}|{cost}")
+    dispatch()
+    return job
+
+
+def dispatch() -> List[str]:
+    redis = get_redis()
+    admit = redis.register_script(_ADMIT_LUA)
+    budget = api_budget()
+    dispatched: List[str] = []
+    for lane in LANES:
+        queue: Optional[Queue] = None
+        while True:
+            job_id = admit(
+                keys=[pending_key(lane), INFLIGHT_KEY, INFLIGHT_EXPIRY_KEY],
+                args=[time.time(), budget * LANE_BUDGET_SHARE[lane], INFLIGHT_TTL_SECONDS],
+            )
+            if not job_id:
+                break
+            job_id = job_id.decode("utf-8") if isinstance(job_id, bytes) else str(job_id)
+            queue = queue or get_queue(lane)
+            job: Optional[Job] = None
+            try:
+                job = Job.fetch(job_id, connection=redis)
+                # enqueue_job skips DEFERRED jobs. The status changes in memory only (the pipeline is
+                # never executed) and enqueue_job saves it in the transaction that pushes the job.
+                job.set_status(JobStatus.QUEUED, pipeline=redis.pipeline())
+                queue.enqueue_job(job)
+            except Exception as exc:
+                # The entry is already popped: fail the job so watchers stop and singleflight
+                # lets the next request replace it, instead of leaving it DEFERRED in no queue.
+                logger.warning("dispatch_error job_id=%s lane=%s error=%s", job_id, lane, exc)
+                release(job_id)
+                _fail(job)
+                publish_job_event(job_id, JobStatus.FAILED.value)
+                continue
+            publish_job_event(job_id, JobStatus.QUEUED.value)
+            dispatched.append(job_id)
+    return dispatched
+
+
+def _fail(job: Optional[Job]) -> None:
+    if job is None:
+        return
+    try:
+        job.set_status(JobStatus.FAILED)
+    except Exception:
+        pass
+
+
+def run_dispatcher(interval: float) -> None:
+    # dispatch() otherwise only runs on submit and when a job ends; after a worker crash the ledger
+    # entry expires and this tick admits what was waiting behind it without new traffic.
+    while True:
+        try:
+            dispatch()
+        except Exception as exc:
+            logger.warning("dispatch_error error=%s", exc)
+        time.sleep(interval)
+
+
+def release(job_id: str) -> None:
+    redis = get_redis()
+    redis.hdel(INFLIGHT_KEY, job_id)
+    redis.zrem(INFLIGHT_EXPIRY_KEY, job_id)
+
+
+def _record(job: Job) -> None:
+    lane = job.meta.get("lane")
+    if lane not in LANES:
+        return
+    redis = get_redis()
+    finished = time.time()
+    started = job.started_at.timestamp() if job.started_at else finished
+    submitted = job.meta.get("submitted_at") or started
+    pipeline = redis.pipeline()
+    for metric, value in (("wait", started - submitted), ("run", finished - started)):
+        pipeline.lpush(stats_key(lane, metric), f"{max(value, 0.0):.3f}")
+        pipeline.ltrim(stats_key(lane, metric), 0, STATS_SAMPLES - 1)
+    pipeline.execute()
+
+
+def _finish(job: Job) -> None:
+    release(job.id)
+    _record(job)
+    dispatch()
+
+
+def on_job_success(job: Job, connection: Any, result: Any, *args: Any, **kwargs: Any) -> None:
+    publish_job_event(job.id, JobStatus.FINISHED.value, 1.0, result_url(result))
+    _finish(job)
+
+
+def on_job_failure(job: Job, connection: Any, *exc_info: Any) -> None:
+    publish_job_event(job.id, JobStatus.FAILED.value, job.meta.get("progress"))
+    _finish(job)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct)))]
+
+
+def lane_stats() -> Dict[str, dict]:
+    redis = get_redis()
+    committed = sum(float(cost) for cost in redis.hvals(INFLIGHT_KEY))
+    stats: Dict[str, dict] = {}
+    for lane in LANES:
+        lane_stats: Dict[str, Any] = {
+            "pending": redis.llen(pending_key(lane)),
+            "queued": get_queue(lane).count,
+        }
+        for metric in ("wait", "run"):
+            samples = [float(value) for value in redis.lrange(stats_key(lane, metric), 0, -1)]
+            lane_stats[f"{metric}_p50"] = _percentile(samples, 0.5)
+            lane_stats[f"{metric}_p95"] = _percentile(samples, 0.95)
+            lane_stats[f"{metric}_samples"] = len(samples)
+        stats[lane] = lane_stats
+    return {"budget": api_budget(), "committed_calls": committed, "lanes": stats}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Admit pending jobs into their lanes periodically.")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between dispatch passes.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    run_dispatcher(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any, Callable, Tuple
+
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+
+from app.utils.redis_client import get_redis
+
+
+INFLIGHT_TTL_SECONDS = 900
+_TERMINAL_STATUSES = {JobStatus.FINISHED, JobStatus.FAILED, JobStatus.STOPPED, JobStatus.CANCELED}
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def inflight_key(username: str) -> str:
+    return f"inflight:reddit:{username.lower()}"
+
+
+def _decode(value: Any) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def enqueue_once(username: str, submit: Callable[[str], Any]) -> Tuple[str, bool]:
+    redis = get_redis()
+    key = inflight_key(username)
+    for _ in range(2):
+        job_id = str(uuid.uuid4())
+        if redis.set(key, job_id, nx=True, ex=INFLIGHT_TTL_SECONDS):
+            try:
+                submit(job_id)
+            except Exception:
+                release_inflight(username, job_id)
+                raise
+            return job_id, False
+
+        existing = redis.get(key)
+        if existing is None:
+            continue
+        existing_id = _decode(existing)
+        try:
+            status = Job.fetch(existing_id, connection=redis).get_status()
+        except NoSuchJobError:
+            # The owner may not have finished enqueueing yet; the TTL clears abandoned keys.
+            return existing_id, True
+        if status not in _TERMINAL_STATUSES:
+            return existing_id, True
+        release_inflight(username, existing_id)
+    raise RuntimeError(f"Could not acquire in-flight slot for {username}")
+
+
+def release_inflight(username: str, job_id: str) -> None:
+    try:
+        get_redis().eval(_RELEASE_LUA, 1, inflight_key(username), job_id)
+    except Exception:
+        return
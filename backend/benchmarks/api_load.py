@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+
+ENDPOINTS = ("report", "history", "job")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct)))] if ordered else 0.0
+
+
+def create_app():
+    # The API plus the previous sync implementations of the three read routes under /legacy, so both
+    # run in the same server process. Used as `uvicorn benchmarks.api_load:create_app --factory`.
+    from fastapi import HTTPException, Response
+    from rq.job import Job
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+
+    from app.api.routes import _build_report
+    from app.main import app
+    from app.store.db import get_session
+    from app.store.models import Account, Platform, Score, Snapshot
+    from app.utils.cache import REPORT_CACHE_PREFIX, REPORT_CACHE_TTL_SECONDS, RedisCache, latest_report_key, report_cache_key
+    from app.utils.codec import dumps_json
+    from app.utils.redis_client import get_redis
+
+    def legacy_report(username: str, snapshot: str = "latest"):
+        cache = RedisCache(prefix=REPORT_CACHE_PREFIX)
+        snapshot_id = cache.get(latest_report_key(username)) if snapshot == "latest" else snapshot
+        if snapshot_id:
+            cached = cache.get_json(report_cache_key(username, snapshot_id))
+            if cached:
+                return Response(content=dumps_json(cached), media_type="application/json")
+        with get_session() as session:
+            account = session.execute(
+                select(Account).where(Account.platform == Platform.reddit, Account.handle == username)
+            ).scalar_one_or_none()
+            if not account:
+                raise HTTPException(status_code=404, detail="Account not found")
+            query = (
+                select(Snapshot)
+                .where(Snapshot.account_id == account.id)
+                .options(selectinload(Snapshot.scores), selectinload(Snapshot.features))
+                .order_by(Snapshot.collected_at.desc())
+                .limit(1)
+            )
+            snapshot_obj = session.execute(query).scalar_one_or_none()
+            cache.set(latest_report_key(username), str(snapshot_obj.id), ttl_seconds=REPORT_CACHE_TTL_SECONDS)
+            report = _build_report(snapshot_obj)
+            cache.set_json(report_cache_key(username, snapshot_obj.id), report.model_dump(), ttl_seconds=REPORT_CACHE_TTL_SECONDS)
+            return report
+
+    def legacy_history(username: str, limit: int = 50):
+        # First page of the history route, same queries.
+        with get_session() as session:
+            account_id = session.execute(
+                select(Account.id).where(Account.platform == Platform.reddit, Account.handle == username)
+            ).scalar_one_or_none()
+            if account_id is None:
+                raise HTTPException(status_code=404, detail="Account not found")
+            rows = session.execute(
+                select(Snapshot.id, Snapshot.collected_at, Score.automation_score, Score.coordination_score, Score.confidence)
+                .outerjoin(Score, Score.snapshot_id == Snapshot.id)
+                .where(Snapshot.account_id == account_id)
+                .order_by(Snapshot.collected_at.desc(), Snapshot.id.desc())
+                .limit(limit + 1)
+            ).all()
+            return {"username": username, "snapshots": [row._asdict() for row in rows[:limit]]}
+
+    def legacy_job(job_id: str):
+        try:
+            job = Job.fetch(job_id, connection=get_redis())
+        except Exception:
+            raise HTTPException(status_code=404, detail="Job not found")
+        status = job.get_status()
+        return {"job_id": job_id, "status": status, "progress": job.meta.get("progress")}
+
+    app.add_api_route("/legacy/report/reddit/{username}", legacy_report)
+    app.add_api_route("/legacy/history/reddit/{username}", legacy_history)
+    app.add_api_route("/legacy/jobs/{job_id}", legacy_job)
+    return app
+
+
+def _seed(accounts: int, snapshots: int, jobs: int) -> List[str]:
+    from datetime import datetime, timedelta
+
+    from rq.job import Job, JobStatus
+    from sqlalchemy import select
+
+    from app.features import compute_features
+    from app.scoring.rules_v1 import score
+    from app.store.db import get_session, init_db
+    from app.store.models import Account, FeatureSet, Platform, Score, Snapshot
+    from app.utils.redis_client import get_redis
+    from benchmarks.synthetic import make_items
+
+    init_db()
+    with get_session() as session:
+        for index in range(accounts):
+            username = f"bench_load_{index}"
+            if session.execute(select(Account.id).where(Account.handle == username)).scalar_one_or_none():
+                continue
+            account = Account(platform=Platform.reddit, handle=username)
+            session.add(account)
+            session.flush()
+            items = make_items(200, seed=index)
+            features = compute_features(items)
+            payload, _ = score(features, {}, items)
+            for step in range(snapshots):
+                snapshot = Snapshot(
+                    account_id=account.id,
+                    collected_at=datetime(2026, 1, 1) + timedelta(hours=step),
+                    post_count=50,
+                    comment_count=150,
+                    collector_version="bench",
+                )
+                session.add(snapshot)
+                session.flush()
+                session.add(FeatureSet(snapshot_id=snapshot.id, json=features))
+                session.add(
+                    Score(
+                        snapshot_id=snapshot.id,
+                        automation_score=payload["automation_score"],
+                        coordination_score=payload["coordination_score"],
+                        confidence=payload["confidence"],
+                        reasons=payload["reasons"],
+                        explanations=payload["explanations"],
+                    )
+                )
+    # Jobs that are never run: status polls of queued jobs.
+    job_ids = []
+    for index in range(jobs):
+        job = Job.create("builtins.len", args=([index],), connection=get_redis(), status=JobStatus.QUEUED)
+        job.meta["progress"] = 0.0
+        job.save()
+        job_ids.append(job.id)
+    return job_ids
+
+
+async def _load(
+    base_url: str, prefix: str, endpoints: List[str], clients: int, duration: float, accounts: int, job_ids: List[str]
+) -> Tuple[Dict[str, list], Counter]:
+    import httpx
+
+    paths = {
+        "report": lambda rng: f"{prefix}/report/reddit/bench_load_{rng.randrange(accounts)}",
+        "history": lambda rng: f"{prefix}/history/reddit/bench_load_{rng.randrange(accounts)}?limit=20",
+        "job": lambda rng: f"{prefix}/jobs/{rng.choice(job_ids)}",
+    }
+    latencies: Dict[str, list] = {endpoint: [] for endpoint in endpoints}
+    errors: Counter = Counter()
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def run_client(seed: int) -> None:
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                endpoint = endpoints[rng.randrange(len(endpoints))]
+                start = time.perf_counter()
+                try:
+                    response = await client.get(paths[endpoint](rng))
+                    failed = response.status_code != 200
+                except httpx.HTTPError:
+                    failed = True
+                if failed:
+                    errors[endpoint] += 1
+                latencies[endpoint].append(time.perf_counter() - start)
+
+        await asyncio.gather(*(run_client(seed) for seed in range(clients)))
+    return latencies, errors
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Requests/sec of the sync vs async read routes under concurrent clients.")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per variant.")
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--snapshots", type=int, default=30)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Mix of report, history and job polls.")
+    parser.add_argument("--base-url", default=None, help="Use an already running `create_app` server instead of starting one.")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/api_load.db"
+    job_ids = _seed(args.accounts, args.snapshots, args.jobs)
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "benchmarks.api_load:create_app", "--factory", "--port", str(port), "--log-level", "warning"],
+            env=os.environ.copy(),
+        )
+    try:
+        import httpx
+
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/api/cache/stats", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        print(f"clients={args.clients} duration={args.duration:g}s accounts={args.accounts} snapshots={args.snapshots}")
+        for name, prefix in (("sync", "/legacy"), ("async", "/api")):
+            latencies, errors = asyncio.run(
+                _load(base_url, prefix, args.endpoints.split(","), args.clients, args.duration, args.accounts, job_ids)
+            )
+            total = sum(len(values) for values in latencies.values())
+            print(
+                f"routes={name} requests={total} rps={total / args.duration:.0f} errors={sum(errors.values())} "
+                + " ".join(
+                    f"{endpoint}_p50_ms={_percentile(values, 0.5) * 1000:.1f} {endpoint}_p99_ms={_percentile(values, 0.99) * 1000:.1f} "
+                    f"{endpoint}_errors={errors[endpoint]}"
+                    for endpoint, values in latencies.items()
+                )
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
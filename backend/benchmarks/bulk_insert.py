@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.store.bulk import bulk_insert_items, item_row
+from app.store.models import Account, Base, Item, Platform, Snapshot
+from benchmarks.synthetic import make_items
+
+
+def _orm_insert(session: Session, snapshot_id: int, items: list[dict]) -> None:
+    for item in items:
+        session.add(Item(**item_row(snapshot_id, item)))
+    session.flush()
+
+
+def _bulk_insert(session: Session, snapshot_id: int, items: list[dict]) -> None:
+    bulk_insert_items(session, snapshot_id, items)
+
+
+def run(database_url: str, sizes: list[int]) -> None:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    print(f"{'mode':<6} {'items':>7} {'seconds':>9} {'rows/sec':>11}")
+    for size in sizes:
+        items = make_items(size)
+        for mode, insert_fn in (("orm", _orm_insert), ("bulk", _bulk_insert)):
+            with Session(engine) as session:
+                account = Account(platform=Platform.reddit, handle=f"bench_{mode}_{size}_{time.time_ns()}")
+                session.add(account)
+                session.flush()
+                snapshot = Snapshot(
+                    account_id=account.id,
+                    post_count=0,
+                    comment_count=0,
+                    collector_version="bench",
+                )
+                session.add(snapshot)
+                session.flush()
+
+                start = time.perf_counter()
+                insert_fn(session, snapshot.id, items)
+                session.commit()
+                elapsed = time.perf_counter() - start
+            print(f"{mode:<6} {size:>7} {elapsed:>9.3f} {size / elapsed:>11.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-item ORM inserts with bulk item persistence.")
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--sizes", default="200,2000,20000")
+    args = parser.parse_args()
+    run(args.database_url, [int(size) for size in args.sizes.split(",")])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bytes and encode/decode time per cache codec on real-sized payloads.")
+    parser.add_argument("--extra-fields", type=int, default=80, help="Unused fields per raw listing child.")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--codecs",
+        default="json,json+zlib,json+zstd,msgpack,msgpack+zlib,msgpack+zstd",
+        help="Codecs to compare; ones whose package is not installed are skipped.",
+    )
+    args = parser.parse_args()
+
+    from app.collectors.listing_cache import CACHED_FIELDS
+    from app.features import compute_features
+    from app.scoring.rules_v1 import score
+    from app.utils.codec import decode, parse_codec
+    from benchmarks.fake_reddit import to_raw_child
+    from benchmarks.synthetic import make_items
+
+    items = make_items(1000, seed=0, now=1.7e9)
+    raw_children = [to_raw_child(item, args.extra_fields) for item in items[:100]]
+    features = compute_features(items[:200])
+    scores, _ = score(features, {}, items[:200])
+    payloads: Dict[str, Any] = {
+        # A whole raw listing page, as the old page cache stored it.
+        "listing_page": {"kind": "Listing", "data": {"children": raw_children, "after": raw_children[-1]["data"]["name"]}},
+        # One per-item listing entry and a user's listing index, as the listing cache stores them now.
+        "listing_item": {field: raw_children[1]["data"].get(field) for field in CACHED_FIELDS},
+        "listing_index": {"names": [item["item_id"] for item in items], "complete": False},
+        "report": {"username": "bench", "snapshot_id": 1, "features": features, "scores": scores},
+    }
+
+    print(f"{'payload':<14} {'codec':<14} {'bytes':>9} {'ratio':>6} {'encode_us':>10} {'decode_us':>10}")
+    for name, payload in payloads.items():
+        legacy = json.dumps(payload)
+        rows: List[tuple] = [
+            (
+                "legacy_json",
+                len(legacy.encode("utf-8")),
+                _timed(lambda: json.dumps(payload), args.repeat),
+                _timed(lambda: json.loads(legacy), args.repeat),
+            )
+        ]
+        assert decode(legacy) == json.loads(legacy)
+        for spec in args.codecs.split(","):
+            try:
+                codec = parse_codec(spec)
+            except RuntimeError:
+                rows.append((spec, None, None, None))
+                continue
+            encoded = codec.encode(payload)
+            assert decode(encoded) == json.loads(legacy), spec
+            rows.append(
+                (spec, len(encoded), _timed(lambda: codec.encode(payload), args.repeat), _timed(lambda: decode(encoded), args.repeat))
+            )
+        for spec, size, encode_seconds, decode_seconds in rows:
+            if size is None:
+                print(f"{name:<14} {spec:<14} {'unavailable':>9}")
+                continue
+            print(
+                f"{name:<14} {spec:<14} {size:>9} {size / rows[0][1]:>6.2f} "
+                f"{encode_seconds * 1e6:>10.1f} {decode_seconds * 1e6:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
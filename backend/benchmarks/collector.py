@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.fake_reddit import FakeRedditServer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare sync and async collection against a fake Reddit server.")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with FakeRedditServer(latency=args.latency) as server:
+        os.environ["REDDIT_API_BASE_URL"] = server.base_url
+        os.environ["REDDIT_AUTH_URL"] = f"{server.base_url}/api/v1/access_token"
+        os.environ.setdefault("REDDIT_CLIENT_ID", "bench")
+        os.environ.setdefault("REDDIT_CLIENT_SECRET", "bench")
+
+        from app.collectors.reddit import RedditClient, collect_user_async, normalize_items, parse_username
+
+        def collect_sync(username: str) -> int:
+            client = RedditClient()
+            client.fetch_profile(username)
+            submissions = client.fetch_listing(username, "submitted", args.items // 2)
+            comments = client.fetch_listing(username, "comments", args.items - args.items // 2)
+            return len(normalize_items(submissions, comments))
+
+        print(f"{'mode':<6} {'round':>5} {'items':>6} {'requests':>8} {'seconds':>8}")
+        for round_index in range(args.rounds):
+            for mode in ("sync", "async"):
+                username = parse_username(f"bench_{mode}_{round_index}")
+                server.add_account(username, count=args.items)
+                before = server.request_count
+                start = time.perf_counter()
+                if mode == "sync":
+                    count = collect_sync(username)
+                else:
+                    _, items = asyncio.run(collect_user_async(username, args.items))
+                    count = len(items)
+                elapsed = time.perf_counter() - start
+                print(f"{mode:<6} {round_index:>5} {count:>6} {server.request_count - before:>8} {elapsed:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.fake_reddit import FakeRedditServer
+
+
+class _NoCache:
+    # The listing cache would keep every cached item alive in an in-process fake Redis and skew the
+    # comparison; a real deployment keeps those bytes in the Redis server, not the worker.
+    def get_json(self, key: str) -> Optional[dict]:
+        return None
+
+    def set_json(self, key: str, payload: dict, ttl_seconds: int) -> None:
+        return None
+
+    def get_many_json(self, keys: List[str]) -> List[Optional[dict]]:
+        return [None] * len(keys)
+
+    def set_many_json(self, payloads: Dict[str, dict], ttl_seconds: int) -> None:
+        return None
+
+
+def _measure(fn: Callable[[], int]) -> tuple[int, float, float]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, peak / 1024 / 1024, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Peak memory of list-based vs streaming collection (tracemalloc).")
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--extra-fields", type=int, default=80)
+    args = parser.parse_args()
+
+    with FakeRedditServer(latency=0.0) as server:
+        os.environ["REDDIT_API_BASE_URL"] = server.base_url
+        os.environ["REDDIT_AUTH_URL"] = f"{server.base_url}/api/v1/access_token"
+        os.environ.setdefault("REDDIT_CLIENT_ID", "bench")
+        os.environ.setdefault("REDDIT_CLIENT_SECRET", "bench")
+        os.environ["REDDIT_QPM_LIMIT"] = "1000000"
+        os.environ["REDDIT_RATE_BURST"] = "1000"
+
+        from app.collectors.reddit import RedditClient, normalize_items, stream_user
+        from app.features.batch import ItemBatch, ItemBatchBuilder
+
+        username = "bench_memory"
+        # make_items is 1 post : 3 comments, so generate enough for both listings to fill up.
+        server.add_account(username, count=args.items * 2, extra_fields=args.extra_fields)
+
+        def client() -> RedditClient:
+            reddit = RedditClient()
+            reddit.cache = _NoCache()
+            return reddit
+
+        def listed() -> int:
+            reddit = client()
+            submissions = reddit.fetch_listing(username, "submitted", args.items // 2)
+            comments = reddit.fetch_listing(username, "comments", args.items - args.items // 2)
+            batch = ItemBatch.from_items(normalize_items(submissions, comments))
+            return len(batch)
+
+        def streamed() -> int:
+            builder = ItemBatchBuilder()
+            for page in stream_user(client(), username, args.items):
+                builder.extend(page)
+            return len(builder.build())
+
+        client().fetch_profile(username)
+        for mode, fn in (("list", listed), ("stream", streamed)):
+            count, peak_mb, elapsed = _measure(fn)
+            print(f"mode={mode} items={count} extra_fields={args.extra_fields} peak_mb={peak_mb:.1f} seconds={elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
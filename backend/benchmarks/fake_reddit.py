@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import make_items
+
+
+def to_raw_child(item: dict, extra_fields: int = 0) -> dict:
+    permalink = (item.get("permalink") or "").replace("https://www.reddit.com", "")
+    data = {
+        "name": item.get("item_id"),
+        "created_utc": item.get("created_utc"),
+        "subreddit": item.get("subreddit"),
+        "permalink": permalink,
+    }
+    # Real listing children carry ~100 fields (awards, flair, media, ...) the collector never reads.
+    data.update({f"extra_field_{index}": f"value-{index}-{item.get('item_id')}" for index in range(extra_fields)})
+    if item.get("kind") == "post":
+        data.update({"selftext": item.get("body_text") or "", "url": item.get("url")})
+        return {"kind": "t3", "data": data}
+    data.update({"body": item.get("body_text") or "", "link_id": item.get("link_id"), "parent_id": item.get("parent_id")})
+    return {"kind": "t1", "data": data}
+
+
+class FakeRedditAccount:
+    def __init__(self, username: str, items: List[dict], created_utc: float = 1.5e9, extra_fields: int = 0) -> None:
+        self.username = username
+        self.created_utc = created_utc
+        self.listings: Dict[str, List[dict]] = {
+            "submitted": [to_raw_child(i, extra_fields) for i in items if i.get("kind") == "post"],
+            "comments": [to_raw_child(i, extra_fields) for i in items if i.get("kind") == "comment"],
+        }
+        self.extra_fields = extra_fields
+
+    def prepend(self, items: List[dict]) -> None:
+        # New activity shows up at the head of the newest-first listings.
+        for listing, kind in (("submitted", "post"), ("comments", "comment")):
+            children = [to_raw_child(i, self.extra_fields) for i in items if i.get("kind") == kind]
+            self.listings[listing][:0] = children
+
+
+class FakeRedditServer:
+    """Minimal local stand-in for the Reddit OAuth + listing endpoints with artificial latency.
+
+    With `ratelimit_requests` set, GET responses carry Reddit's X-Ratelimit-Used/-Remaining/-Reset
+    headers for a fixed window of `ratelimit_window` seconds and requests over the quota get a 429.
+    `throttle_rate` additionally answers that share of GETs with a 429, as Reddit does under load.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ratelimit_requests: Optional[int] = None,
+        ratelimit_window: float = 600.0,
+        throttle_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.accounts: Dict[str, FakeRedditAccount] = {}
+        self.request_count = 0
+        self.throttled_count = 0
+        self.ratelimit_requests = ratelimit_requests
+        self.ratelimit_window = ratelimit_window
+        self.throttle_rate = throttle_rate
+        self._window_start = time.monotonic()
+        self._window_used = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_account(
+        self,
+        username: str,
+        items: Optional[List[dict]] = None,
+        count: int = 200,
+        extra_fields: int = 0,
+        created_utc: float = 1.5e9,
+    ) -> FakeRedditAccount:
+        items = items if items is not None else make_items(count)
+        account = FakeRedditAccount(username, items, created_utc=created_utc, extra_fields=extra_fields)
+        self.accounts[username] = account
+        return account
+
+    def start(self) -> "FakeRedditServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeRedditServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def _record_request(self) -> None:
+        with self._lock:
+            self.request_count += 1
+
+    def _admit(self) -> tuple[bool, Dict[str, str]]:
+        # Counts a GET against the current window; returns whether it is served and its rate headers.
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.ratelimit_window:
+                self._window_start, self._window_used = now, 0
+            self._window_used += 1
+            throttled = self._rng.random() < self.throttle_rate
+            headers: Dict[str, str] = {}
+            if self.ratelimit_requests is not None:
+                reset = self.ratelimit_window - (now - self._window_start)
+                headers = {
+                    "X-Ratelimit-Used": str(self._window_used),
+                    "X-Ratelimit-Remaining": str(max(self.ratelimit_requests - self._window_used, 0)),
+                    "X-Ratelimit-Reset": str(int(reset)),
+                }
+                throttled = throttled or self._window_used > self.ratelimit_requests
+            if throttled:
+                self.throttled_count += 1
+            return not throttled, headers
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: object) -> None:
+                return
+
+            def _send_json(self, status: int, payload: dict, headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                server._record_request()
+                time.sleep(server.latency)
+                self._send_json(200, {"access_token": "fake-token", "expires_in": 3600})
+
+            def do_GET(self) -> None:
+                server._record_request()
+                time.sleep(server.latency)
+                served, rate_headers = server._admit()
+                if not served:
+                    self._send_json(429, {"error": 429, "message": "Too Many Requests"}, {**rate_headers, "Retry-After": "5"})
+                    return
+                parsed = urlparse(self.path)
+                parts = parsed.path.strip("/").split("/")
+                if len(parts) != 3 or parts[0] != "user" or parts[1] not in server.accounts:
+                    self._send_json(404, {"error": 404})
+                    return
+                account = server.accounts[parts[1]]
+                if parts[2] == "about":
+                    self._send_json(
+                        200,
+                        {"data": {"name": account.username, "created_utc": account.created_utc, "link_karma": 1, "comment_karma": 1}},
+                        rate_headers,
+                    )
+                    return
+                children = account.listings.get(parts[2])
+                if children is None:
+                    self._send_json(404, {"error": 404})
+                    return
+                query = parse_qs(parsed.query)
+                limit = min(int(query.get("limit", ["25"])[0]), 100)
+                after = query.get("after", [None])[0]
+                start = 0
+                if after:
+                    names = [child["data"]["name"] for child in children]
+                    start = names.index(after) + 1 if after in names else len(children)
+                page = children[start : start + limit]
+                next_after = page[-1]["data"]["name"] if page and start + limit < len(children) else None
+                self._send_json(200, {"kind": "Listing", "data": {"children": page, "after": next_after}}, rate_headers)
+
+        return Handler
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import uuid
+from typing import Callable, List
+
+from app.features import compute_features
+from app.features.batch import ItemBatch
+from app.features.item_cache import ItemFeatureCache, cached_batch
+from benchmarks.synthetic import make_items
+
+
+class _TimedCache(ItemFeatureCache):
+    def __init__(self, ttl_seconds: int) -> None:
+        super().__init__(ttl_seconds)
+        self.load_seconds = 0.0
+
+    def load(self, items: List[dict]) -> list:
+        start = time.perf_counter()
+        try:
+            return super().load(items)
+        finally:
+            self.load_seconds = time.perf_counter() - start
+
+
+def _timed(fn: Callable[[], dict], repeats: int) -> tuple[float, dict]:
+    best = float("inf")
+    result: dict = {}
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _snapshots(size: int, new_share: float, seed: int) -> tuple[List[dict], List[dict]]:
+    # The second snapshot keeps the newest (1 - new_share) of the first and adds fresh items on top,
+    # like a re-analysis of the same account a few days later.
+    previous = make_items(size, seed=seed, now=1.7e9)
+    fresh = make_items(int(size * new_share), seed=seed + 1, now=1.7e9 + 86400)
+    for item in fresh:
+        item["item_id"] = f"new_{item['item_id']}"
+    current = (fresh + previous)[:size]
+    return previous, current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Repeat-analysis feature time with and without the per-item cache.")
+    parser.add_argument("--sizes", default="200,1000,5000")
+    parser.add_argument("--new-share", type=float, default=0.1)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    for size in [int(value) for value in args.sizes.split(",")]:
+        previous, current = _snapshots(size, args.new_share, seed=size)
+        baseline_seconds, baseline = _timed(lambda: compute_features(ItemBatch.from_items(current)), args.repeats)
+
+        cold_seconds = float("inf")
+        warm_seconds = float("inf")
+        warm_load_seconds = 0.0
+        warm: dict = {}
+        for _ in range(args.repeats):
+            # Fresh item ids per run so the cold pass really starts from an empty cache.
+            cache = _TimedCache(ttl_seconds=600)
+            prefix = uuid.uuid4().hex
+            for item in previous + current:
+                item["item_id"] = f"{prefix}:{item['item_id'].split(':')[-1]}"
+            start = time.perf_counter()
+            compute_features(cached_batch(previous, cache))
+            cold_seconds = min(cold_seconds, time.perf_counter() - start)
+            start = time.perf_counter()
+            warm = compute_features(cached_batch(current, cache))
+            elapsed = time.perf_counter() - start
+            if elapsed < warm_seconds:
+                warm_seconds, warm_load_seconds = elapsed, cache.load_seconds
+
+        identical = json.dumps(warm, sort_keys=True) == json.dumps(baseline, sort_keys=True)
+        print(
+            f"items={size} new_share={args.new_share:.2f} uncached={baseline_seconds * 1000:.1f}ms "
+            f"cold={cold_seconds * 1000:.1f}ms repeat={warm_seconds * 1000:.1f}ms "
+            f"(redis_load={warm_load_seconds * 1000:.1f}ms compute={(warm_seconds - warm_load_seconds) * 1000:.1f}ms) "
+            f"speedup={baseline_seconds / warm_seconds:.2f}x identical={identical}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+
+ITEM_KEYS = ("kind", "item_id", "created_utc", "subreddit", "permalink", "body_text", "url", "link_id", "parent_id")
+
+
+def _snapshots(count: int, size: int, churn: int, edit_share: float, seed: int) -> List[List[dict]]:
+    # Hourly re-collections of one account: each keeps the newest items, gains `churn` new ones and
+    # sees a few edited bodies.
+    from benchmarks.synthetic import make_items
+
+    rng = random.Random(seed)
+    pool = make_items(size + count * churn, seed=seed, now=1.7e9)
+    for item in pool:
+        # Reddit ids are global; synthetic ones restart per account.
+        item["item_id"] = f"{item['item_id']}{seed:04x}"
+    snapshots: List[List[dict]] = []
+    for index in range(count):
+        start = (count - 1 - index) * churn
+        items = [dict(item) for item in pool[start : start + size]]
+        for item in items:
+            if item["body_text"] and rng.random() < edit_share:
+                item["body_text"] += " (edited)"
+        snapshots.append(items)
+    return snapshots
+
+
+def _table_bytes(session, table: str) -> int:
+    from sqlalchemy import text
+
+    if session.get_bind().dialect.name == "postgresql":
+        return session.execute(text("SELECT pg_total_relation_size(:t)"), {"t": table}).scalar_one()
+    try:
+        return session.execute(text("SELECT SUM(pgsize) FROM dbstat WHERE name = :t"), {"t": table}).scalar() or 0
+    except Exception:
+        return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Row and byte volume of per-snapshot vs normalized item storage.")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--accounts", type=int, default=5)
+    parser.add_argument("--snapshots", type=int, default=24)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--churn", type=int, default=5)
+    parser.add_argument("--edit-share", type=float, default=0.01)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/item_storage.db"
+
+    from sqlalchemy import delete, func, select
+
+    from app.store.db import get_session, init_db
+    from app.store.items import (
+        ITEM_STORAGE_NORMALIZED,
+        ITEM_STORAGE_SNAPSHOT,
+        load_snapshot_items,
+        store_snapshot_items,
+    )
+    from app.store.models import Account, CanonicalItem, Item, Platform, Snapshot, SnapshotItem
+    from app.tools.backfill_items import backfill
+
+    init_db()
+    data = {
+        f"bench_storage_{account}": _snapshots(args.snapshots, args.items, args.churn, args.edit_share, account)
+        for account in range(args.accounts)
+    }
+
+    def reset() -> None:
+        with get_session() as session:
+            for model in (SnapshotItem, CanonicalItem, Item, Snapshot, Account):
+                session.execute(delete(model))
+
+    def write(storage: str) -> Dict[str, List[int]]:
+        snapshot_ids: Dict[str, List[int]] = {}
+        for username, snapshots in data.items():
+            with get_session() as session:
+                account = Account(platform=Platform.reddit, handle=username)
+                session.add(account)
+                session.flush()
+                account_id = account.id
+            for items in snapshots:
+                with get_session() as session:
+                    snapshot = Snapshot(
+                        account_id=account_id, post_count=0, comment_count=0, collector_version="bench"
+                    )
+                    session.add(snapshot)
+                    session.flush()
+                    store_snapshot_items(session, Platform.reddit, snapshot.id, items, storage=storage)
+                    snapshot_ids.setdefault(username, []).append(snapshot.id)
+        return snapshot_ids
+
+    def volume() -> Dict[str, int]:
+        with get_session() as session:
+            return {
+                table.__tablename__: session.execute(select(func.count()).select_from(table)).scalar_one()
+                for table in (Item, CanonicalItem, SnapshotItem)
+            } | {
+                f"{table.__tablename__}_bytes": _table_bytes(session, table.__tablename__)
+                for table in (Item, CanonicalItem, SnapshotItem)
+            }
+
+    def check(snapshot_ids: Dict[str, List[int]]) -> bool:
+        with get_session() as session:
+            for username, ids in snapshot_ids.items():
+                expected = [{key: item.get(key) for key in ITEM_KEYS} for item in data[username][-1]]
+                if load_snapshot_items(session, ids[-1]) != expected:
+                    return False
+        return True
+
+    for storage in (ITEM_STORAGE_SNAPSHOT, ITEM_STORAGE_NORMALIZED):
+        reset()
+        start = time.perf_counter()
+        snapshot_ids = write(storage)
+        elapsed = time.perf_counter() - start
+        stats = volume()
+        print(
+            f"storage={storage} write_seconds={elapsed:.2f} "
+            + " ".join(f"{key}={value}" for key, value in stats.items())
+            + f" latest_items_identical={check(snapshot_ids)}"
+        )
+
+    reset()
+    snapshot_ids = write(ITEM_STORAGE_SNAPSHOT)
+    start = time.perf_counter()
+    totals = backfill(delete_legacy=True)
+    elapsed = time.perf_counter() - start
+    print(
+        f"backfill seconds={elapsed:.2f} "
+        + " ".join(f"{key}={value}" for key, value in totals.items())
+        + f" latest_items_identical={check(snapshot_ids)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct)))] if ordered else 0.0
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _count_api_commands(counter: Counter, worker_thread: str) -> None:
+    # Counts the Redis commands issued by the API process; the simulated workers' own writes and
+    # publishes are the same in both modes and are left out.
+    import redis
+    import redis.asyncio
+
+    def wrap(cls, label):
+        original = cls.execute_command
+
+        def counted(self, *args, **kwargs):
+            if threading.current_thread().name != worker_thread:
+                counter[label] += 1
+            return original(self, *args, **kwargs)
+
+        cls.execute_command = counted
+
+    wrap(redis.Redis, "sync")
+    wrap(redis.asyncio.Redis, "async")
+    wrap(redis.asyncio.client.PubSub, "pubsub")
+
+
+def _run_jobs(job_ids: List[str], steps: int, duration: float, published: Dict[Tuple[str, float], float]) -> None:
+    # Every job reports `steps` progress updates spread over the run, then finishes.
+    from rq.job import Job, JobStatus
+
+    from app.utils.redis_client import get_redis
+    from app.workers.events import publish_job_event
+
+    connection = get_redis()
+    jobs = [Job.fetch(job_id, connection=connection) for job_id in job_ids]
+    for step in range(1, steps + 1):
+        deadline = time.perf_counter() + duration / steps
+        progress = round(step / steps, 3)
+        for job in jobs:
+            if step == steps:
+                job.set_status(JobStatus.FINISHED)
+            else:
+                job.meta["progress"] = progress
+                job.save_meta()
+            published[(job.id, progress)] = time.perf_counter()
+            publish_job_event(job.id, JobStatus.FINISHED.value if step == steps else JobStatus.STARTED.value, progress)
+        time.sleep(max(0.0, deadline - time.perf_counter()))
+
+
+async def _watch(
+    base_url: str, job_ids: List[str], mode: str, poll_seconds: float, published: dict
+) -> Tuple[int, List[float]]:
+    import httpx
+
+    requests = 0
+    delays: List[float] = []
+    limits = httpx.Limits(max_connections=len(job_ids), max_keepalive_connections=len(job_ids))
+
+    def seen(job_id: str, status: str, progress) -> None:
+        key = (job_id, 1.0 if status == "finished" else progress)
+        if key in published:
+            delays.append(time.perf_counter() - published.pop(key))
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+
+        async def poll(job_id: str) -> None:
+            nonlocal requests
+            while True:
+                requests += 1
+                state = (await client.get(f"/api/jobs/{job_id}")).json()
+                seen(job_id, state["status"], state["progress"])
+                if state["status"] == "finished":
+                    return
+                await asyncio.sleep(poll_seconds)
+
+        async def stream(job_id: str) -> None:
+            import json
+
+            nonlocal requests
+            requests += 1
+            async with client.stream("GET", f"/api/jobs/{job_id}/events") as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        state = json.loads(line[len("data: "):])
+                        seen(job_id, state["status"], state["progress"])
+
+        watch = stream if mode == "sse" else poll
+        await asyncio.gather(*(watch(job_id) for job_id in job_ids))
+    return requests, delays
+
+
+async def _bench(args, counter: Counter) -> None:
+    import uvicorn
+    from rq.job import Job, JobStatus
+
+    from app.main import app
+    from app.utils.redis_client import get_redis
+
+    # Both modes run against one server and event loop, so they share the async Redis pool.
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning", backlog=4096, timeout_keep_alive=60))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        for mode in args.modes.split(","):
+            job_ids = []
+            for index in range(args.watchers):
+                job = Job.create("builtins.len", args=([index],), connection=get_redis(), status=JobStatus.STARTED)
+                job.meta["progress"] = 0.0
+                job.save()
+                job_ids.append(job.id)
+            published: Dict[Tuple[str, float], float] = {}
+            counter.clear()
+            start = time.perf_counter()
+            # The watchers connect first; the jobs only start moving once everybody is listening.
+            watching = asyncio.create_task(_watch(f"http://127.0.0.1:{port}", job_ids, mode, args.poll_seconds, published))
+            await asyncio.sleep(1.0)
+            worker = threading.Thread(
+                target=_run_jobs, args=(job_ids, args.steps, args.duration, published), name="bench-worker", daemon=True
+            )
+            worker.start()
+            requests, delays = await watching
+            elapsed = time.perf_counter() - start
+            worker.join()
+            commands = sum(counter.values())
+            print(
+                f"mode={mode} http_requests={requests} redis_commands={commands} redis_ops_per_s={commands / elapsed:.0f} "
+                + " ".join(f"{label}={count}" for label, count in sorted(counter.items()))
+                + f" updates_seen={len(delays)} update_delay_p50_ms={_percentile(delays, 0.5) * 1000:.0f} "
+                f"update_delay_p99_ms={_percentile(delays, 0.99) * 1000:.0f} "
+                f"update_delay_mean_ms={(statistics.mean(delays) if delays else 0.0) * 1000:.0f}"
+            )
+    finally:
+        server.should_exit = True
+        await serving
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API-side Redis load of job watchers: polling every 3s vs SSE.")
+    parser.add_argument("--watchers", type=int, default=1000, help="Concurrent watchers, one job each.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds each job runs.")
+    parser.add_argument("--steps", type=int, default=10, help="Progress updates per job.")
+    parser.add_argument("--poll-seconds", type=float, default=3.0)
+    parser.add_argument("--modes", default="poll,sse")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/job_events.db")
+
+    # One log line per poll or watch would dominate the run.
+    for name in ("api", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    counter: Counter = Counter()
+    _count_api_commands(counter, "bench-worker")
+    print(f"watchers={args.watchers} duration={args.duration:g}s steps={args.steps} poll_seconds={args.poll_seconds:g}")
+    asyncio.run(_bench(args, counter))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+from typing import List
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct)))]
+
+
+def _report(index: int, size: int) -> dict:
+    # Roughly the shape of a cached ReportResponse, padded to `size` bytes of evidence.
+    return {
+        "username": f"bench_l1_{index}",
+        "snapshot_id": index,
+        "scores": {"automation_score": index % 100, "coordination_score": 0, "confidence": "medium"},
+        "evidence": ["x" * 96 for _ in range(max(1, size // 100))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Zipfian report reads: Redis-only vs the in-process L1 cache.")
+    parser.add_argument("--reports", type=int, default=5000)
+    parser.add_argument("--report-bytes", type=int, default=8000)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of report popularity.")
+    parser.add_argument("--l1-mb", default="4,16,64", help="L1 sizes to compare.")
+    parser.add_argument("--write-share", type=float, default=0.01, help="Share of requests that rewrite a report.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("L1_CACHE_SECONDS", "300")
+
+    from app.utils import local_cache
+    from app.utils.cache import REPORT_CACHE_PREFIX, RedisCache, report_cache_key
+    from app.utils.codec import decode
+    from app.utils.redis_client import get_redis
+
+    cache = RedisCache(prefix=REPORT_CACHE_PREFIX)
+    keys = [report_cache_key(f"bench_l1_{index}", index) for index in range(args.reports)]
+    for index, key in enumerate(keys):
+        cache.set_json(key, _report(index, args.report_bytes), ttl_seconds=3600)
+
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(args.reports)]
+    workload = [
+        (rng.choices(range(args.reports), weights)[0], rng.random() < args.write_share) for _ in range(args.requests)
+    ]
+    redis = get_redis()
+
+    def redis_only(key: str) -> dict:
+        # RedisCache.get_json without the L1: one GET and a decode per read.
+        return decode(redis.get(f"{REPORT_CACHE_PREFIX}:{key}"))
+
+    def run(read) -> List[float]:
+        latencies = []
+        for index, write in workload:
+            if write:
+                cache.set_json(keys[index], _report(index, args.report_bytes), ttl_seconds=3600)
+                continue
+            start = time.perf_counter()
+            read(keys[index])
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    print(f"reports={args.reports} report_bytes={args.report_bytes} requests={args.requests} zipf={args.zipf}")
+    latencies = run(redis_only)
+    print(f"mode=redis l1_mb=0 p50_us={_percentile(latencies, 0.5) * 1e6:.0f} p99_us={_percentile(latencies, 0.99) * 1e6:.0f}")
+    for l1_mb in [float(value) for value in args.l1_mb.split(",")]:
+        local = local_cache.get_local_cache()
+        local.max_bytes = int(l1_mb * 1024 * 1024)
+        local.clear()
+        local.counters.clear()
+        latencies = run(cache.get_json)
+        stats = local.stats()
+        lookups = stats["hits"] + stats["misses"]
+        print(
+            f"mode=l1 l1_mb={l1_mb:g} p50_us={_percentile(latencies, 0.5) * 1e6:.0f} "
+            f"p99_us={_percentile(latencies, 0.99) * 1e6:.0f} hit_rate={stats['hits'] / lookups:.3f} "
+            f"evictions={stats['evictions']} invalidations={stats['invalidations']} entries={stats['entries']}"
+        )
+
+    # Coherence: a second replica's L1 drops a key once the first one rewrites it.
+    replica = local_cache.LocalCache(16 * 1024 * 1024, 300)
+    listener = local_cache.InvalidationListener(replica)
+    listener.ensure_started()
+    time.sleep(0.2)
+    full_key = f"{REPORT_CACHE_PREFIX}:{keys[0]}"
+    replica.put(full_key, {"stale": True}, 100, "json")
+    start = time.perf_counter()
+    cache.set_json(keys[0], _report(0, args.report_bytes), ttl_seconds=3600)
+    while replica.get(full_key, "json") is not local_cache.MISSING and time.perf_counter() - start < 5:
+        time.sleep(0.001)
+    coherent = replica.get(full_key, "json") is local_cache.MISSING
+    print(f"replica_invalidated={coherent} propagation_ms={(time.perf_counter() - start) * 1000:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+from typing import Dict, Iterator, List, Optional
+
+from benchmarks.fake_reddit import FakeRedditServer
+
+
+def _new_items(count: int, start: float, end: float, tag: str, seed: int) -> List[dict]:
+    # Newest first, strictly inside (start, end] so incremental markers stay valid.
+    from benchmarks.synthetic import make_items
+
+    items = make_items(count, seed=seed)
+    for index, item in enumerate(items):
+        item["item_id"] = f"{item['item_id']}{tag}"
+        item["created_utc"] = end - (end - start) * (index + 1) / (count + 1)
+    return items
+
+
+def _warp(redis, seconds: int) -> None:
+    # Advance every key's TTL by `seconds` instead of sleeping through the replay.
+    for key in redis.keys("*"):
+        ttl = redis.ttl(key)
+        if ttl is None or ttl < 0:
+            continue
+        if ttl <= seconds:
+            redis.delete(key)
+        else:
+            redis.expire(key, ttl - seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay hourly analyses against the page-key and per-item listing caches.")
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=24, help="Replayed hours.")
+    parser.add_argument("--requests", type=int, default=30, help="Analyses per hour, Zipf-distributed over accounts.")
+    parser.add_argument("--items", type=int, default=1000, help="Items per account at the start.")
+    parser.add_argument("--churn", type=int, default=8, help="Max new items per account per hour.")
+    parser.add_argument("--windows", default="200,500,1000", help="max_items values requested by analyses.")
+    parser.add_argument("--incremental-share", type=float, default=0.5, help="Share of analyses with a previous snapshot.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with FakeRedditServer(latency=0.0) as server:
+        os.environ["REDDIT_API_BASE_URL"] = server.base_url
+        os.environ["REDDIT_AUTH_URL"] = f"{server.base_url}/api/v1/access_token"
+        os.environ.setdefault("REDDIT_CLIENT_ID", "bench")
+        os.environ.setdefault("REDDIT_CLIENT_SECRET", "bench")
+        os.environ["REDDIT_QPM_LIMIT"] = "1000000"
+        os.environ["REDDIT_RATE_BURST"] = "1000"
+
+        from app.collectors.listing_cache import take_unseen
+        from app.collectors.reddit import RedditClient, collect_user
+        from app.config import settings
+        from app.utils.cache import RedisCache
+        from app.utils.redis_client import get_redis
+        from benchmarks.synthetic import make_items
+
+        class PageKeyClient(RedditClient):
+            # The previous cache: whole raw pages keyed by (after, batch) for five minutes.
+            def __init__(self) -> None:
+                super().__init__()
+                self.cache = RedisCache(prefix="bench_pages")
+
+            def iter_listing(
+                self,
+                username: str,
+                listing: str,
+                limit: int,
+                known_ids: Optional[set] = None,
+                newest_utc: Optional[float] = None,
+            ) -> Iterator[List[dict]]:
+                after: Optional[str] = None
+                fetched = 0
+                while fetched < limit:
+                    batch = min(100, limit - fetched)
+                    params = {"limit": batch, **({"after": after} if after else {})}
+                    cache_key = f"listing:{username}:{listing}:{after}:{batch}"
+                    payload = self.cache.get_json(cache_key)
+                    if payload:
+                        self.listing_stats["cached_items"] += len(payload["data"]["children"])
+                    else:
+                        payload = self._get(f"{settings.reddit_api_base_url}/user/{username}/{listing}", params=params)
+                        self.listing_stats["api_pages"] += 1
+                        self.listing_stats["api_items"] += len(payload["data"]["children"])
+                        self.cache.set_json(cache_key, payload, ttl_seconds=300)
+                    children = [child["data"] for child in payload["data"]["children"]]
+                    if not children:
+                        break
+                    unseen, reached_known = take_unseen(children, known_ids, newest_utc)
+                    unseen = unseen[: limit - fetched]
+                    fetched += len(unseen)
+                    after = payload["data"].get("after")
+                    if unseen:
+                        yield unseen
+                    if reached_known or not after:
+                        break
+
+        rng = random.Random(args.seed)
+        now = 1.7e9
+        usernames = [f"bench_listing_{index}" for index in range(args.accounts)]
+        for index, username in enumerate(usernames):
+            items = make_items(args.items, seed=index, now=now)
+            for item in items:
+                item["item_id"] = f"{item['item_id']}{index:04x}"
+            server.add_account(username, items=items)
+        weights = [1 / (rank + 1) for rank in range(args.accounts)]
+        windows = [int(value) for value in args.windows.split(",")]
+        clients = {"page_keys": PageKeyClient(), "item_keys": RedditClient()}
+        previous: Dict[str, Dict[str, List[dict]]] = {mode: {} for mode in clients}
+        analyses = 0
+        mismatches = 0
+
+        for step in range(args.steps):
+            for index, username in enumerate(usernames):
+                count = rng.randint(0, args.churn)
+                if count:
+                    tag = f"{index:04x}s{step:04x}"
+                    server.accounts[username].prepend(_new_items(count, now, now + 3600, tag, seed=step * 1000 + index))
+            now += 3600
+            _warp(get_redis(), 3600)
+            for _ in range(args.requests):
+                username = rng.choices(usernames, weights)[0]
+                max_items = rng.choice(windows)
+                incremental = rng.random() < args.incremental_share
+                results = {}
+                for mode, client in clients.items():
+                    prior = previous[mode].get(username) if incremental else None
+                    _, items = collect_user(username, max_items, prior, client=client)
+                    previous[mode][username] = items
+                    results[mode] = items
+                analyses += 1
+                mismatches += results["page_keys"] != results["item_keys"]
+
+        for mode, client in clients.items():
+            stats = client.listing_stats
+            served = stats["api_items"] + stats["cached_items"]
+            hit_rate = stats["cached_items"] / served if served else 0.0
+            print(
+                f"mode={mode} analyses={analyses} api_calls={stats['api_pages']} api_items={stats['api_items']} "
+                f"cached_items={stats['cached_items']} hit_rate={hit_rate:.3f}"
+            )
+        saved = clients["page_keys"].listing_stats["api_pages"] - clients["item_keys"].listing_stats["api_pages"]
+        print(f"api_calls_saved={saved} item_mismatches={mismatches}")
+
+
+if __name__ == "__main__":
+    main()
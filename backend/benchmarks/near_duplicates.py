@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import argparse
+import time
+from typing import List, Set
+
+from app.features.minhash import MinHasher, lsh_clusters, shingle_hashes
+from app.features.repetition import _normalize_text
+from benchmarks.synthetic import make_texts
+
+
+def _all_pairs_clusters(shingle_sets: List[Set[int]], threshold: float) -> List[List[int]]:
+    parent = list(range(len(shingle_sets)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i in range(len(shingle_sets)):
+        for j in range(i + 1, len(shingle_sets)):
+            a, b = shingle_sets[i], shingle_sets[j]
+            union = len(a | b)
+            if union and len(a & b) / union >= threshold:
+                parent[find(j)] = find(i)
+    groups: dict = {}
+    for index in range(len(shingle_sets)):
+        groups.setdefault(find(index), []).append(index)
+    return list(groups.values())
+
+
+def _duplicated(clusters: List[List[int]]) -> Set[int]:
+    return {index for cluster in clusters if len(cluster) > 1 for index in cluster}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MinHash/LSH near-duplicate clustering vs all-pairs Jaccard.")
+    parser.add_argument("--sizes", default="200,5000,50000")
+    parser.add_argument("--threshold", type=float, default=0.4)
+    parser.add_argument("--baseline-max", type=int, default=5000)
+    args = parser.parse_args()
+
+    minhasher = MinHasher()
+    print(f"{'texts':>7} {'lsh_s':>8} {'lsh_dups':>9} {'pairs_s':>8} {'pair_dups':>9} {'recall':>7}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        shingle_sets = [shingle_hashes(_normalize_text(text).split(), 3) for text in make_texts(size)]
+
+        start = time.perf_counter()
+        lsh = lsh_clusters(minhasher.signatures(shingle_sets), threshold=args.threshold)
+        lsh_seconds = time.perf_counter() - start
+        lsh_dups = _duplicated(lsh)
+
+        if size <= args.baseline_max:
+            start = time.perf_counter()
+            baseline = _all_pairs_clusters([set(s) for s in shingle_sets], args.threshold)
+            pairs_seconds = time.perf_counter() - start
+            baseline_dups = _duplicated(baseline)
+            recall = len(lsh_dups & baseline_dups) / len(baseline_dups) if baseline_dups else 1.0
+            print(f"{size:>7} {lsh_seconds:>8.3f} {len(lsh_dups):>9} {pairs_seconds:>8.3f} {len(baseline_dups):>9} {recall:>7.3f}")
+        else:
+            print(f"{size:>7} {lsh_seconds:>8.3f} {len(lsh_dups):>9} {'skipped':>8} {'-':>9} {'-':>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.fake_reddit import FakeRedditServer
+from benchmarks.synthetic import ACCOUNT_GENERATORS
+
+
+# _analyze reports these progress marks; each closes the named stage. Per-item derivation overlaps
+# with collection and is counted in collect.
+STAGE_MARKS = {0.3: "collect", 0.6: "features", 0.8: "score", 1.0: "persist"}
+WRITE_VERBS = ("INSERT", "UPDATE", "DELETE")
+
+
+def _git_commit() -> Tuple[str, bool]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+class _Stages:
+    # Progress callback for _analyze: wall time per stage and, when tracing, peak/retained memory.
+    def __init__(self, trace: bool) -> None:
+        self.trace = trace
+        self.seconds: Dict[str, float] = {}
+        self.memory: Dict[str, Dict[str, float]] = {}
+        self._start = time.perf_counter()
+        self._current = tracemalloc.get_traced_memory()[0] if trace else 0
+
+    def __call__(self, value: float) -> None:
+        stage = STAGE_MARKS.get(value)
+        if stage is None:
+            return
+        now = time.perf_counter()
+        self.seconds[stage] = now - self._start
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            self.memory[stage] = {
+                "peak_mb": round(peak / 1024 / 1024, 2),
+                "net_mb": round((current - self._current) / 1024 / 1024, 2),
+            }
+            self._current = current
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+
+
+def _table_counts() -> Dict[str, int]:
+    from sqlalchemy import func, select
+
+    from app.store.db import get_session
+    from app.store.models import Base
+
+    with get_session() as session:
+        return {
+            table.name: session.execute(select(func.count()).select_from(table)).scalar_one()
+            for table in Base.metadata.sorted_tables
+        }
+
+
+def _run(server: FakeRedditServer, profile: str, size: int, seed: int, trace: bool, writes: Counter) -> dict:
+    from app.workers.jobs import _analyze
+
+    username = f"bench_{profile}_{uuid.uuid4().hex[:8]}"
+    server.add_account(username, ACCOUNT_GENERATORS[profile](size, seed=seed), created_utc=time.time() - 400 * 86400)
+    requests_before, throttled_before = server.request_count, server.throttled_count
+    rows_before = _table_counts()
+    writes.clear()
+    if trace:
+        tracemalloc.start()
+    stages = _Stages(trace)
+    start = time.perf_counter()
+    # Both listings are asked for `size` items, so the whole generated account is collected.
+    result = _analyze(username, False, stages, max_items=2 * size)
+    elapsed = time.perf_counter() - start
+    if trace:
+        tracemalloc.stop()
+    rows_after = _table_counts()
+    return {
+        "items": result["items"],
+        "automation_score": result["scores"]["automation_score"],
+        "api_requests": server.request_count - requests_before,
+        "throttled": server.throttled_count - throttled_before,
+        "seconds": elapsed,
+        "stages": stages.seconds,
+        "memory": stages.memory,
+        "db_statements": {verb: writes[verb] for verb in WRITE_VERBS if writes[verb]},
+        "db_params": sum(writes[f"{verb}_rows"] for verb in WRITE_VERBS),
+        "db_rows": {name: rows_after[name] - rows_before[name] for name in rows_after if rows_after[name] != rows_before[name]},
+    }
+
+
+def _median(values: List[float]) -> float:
+    return round(statistics.median(values), 4)
+
+
+def _summarize(profile: str, size: int, runs: List[dict], memory: Optional[dict], meta: dict) -> dict:
+    stages = {stage: _median([run["stages"].get(stage, 0.0) for run in runs]) for stage in STAGE_MARKS.values()}
+    seconds = _median([run["seconds"] for run in runs])
+    last = runs[-1]
+    return {
+        "benchmark": "pipeline",
+        **meta,
+        "profile": profile,
+        "size": size,
+        "repeat": len(runs),
+        "items": last["items"],
+        "automation_score": last["automation_score"],
+        "api_requests": last["api_requests"],
+        "throttled": last["throttled"],
+        "seconds": seconds,
+        "items_per_s": round(last["items"] / seconds) if seconds else 0,
+        "stages": stages,
+        "memory": memory or {},
+        "db_statements": last["db_statements"],
+        "db_params": last["db_params"],
+        "db_rows": last["db_rows"],
+    }
+
+
+def _compare(results: List[dict], baseline_path: str) -> None:
+    with open(baseline_path) as handle:
+        baseline = {(row["profile"], row["size"]): row for row in map(json.loads, handle) if row.get("benchmark") == "pipeline"}
+    for row in results:
+        base = baseline.get((row["profile"], row["size"]))
+        if base is None:
+            print(f"compare profile={row['profile']} size={row['size']} baseline=missing")
+            continue
+        ratios = " ".join(
+            f"{stage}={row['stages'][stage] / base['stages'][stage]:.2f}x"
+            for stage in row["stages"]
+            if base["stages"].get(stage)
+        )
+        print(
+            f"compare profile={row['profile']} size={row['size']} baseline={base['commit'][:10]} "
+            f"total={row['seconds'] / base['seconds']:.2f}x {ratios}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end collect -> features -> score -> persist against a fake Reddit API.")
+    parser.add_argument("--sizes", default="200,2000,10000,50000", help="Items per synthetic account.")
+    parser.add_argument("--profiles", default=",".join(ACCOUNT_GENERATORS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per profile and size; stage times are medians.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the extra tracemalloc run.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake API latency per request, seconds.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of API requests answered with a 429.")
+    parser.add_argument("--ratelimit-requests", type=int, default=None, help="X-Ratelimit quota per window.")
+    parser.add_argument("--ratelimit-window", type=float, default=600.0)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--output", default=None, help="Append one JSON line per profile and size to this file.")
+    parser.add_argument("--compare", default=None, help="JSON lines from an earlier --output to compare stage times with.")
+    args = parser.parse_args()
+
+    server = FakeRedditServer(
+        latency=args.latency,
+        ratelimit_requests=args.ratelimit_requests,
+        ratelimit_window=args.ratelimit_window,
+        throttle_rate=args.throttle_rate,
+    ).start()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/pipeline.db"
+    os.environ["REDDIT_API_BASE_URL"] = server.base_url
+    os.environ["REDDIT_AUTH_URL"] = f"{server.base_url}/api/v1/access_token"
+    os.environ.setdefault("REDDIT_CLIENT_ID", "bench")
+    os.environ.setdefault("REDDIT_CLIENT_SECRET", "bench")
+    os.environ.setdefault("REDDIT_QPM_LIMIT", "1000000")
+    os.environ.setdefault("REDDIT_RATE_BURST", "1000")
+
+    from sqlalchemy import event
+
+    from app.store.db import engine, init_db
+
+    init_db()
+    writes: Counter = Counter()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_writes(conn, cursor, statement, parameters, context, executemany) -> None:
+        verb = statement.lstrip().split(" ", 1)[0].upper()
+        if verb in WRITE_VERBS:
+            writes[verb] += 1
+            writes[f"{verb}_rows"] += len(parameters) if executemany else 1
+
+    commit, dirty = _git_commit()
+    meta = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "latency": args.latency,
+        "throttle_rate": args.throttle_rate,
+    }
+    results = []
+    try:
+        for profile in args.profiles.split(","):
+            for size in [int(value) for value in args.sizes.split(",")]:
+                # Every run gets a new account with new items, so no cache is warm.
+                runs = [_run(server, profile, size, seed, False, writes) for seed in range(args.repeat)]
+                memory = None if args.no_memory else _run(server, profile, size, args.repeat, True, writes)["memory"]
+                row = _summarize(profile, size, runs, memory, meta)
+                results.append(row)
+                print(
+                    f"profile={profile} size={size} items={row['items']} seconds={row['seconds']:.3f} "
+                    f"items_per_s={row['items_per_s']} api_requests={row['api_requests']} throttled={row['throttled']} "
+                    + " ".join(f"{stage}_s={seconds:.3f}" for stage, seconds in row["stages"].items())
+                    + " "
+                    + " ".join(f"{stage}_peak_mb={values['peak_mb']}" for stage, values in row["memory"].items())
+                    + f" db_params={row['db_params']} db_rows={sum(row['db_rows'].values())} score={row['automation_score']}"
+                )
+    finally:
+        server.stop()
+
+    if args.output:
+        with open(args.output, "a") as handle:
+            for row in results:
+                handle.write(json.dumps(row) + "\n")
+    if args.compare:
+        _compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+import uuid
+from typing import List
+
+from app.utils.rate_limit import RateLimiter
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct)))]
+
+
+def simulate(workers: int, qpm: int, burst: int, duration: float) -> dict:
+    key = f"rate:bench:{uuid.uuid4().hex}"
+    waits: List[float] = []
+    grants: List[float] = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker() -> None:
+        limiter = RateLimiter(key, limit_per_minute=qpm, burst=burst)
+        while time.monotonic() < deadline:
+            start = time.monotonic()
+            limiter.wait_for_slot()
+            granted = time.monotonic()
+            with lock:
+                waits.append(granted - start)
+                grants.append(granted)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = max(grants) - started if grants else duration
+    return {
+        "workers": workers,
+        "granted": len(grants),
+        "achieved_qpm": len(grants) / elapsed * 60 if elapsed else 0.0,
+        "p50_wait": _percentile(waits, 0.5),
+        "p99_wait": _percentile(waits, 0.99),
+        "max_wait": max(waits) if waits else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate N workers sharing the Redis token-bucket limiter.")
+    parser.add_argument("--workers", default="1,4,16")
+    parser.add_argument("--qpm", type=int, default=600)
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"target_qpm={args.qpm} burst={args.burst} duration={args.duration:.0f}s")
+    print(f"{'workers':>7} {'granted':>8} {'qpm':>8} {'p50_wait':>9} {'p99_wait':>9} {'max_wait':>9}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        result = simulate(workers, args.qpm, args.burst, args.duration)
+        print(
+            f"{result['workers']:>7} {result['granted']:>8} {result['achieved_qpm']:>8.1f} "
+            f"{result['p50_wait']:>9.3f} {result['p99_wait']:>9.3f} {result['max_wait']:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, List
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report endpoint latency: legacy DB-first path vs Redis pointer path.")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/report_latency.db"
+    os.environ["DATABASE_URL"] = database_url
+
+    from fastapi import HTTPException
+    from fastapi.testclient import TestClient
+    from sqlalchemy import select
+
+    from app.api.routes import _build_report
+    from app.features import compute_features
+    from app.main import app
+    from app.scoring.rules_v1 import score
+    from app.store.db import get_session, init_db
+    from app.store.models import Account, FeatureSet, Platform, Score, Snapshot
+    from app.utils.cache import RedisCache
+    from benchmarks.synthetic import make_items
+
+    def legacy_get_report(username: str, snapshot: str = "latest"):
+        cache = RedisCache(prefix="report")
+        with get_session() as session:
+            account = session.execute(
+                select(Account).where(Account.platform == Platform.reddit, Account.handle == username)
+            ).scalar_one_or_none()
+            if not account:
+                raise HTTPException(status_code=404, detail="Account not found")
+            query = select(Snapshot).where(Snapshot.account_id == account.id)
+            query = query.order_by(Snapshot.collected_at.desc()).limit(1)
+            snapshot_obj = session.execute(query).scalar_one_or_none()
+            cache_key = f"{username}:{snapshot_obj.id}"
+            cached = cache.get_json(cache_key)
+            if cached:
+                return cached
+            report = _build_report(snapshot_obj)
+            cache.set_json(cache_key, report.model_dump(), ttl_seconds=3600)
+            return report
+
+    app.add_api_route("/legacy/report/reddit/{username}", legacy_get_report)
+
+    init_db()
+    usernames = [f"bench_report_{index}" for index in range(args.accounts)]
+    with get_session() as session:
+        for index, username in enumerate(usernames):
+            if session.execute(select(Account.id).where(Account.handle == username)).scalar_one_or_none():
+                continue
+            account = Account(platform=Platform.reddit, handle=username)
+            session.add(account)
+            session.flush()
+            items = make_items(200, seed=index)
+            features = compute_features(items)
+            payload, _ = score(features, {}, items)
+            snapshot = Snapshot(account_id=account.id, post_count=50, comment_count=150, collector_version="bench")
+            session.add(snapshot)
+            session.flush()
+            session.add(FeatureSet(snapshot_id=snapshot.id, json=features))
+            session.add(
+                Score(
+                    snapshot_id=snapshot.id,
+                    automation_score=payload["automation_score"],
+                    coordination_score=payload["coordination_score"],
+                    confidence=payload["confidence"],
+                    reasons=payload["reasons"],
+                    explanations=payload["explanations"],
+                )
+            )
+
+    client = TestClient(app)
+    rng = random.Random(0)
+
+    def measure(path: Callable[[str], str]) -> List[float]:
+        for username in usernames:
+            client.get(path(username))
+        latencies = []
+        for _ in range(args.requests):
+            username = rng.choice(usernames)
+            start = time.perf_counter()
+            response = client.get(path(username))
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+        return latencies
+
+    print(f"{'path':<8} {'requests':>8} {'p50_ms':>8} {'p99_ms':>8}")
+    for name, path in (
+        ("before", lambda u: f"/legacy/report/reddit/{u}"),
+        ("after", lambda u: f"/api/report/reddit/{u}?snapshot=latest"),
+    ):
+        latencies = measure(path)
+        print(
+            f"{name:<8} {len(latencies):>8} {_percentile(latencies, 0.5) * 1000:>8.2f} "
+            f"{_percentile(latencies, 0.99) * 1000:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-account rule scoring vs the vectorized rule table.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from app.scoring.engine import score_rules
+    from app.scoring.rules_v1 import RULES, input_matrix, score_inputs
+
+    rng = random.Random(args.seed)
+    rows = [
+        {
+            "activity_per_day": rng.uniform(0, 250),
+            "burstiness_index": rng.uniform(0, 1.5),
+            "sleep_gap_hours_p95": rng.uniform(0, 12),
+            "near_duplicate_rate": rng.uniform(0, 0.8),
+            "history_reuse_rate": rng.uniform(0, 0.8),
+            "link_domain_concentration": rng.uniform(0, 1),
+            "subreddit_concentration": rng.uniform(0, 1),
+            "short_comment_rate": rng.uniform(0, 1),
+            "url_rate": rng.uniform(0, 1),
+            "account_age_days": rng.choice([None, rng.uniform(0, 400)]),
+            "thread_diversity": rng.uniform(0, 1),
+            "comment_count": rng.randrange(0, 500),
+            "subreddit_entropy": rng.uniform(0, 1),
+            "total_items": rng.randrange(0, 1000),
+            "span_days": rng.uniform(0, 90),
+            "timestamp_completeness": 1.0,
+        }
+        for _ in range(args.rows)
+    ]
+
+    start = time.perf_counter()
+    expected = [min(100, sum(score_rules(RULES, row).values())) for row in rows]
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = input_matrix(rows)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    result = score_inputs(matrix)
+    vectorized = time.perf_counter() - start
+    assert result["automation_score"].tolist() == expected
+
+    print(f"rows={args.rows} rules={len(RULES)}")
+    print(f"mode=per_row seconds={per_row:.3f} rows_per_s={args.rows / per_row:.0f}")
+    print(
+        f"mode=vectorized seconds={vectorized:.3f} rows_per_s={args.rows / vectorized:.0f} "
+        f"matrix_build_seconds={build:.3f} speedup={per_row / vectorized:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import argparse
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+from app.workers.scheduler import LANE_BUDGET_SHARE, LANE_INTERACTIVE, LANE_OFFLINE, LANE_REFRESH, LANES
+
+
+@dataclass
+class SimJob:
+    lane: str
+    cost: int
+    arrived: float
+    cpu_seconds: float = 0.0
+    remaining: int = 0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct)))]
+
+
+def make_workload(duration: float, interactive_per_minute: float, refresh_burst: int, offline: int, seed: int) -> List[SimJob]:
+    rng = random.Random(seed)
+    jobs: List[SimJob] = []
+    now = 0.0
+    while True:
+        now += rng.expovariate(interactive_per_minute / 60.0)
+        if now >= duration:
+            break
+        jobs.append(SimJob(LANE_INTERACTIVE, rng.choice((3, 3, 11)), now))
+    # A scheduled refresh of every tracked account lands at once shortly after start.
+    jobs.extend(SimJob(LANE_REFRESH, 11, 5.0) for _ in range(refresh_burst))
+    jobs.extend(SimJob(LANE_OFFLINE, 0, 5.0, cpu_seconds=2.0) for _ in range(offline))
+    jobs.sort(key=lambda job: job.arrived)
+    return jobs
+
+
+def simulate(jobs: List[SimJob], workers: int, qpm: int, budget: Optional[int]) -> Dict[str, dict]:
+    # One tick is one API call slot of the shared token bucket; running jobs take calls round-robin.
+    tick = 60.0 / qpm
+    arrivals: Deque[SimJob] = deque(jobs)
+    pending: Dict[str, Deque[SimJob]] = {lane: deque() for lane in LANES}
+    fifo: Deque[SimJob] = deque()
+    running: List[SimJob] = []
+    committed = 0
+    now = 0.0
+    done = 0
+    cursor = 0
+    for job in jobs:
+        job.remaining = job.cost
+        job.started = job.finished = None
+
+    while done < len(jobs):
+        while arrivals and arrivals[0].arrived <= now:
+            job = arrivals.popleft()
+            (fifo if budget is None else pending[job.lane]).append(job)
+
+        while len(running) < workers:
+            if budget is None:
+                if not fifo:
+                    break
+                job = fifo.popleft()
+            else:
+                job = None
+                for lane in LANES:
+                    head = pending[lane][0] if pending[lane] else None
+                    if head is None:
+                        continue
+                    if head.cost and committed and committed + head.cost > budget * LANE_BUDGET_SHARE[lane]:
+                        continue
+                    job = pending[lane].popleft()
+                    break
+                if job is None:
+                    break
+            job.started = now
+            committed += job.cost
+            running.append(job)
+
+        callers = [job for job in running if job.remaining]
+        if callers:
+            caller = callers[cursor % len(callers)]
+            cursor += 1
+            caller.remaining -= 1
+        now += tick
+        for job in list(running):
+            if job.remaining or now - job.started < job.cpu_seconds:
+                continue
+            job.finished = now
+            committed -= job.cost
+            running.remove(job)
+            done += 1
+
+    results: Dict[str, dict] = {}
+    for lane in LANES:
+        lane_jobs = [job for job in jobs if job.lane == lane]
+        waits = [job.started - job.arrived for job in lane_jobs]
+        latencies = [job.finished - job.arrived for job in lane_jobs]
+        results[lane] = {
+            "jobs": len(lane_jobs),
+            "wait_p50": _percentile(waits, 0.5),
+            "wait_p95": _percentile(waits, 0.95),
+            "latency_p50": _percentile(latencies, 0.5),
+            "latency_p95": _percentile(latencies, 0.95),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Simulate FIFO vs. priority lanes with API-budget admission on a mixed workload."
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--qpm", type=int, default=100)
+    parser.add_argument("--horizon-minutes", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=600.0)
+    parser.add_argument("--interactive-per-minute", type=float, default=3.0)
+    parser.add_argument("--refresh-burst", type=int, default=40)
+    parser.add_argument("--offline", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    jobs = make_workload(args.duration, args.interactive_per_minute, args.refresh_burst, args.offline, args.seed)
+    budget = int(args.qpm * args.horizon_minutes)
+    for name, lane_budget in (("fifo", None), ("lanes", budget)):
+        for lane, stats in simulate(jobs, args.workers, args.qpm, lane_budget).items():
+            print(
+                f"mode={name} lane={lane} jobs={stats['jobs']} "
+                f"wait_p50={stats['wait_p50']:.1f}s wait_p95={stats['wait_p95']:.1f}s "
+                f"latency_p50={stats['latency_p50']:.1f}s latency_p95={stats['latency_p95']:.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
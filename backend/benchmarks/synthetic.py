@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import List
+
+
+_WORDS = (
+    "the a this that really think good bad people thread post link game vote update news "
+    "market price thanks agree source read week team play check deal code help"
+).split()
+_SUBREDDITS = ["AskReddit", "news", "gaming", "worldnews", "pics", "funny", "technology", "movies"]
+_DOMAINS = ["youtube.com", "imgur.com", "github.com", "nytimes.com", "bbc.co.uk", "wikipedia.org", "arxiv.org", "example.org"]
+
+
+def make_items(count: int, seed: int = 0, now: float | None = None) -> List[dict]:
+    rng = random.Random(seed)
+    now = now or time.time()
+    items: List[dict] = []
+    created = now
+    for index in range(count):
+        created -= rng.expovariate(1 / 1800)
+        kind = "post" if index % 4 == 0 else "comment"
+        text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 40)))
+        items.append(
+            {
+                "kind": kind,
+                "item_id": f"{'t3' if kind == 'post' else 't1'}_{index:08x}",
+                "created_utc": created,
+                "subreddit": rng.choice(_SUBREDDITS),
+                "permalink": f"https://www.reddit.com/r/x/comments/{index:08x}/",
+                "body_text": text,
+                "url": f"https://example{rng.randint(0, 5)}.com/{index}" if kind == "post" else None,
+                "link_id": f"t3_{rng.randint(0, count // 3 + 1):08x}" if kind == "comment" else None,
+                "parent_id": f"t3_{rng.randint(0, count // 3 + 1):08x}" if kind == "comment" else None,
+            }
+        )
+    return items
+
+
+def make_texts(count: int, duplicate_share: float = 0.3, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    templates = [[rng.choice(_WORDS) for _ in range(rng.randint(8, 25))] for _ in range(max(count // 50, 1))]
+    texts: List[str] = []
+    for _ in range(count):
+        if rng.random() < duplicate_share:
+            words = list(rng.choice(templates))
+            words[rng.randrange(len(words))] = rng.choice(_WORDS)
+        else:
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(3, 40))]
+        texts.append(" ".join(words))
+    return texts
+
+
+def _item(prefix: str, index: int, kind: str, created: float, subreddit: str, text: str, url: str | None, thread: int) -> dict:
+    name = f"{prefix}{index:07x}"
+    return {
+        "kind": kind,
+        "item_id": f"{'t3' if kind == 'post' else 't1'}_{name}",
+        "created_utc": created,
+        "subreddit": subreddit,
+        "permalink": f"https://www.reddit.com/r/{subreddit}/comments/{name}/",
+        "body_text": text,
+        "url": url,
+        "link_id": f"t3_{thread:08x}" if kind == "comment" else None,
+        "parent_id": f"t3_{thread:08x}" if kind == "comment" else None,
+    }
+
+
+def make_human_items(count: int, seed: int = 0, now: float | None = None) -> List[dict]:
+    # Sessions of a few items while awake (16h a day), varied text, many subreddits and threads.
+    rng = random.Random(seed)
+    prefix = f"h{seed % 256:02x}"
+    created = now or time.time()
+    items: List[dict] = []
+    for index in range(count):
+        created -= rng.expovariate(1 / 300) if rng.random() < 0.5 else rng.expovariate(1 / 10800)
+        if (created % 86400) / 3600 < 8:
+            created -= 8 * 3600 + rng.uniform(0, 3600)
+        kind = "post" if rng.random() < 0.2 else "comment"
+        text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 60)))
+        url = f"https://{rng.choice(_DOMAINS)}/{index}"
+        items.append(
+            _item(prefix, index, kind, created, rng.choice(_SUBREDDITS), text, url if kind == "post" and rng.random() < 0.5 else None,
+                  rng.randrange(count))
+        )
+    return items
+
+
+def make_bursty_bot_items(count: int, seed: int = 0, now: float | None = None) -> List[dict]:
+    # Bursts of 5-15 items seconds apart every ~20 minutes around the clock, stock short replies in a
+    # handful of threads.
+    rng = random.Random(seed)
+    prefix = f"b{seed % 256:02x}"
+    replies = ["great post!", "so true", "thanks for sharing", "this.", "agreed 100%", "lol nice"]
+    created = now or time.time()
+    threads = [rng.randrange(1 << 24) for _ in range(max(count // 100, 3))]
+    items: List[dict] = []
+    burst_left = 0
+    for index in range(count):
+        if burst_left == 0:
+            created -= rng.gauss(1200, 60)
+            burst_left = rng.randint(5, 15)
+        created -= rng.uniform(5, 15)
+        burst_left -= 1
+        kind = "post" if index % 10 == 0 else "comment"
+        text = rng.choice(replies) if kind == "comment" else " ".join(rng.choice(_WORDS) for _ in range(8))
+        items.append(_item(prefix, index, kind, created, rng.choice(_SUBREDDITS[:2]), text, None, rng.choice(threads)))
+    return items
+
+
+def make_spammer_items(count: int, seed: int = 0, now: float | None = None) -> List[dict]:
+    # Copy-paste promotion: a few templates with one word swapped, one linked domain, two subreddits.
+    rng = random.Random(seed)
+    prefix = f"s{seed % 256:02x}"
+    templates = [[rng.choice(_WORDS) for _ in range(rng.randint(12, 25))] for _ in range(3)]
+    created = now or time.time()
+    items: List[dict] = []
+    for index in range(count):
+        created -= rng.expovariate(1 / 600)
+        words = list(rng.choice(templates))
+        words[rng.randrange(len(words))] = rng.choice(_WORDS)
+        link = f"https://deals-{seed % 7}.example.com/p/{index}"
+        kind = "post" if index % 3 == 0 else "comment"
+        items.append(
+            _item(prefix, index, kind, created, rng.choice(_SUBREDDITS[:2]), f"{' '.join(words)} {link}",
+                  link if kind == "post" else None, rng.randrange(count))
+        )
+    return items
+
+
+ACCOUNT_GENERATORS = {
+    "human": make_human_items,
+    "bursty_bot": make_bursty_bot_items,
+    "spammer": make_spammer_items,
+}
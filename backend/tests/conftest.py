@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+import pytest
+
+from benchmarks.fake_reddit import FakeRedditServer
+
+# Settings are read at import time, so the environment is set before any app module is imported.
+# Redis is optional here: the caches and the rate limiter degrade to no-ops when it is unreachable.
+_server = FakeRedditServer().start()
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/tests.db"
+os.environ["REDDIT_API_BASE_URL"] = _server.base_url
+os.environ["REDDIT_AUTH_URL"] = f"{_server.base_url}/api/v1/access_token"
+os.environ.setdefault("REDDIT_CLIENT_ID", "test")
+os.environ.setdefault("REDDIT_CLIENT_SECRET", "test")
+os.environ["REDDIT_QPM_LIMIT"] = "1000000"
+os.environ["REDDIT_RATE_BURST"] = "1000"
+os.environ["METRICS_ENABLED"] = "false"
+
+
+@pytest.fixture(scope="session")
+def fake_reddit() -> FakeRedditServer:
+    from app.store.db import init_db
+
+    init_db()
+    yield _server
+    _server.stop()
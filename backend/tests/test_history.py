@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import time
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from benchmarks.synthetic import ACCOUNT_GENERATORS
+
+
+@pytest.mark.parametrize("profile", sorted(ACCOUNT_GENERATORS))
+def test_unchanged_items_are_not_history_reuse(fake_reddit, profile):
+    from app.store.db import get_session
+    from app.store.models import FeatureSet
+    from app.workers.jobs import _analyze
+
+    username = f"{profile}_{uuid.uuid4().hex[:8]}"
+    fake_reddit.add_account(username, ACCOUNT_GENERATORS[profile](200, seed=1), created_utc=time.time() - 400 * 86400)
+
+    first = _analyze(username, False, lambda value: None, max_items=400)
+    second = _analyze(username, False, lambda value: None, max_items=400)
+
+    with get_session() as session:
+        features = session.execute(
+            select(FeatureSet.json).where(FeatureSet.snapshot_id == second["snapshot_id"])
+        ).scalar_one()
+    assert features["history"]["history_reuse_rate"] == 0
+    assert second["scores"]["automation_score"] == first["scores"]["automation_score"]
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import uuid
+
+from fastapi.testclient import TestClient
+
+
+def test_history_pages_end(fake_reddit):
+    from app.main import app
+    from app.store.db import get_session
+    from app.store.models import Account, Platform, Snapshot
+
+    username = f"history_{uuid.uuid4().hex[:8]}"
+    with get_session() as session:
+        account = Account(platform=Platform.reddit, handle=username)
+        session.add(account)
+        session.flush()
+        # Inserted within the same second, so the stored timestamps tie (SQLite keeps no microseconds).
+        session.add_all([Snapshot(account_id=account.id, post_count=0, comment_count=0, data_coverage_days=0, collector_version="test") for _ in range(5)])
+
+    with TestClient(app) as client:
+        seen = []
+        cursor = None
+        for _ in range(10):
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = client.get(f"/api/history/reddit/{username}", params=params).json()
+            seen.extend(item["snapshot_id"] for item in page["snapshots"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+    assert cursor is None
+    assert len(seen) == 5
+    assert seen == sorted(set(seen), reverse=True)
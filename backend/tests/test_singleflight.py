@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import Counter
+
+import pytest
+from sqlalchemy import func, select
+
+REQUESTS = 50
+
+
+@pytest.fixture
+def redis_connection():
+    from redis.exceptions import RedisError
+
+    from app.utils.redis_client import get_redis
+
+    redis = get_redis()
+    try:
+        redis.ping()
+    except RedisError:
+        pytest.skip("singleflight needs Redis")
+    return redis
+
+
+def test_concurrent_analyze_requests_run_one_job(fake_reddit, redis_connection):
+    from fastapi.testclient import TestClient
+    from rq import Queue, SimpleWorker
+
+    from app.main import app
+    from app.store.db import get_session
+    from app.store.models import Account, Snapshot
+    from app.workers.scheduler import LANES
+    from app.workers.singleflight import inflight_key
+
+    username = f"singleflight_{uuid.uuid4().hex[:8]}"
+    fake_reddit.add_account(username, created_utc=time.time() - 400 * 86400)
+    # The same handle in the spellings parse_username accepts.
+    spellings = [username, f"u/{username}", f"https://www.reddit.com/user/{username}/"]
+    barrier = threading.Barrier(REQUESTS)
+    responses: list[dict] = []
+    lock = threading.Lock()
+
+    with TestClient(app) as client:
+
+        def fire(index: int) -> None:
+            barrier.wait()
+            response = client.post("/api/analyze/reddit", json={"username": spellings[index % len(spellings)]})
+            with lock:
+                responses.append(response.json())
+
+        threads = [threading.Thread(target=fire, args=(i,)) for i in range(REQUESTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        queues = [Queue(lane, connection=redis_connection) for lane in LANES]
+        SimpleWorker(queues, connection=redis_connection).work(burst=True)
+        job_ids = Counter(response["job_id"] for response in responses)
+        statuses = {client.get(f"/api/jobs/{job_id}").json()["status"] for job_id in job_ids}
+
+    with get_session() as session:
+        runs = session.execute(
+            select(func.count()).select_from(Snapshot).join(Account).where(Account.handle == username)
+        ).scalar_one()
+
+    assert len(responses) == REQUESTS
+    assert len(job_ids) == 1
+    assert statuses == {"finished"}
+    assert runs == 1
+    assert not redis_connection.exists(inflight_key(username))
@@ -0,0 +1,18 @@
+export default function TrendShiftList({ shifts }) {
+  if (!shifts || shifts.length === 0) {
+    return <div className="card">No behavior shifts detected.</div>;
+  }
+  return (
+    <div className="card">
+      <h3>Behavior shifts</h3>
+      <ul>
+        {shifts.map((shift) => (
+          <li key={`${shift.snapshot_id}-${shift.metric}`}>
+            {shift.collected_at} — {shift.metric} {shift.direction} to {shift.value.toFixed(2)} (baseline{' '}
+            {shift.baseline_mean.toFixed(2)}, z {shift.z_score.toFixed(1)})
+          </li>
+        ))}
+      </ul>
+    </div>
+  );
+}
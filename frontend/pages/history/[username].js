@@ -1,6 +1,7 @@
 import { useRouter } from 'next/router';
 import { useEffect, useState } from 'react';
 import HistoryList from '../../components/HistoryList';
+import TrendShiftList from '../../components/TrendShiftList';
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE_URL || 'http://localhost:8000';
 
@@ -8,21 +9,39 @@ export default function HistoryPage() {
   const router = useRouter();
   const { username } = router.query;
   const [history, setHistory] = useState(null);
+  const [trends, setTrends] = useState(null);
 
   useEffect(() => {
     if (!username) return;
     fetch(`${API_BASE}/api/history/reddit/${username}`)
       .then((res) => res.json())
       .then((data) => setHistory(data));
+    fetch(`${API_BASE}/api/trends/reddit/${username}`)
+      .then((res) => res.json())
+      .then((data) => setTrends(data));
   }, [username]);
 
+  const loadMore = () => {
+    fetch(`${API_BASE}/api/history/reddit/${username}?cursor=${encodeURIComponent(history.next_cursor)}`)
+      .then((res) => res.json())
+      .then((data) =>
+        setHistory({ ...data, snapshots: [...history.snapshots, ...(data.snapshots || [])] })
+      );
+  };
+
   return (
     <main>
       <header>
         <h1>History for {username}</h1>
       </header>
       {!history && <div className="card">Loading…</div>}
+      {trends && <TrendShiftList shifts={trends.shifts} />}
       {history && <HistoryList snapshots={history.snapshots} />}
+      {history && history.next_cursor && (
+        <button type="button" onClick={loadMore}>
+          Load more
+        </button>
+      )}
     </main>
   );
 }
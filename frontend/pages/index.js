@@ -44,17 +44,20 @@ export default function Home() {
     if (jobId) {
       console.info(`job_id ${jobId}`);
     }
+    const showReport = async (resultUrl) => {
+      const reportRes = await fetch(`${API_BASE}${resultUrl}`);
+      const reportJson = await reportRes.json();
+      setReport(reportJson);
+      updateStatus('finished');
+      setLoading(false);
+    };
     let attempts = 0;
     const poll = async () => {
       attempts += 1;
       const statusRes = await fetch(`${API_BASE}/api/jobs/${jobId}`);
       const statusJson = await statusRes.json();
       if (statusJson.status === 'finished' && statusJson.result_url) {
-        const reportRes = await fetch(`${API_BASE}${statusJson.result_url}`);
-        const reportJson = await reportRes.json();
-        setReport(reportJson);
-        updateStatus('finished');
-        setLoading(false);
+        await showReport(statusJson.result_url);
         return;
       }
       if (attempts < 20) {
@@ -65,7 +68,29 @@ export default function Home() {
         setLoading(false);
       }
     };
-    poll();
+    if (typeof EventSource === 'undefined') {
+      poll();
+      return;
+    }
+    // Progress is pushed over server-sent events; polling is only the fallback.
+    const events = new EventSource(`${API_BASE}/api/jobs/${jobId}/events`);
+    events.addEventListener('status', async (event) => {
+      const statusJson = JSON.parse(event.data);
+      if (statusJson.status === 'finished' && statusJson.result_url) {
+        events.close();
+        await showReport(statusJson.result_url);
+      } else if (statusJson.status === 'failed') {
+        events.close();
+        updateStatus('failed');
+        setLoading(false);
+      } else {
+        updateStatus(statusJson.status);
+      }
+    });
+    events.onerror = () => {
+      events.close();
+      poll();
+    };
   };
 
   return (